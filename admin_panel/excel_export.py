@@ -0,0 +1,194 @@
+"""
+Module pour l'export des produits (Excel, CSV, Parquet)
+
+Les produits sont lus par lots (pagination sur la référence, index unique): PyMySQL
+charge tout le résultat d'une requête en mémoire, même avec iterator(), la mémoire ne
+dépend donc que de la taille d'un lot. Le classeur Excel est écrit en mode write_only
+(lignes écrites sur disque au fur et à mesure) avec deux styles nommés partagés par
+toutes les cellules; le CSV est produit ligne à ligne pendant la réponse. Le fichier
+Excel et le CSV reprennent les colonnes de l'import: un export peut être réimporté.
+Le Parquet (pyarrow) garde les types (décimaux, booléens, codes de statut) pour la BI.
+"""
+import csv
+import importlib.util
+import io
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from shop.models import Product
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (colonne Excel/CSV, colonne Parquet, largeur Excel)
+EXPORT_COLUMNS = [
+    ('Référence *', 'reference', 15),
+    ('Nom du produit *', 'name', 50),
+    ('Catégorie *', 'category', 20),
+    ('Sous-catégorie *', 'subcategory', 25),
+    ('Marque', 'brand', 20),
+    ('Type', 'type', 20),
+    ('Collection', 'collection', 20),
+    ('Prix (DH) *', 'price', 12),
+    ('Prix Promo (DH)', 'discount_price', 15),
+    ('Quantité *', 'quantity', 10),
+    ('Statut', 'status', 18),
+    ('Description *', 'description', 60),
+    ('Caractéristiques', 'caracteristiques', 50),
+    ('Garantie', 'warranty', 20),
+    ('Poids (kg)', 'weight', 12),
+    ('Meta Titre SEO', 'meta_title', 50),
+    ('Meta Description SEO', 'meta_description', 80),
+    ('Best Seller', 'is_bestseller', 12),
+    ('En vedette', 'is_featured', 12),
+    ('Nouveau', 'is_new', 10),
+]
+
+# Champs lus (values_list): la marque texte remplace la marque absente
+QUERY_FIELDS = [
+    'reference', 'name', 'category__name', 'subcategory__name', 'brand__name', 'type__name',
+    'collection__name', 'price', 'discount_price', 'quantity', 'status', 'description',
+    'caracteristiques', 'warranty', 'weight', 'meta_title', 'meta_description',
+    'is_bestseller', 'is_featured', 'is_new', 'brand_text',
+]
+
+STATUS_LABELS = dict(Product.STATUS_CHOICES)
+
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def product_record(row):
+    """Ligne values_list (QUERY_FIELDS) -> valeurs dans l'ordre EXPORT_COLUMNS"""
+    reference, name, category, subcategory, brand, type_name, collection, *values, brand_text = row
+    return (
+        reference, name, category or '', subcategory or '', brand or brand_text or '',
+        type_name or '', collection or '', *values,
+    )
+
+
+def iter_product_chunks(chunk_size=EXPORT_CHUNK_SIZE):
+    """Lots de produits (tuples typés, ordre EXPORT_COLUMNS) triés par référence"""
+    queryset = Product.objects.order_by('reference').values_list(*QUERY_FIELDS)
+    last_reference = None
+    while True:
+        page = queryset if last_reference is None else queryset.filter(reference__gt=last_reference)
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        last_reference = rows[-1][0]
+        yield [product_record(row) for row in rows]
+        if len(rows) < chunk_size:
+            return
+
+
+def sheet_row(record):
+    """Ligne Excel/CSV d'un produit (mêmes valeurs que le fichier d'import)"""
+    row = list(record)
+    for i in (7, 8, 14):
+        row[i] = row[i] or ''
+    row[10] = STATUS_LABELS.get(row[10], row[10])
+    for i in (17, 18, 19):
+        row[i] = 'OUI' if row[i] else 'NON'
+    return row
+
+
+def write_xlsx(output, chunk_size=EXPORT_CHUNK_SIZE):
+    """Écrit le classeur dans output (chemin ou fichier binaire)"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Produits")
+
+    # Styles nommés: un seul format partagé par toutes les cellules de données
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    wb.add_named_style(NamedStyle(
+        name='export_header',
+        font=Font(bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        border=border,
+    ))
+    wb.add_named_style(NamedStyle(
+        name='export_cell',
+        alignment=Alignment(vertical="center", wrap_text=True),
+        border=border,
+    ))
+
+    # En mode write_only, largeurs et volet figé doivent précéder la première ligne
+    for col_num, (_, _, width) in enumerate(EXPORT_COLUMNS, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+    ws.freeze_panes = 'A2'
+
+    def styled(value, style):
+        if isinstance(value, str):
+            value = ILLEGAL_CHARACTERS_RE.sub('', value)
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled(title, 'export_header') for title, _, _ in EXPORT_COLUMNS])
+    for records in iter_product_chunks(chunk_size):
+        for record in records:
+            ws.append([styled(value, 'export_cell') for value in sheet_row(record)])
+    wb.save(output)
+
+
+def iter_csv(chunk_size=EXPORT_CHUNK_SIZE):
+    """Contenu CSV (UTF-8 avec BOM, séparateur ';' pour Excel) produit lot par lot"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow([title for title, _, _ in EXPORT_COLUMNS])
+    yield '\ufeff' + buffer.getvalue()
+    for records in iter_product_chunks(chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(sheet_row(record) for record in records)
+        yield buffer.getvalue()
+
+
+def write_csv(output, chunk_size=EXPORT_CHUNK_SIZE):
+    """Écrit le CSV dans output (fichier binaire)"""
+    for part in iter_csv(chunk_size):
+        output.write(part.encode('utf-8'))
+
+
+def parquet_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    types = {
+        'price': pa.decimal128(10, 2), 'discount_price': pa.decimal128(10, 2), 'weight': pa.decimal128(6, 2),
+        'quantity': pa.int32(),
+        'is_bestseller': pa.bool_(), 'is_featured': pa.bool_(), 'is_new': pa.bool_(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for _, name, _ in EXPORT_COLUMNS])
+
+
+def write_parquet(output, chunk_size=EXPORT_CHUNK_SIZE):
+    """Écrit le fichier Parquet dans output (un groupe de lignes par lot); nécessite pyarrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+    with pq.ParquetWriter(output, schema, compression='snappy') as writer:
+        for records in iter_product_chunks(chunk_size):
+            columns = list(zip(*records))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+
+
+EXPORT_WRITERS = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+    'parquet': write_parquet,
+}
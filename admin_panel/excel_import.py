@@ -1,15 +1,36 @@
 """
 Module pour l'importation de produits depuis Excel via l'interface admin
 """
+import codecs
+import csv
+import itertools
+import os
+import numpy as np
+import openpyxl
 import pandas as pd
 import re
-from django.db import transaction, connection
+from decimal import Decimal
+from django.db import connection, models, transaction
+from django.utils import timezone
 from django.utils.text import slugify
+from shop.catalog_cache import bump_catalog_version
+from shop.search import fold, index_products
+from shop.specs import index_product_attributes
 from shop.models import (
     Category, SubCategory, Brand, Type, Product, 
     ProductSpecification, Collection
 )
 
+BOOLEAN_VALUES = ['oui', 'yes', 'true', '1', 'vrai']
+
+STATUS_MAP = {
+    'en stock': 'in_stock',
+    'rupture': 'out_of_stock',
+    'rupture de stock': 'out_of_stock',
+    'précommande': 'preorder',
+    'discontinué': 'discontinued',
+}
+
 def clean_data(value):
     """Nettoie les données du fichier Excel"""
     if pd.isna(value):
@@ -105,15 +126,7 @@ def parse_status(status_text):
     if not status_text:
         return 'in_stock'
     
-    status_map = {
-        'en stock': 'in_stock',
-        'rupture': 'out_of_stock',
-        'rupture de stock': 'out_of_stock',
-        'précommande': 'preorder',
-        'discontinué': 'discontinued',
-    }
-    
-    return status_map.get(status_text.lower(), 'in_stock')
+    return STATUS_MAP.get(status_text.lower(), 'in_stock')
 
 def parse_boolean(value):
     """Parse une valeur booléenne"""
@@ -124,40 +137,290 @@ def parse_boolean(value):
         return value
     
     value = str(value).strip().lower()
-    return value in ['oui', 'yes', 'true', '1', 'vrai']
+    return value in BOOLEAN_VALUES
+
+# Colonnes du modèle Excel
+TEXT_COLUMNS = {
+    'reference': 'Référence *',
+    'name': 'Nom du produit *',
+    'category': 'Catégorie *',
+    'subcategory': 'Sous-catégorie *',
+    'description': 'Description *',
+    'brand': 'Marque',
+    'type': 'Type',
+    'collection': 'Collection',
+    'caracteristiques': 'Caractéristiques',
+    'warranty': 'Garantie',
+    'meta_title': 'Meta Titre SEO',
+    'meta_description': 'Meta Description SEO',
+}
+
+def get_column(df, name):
+    """Colonne du fichier, ou colonne vide si elle est absente"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+def clean_column(series):
+    """clean_data appliqué à toute une colonne (None pour les valeurs vides)"""
+    values = series.astype('string').str.strip()
+    invalid = values.isna() | values.str.lower().isin(['nan', '', 'none']) | values.str.startswith('Ex:')
+    return values.astype(object).where(~invalid.fillna(True).astype(bool), None)
+
+def numeric_column(series):
+    """Conversion en nombre d'une colonne (NaN si vide ou invalide)"""
+    return pd.to_numeric(series.astype('string').str.strip(), errors='coerce')
+
+def boolean_column(series):
+    """parse_boolean appliqué à toute une colonne"""
+    values = series.astype('string').str.strip().str.lower()
+    return values.isin(BOOLEAN_VALUES).fillna(False).astype(bool)
+
+def status_column(series):
+    """parse_status appliqué à toute une colonne"""
+    return clean_column(series).str.lower().map(STATUS_MAP).fillna('in_stock')
+
+def optional_number(value):
+    """NaN et 0 -> None (prix promo, poids)"""
+    if pd.isna(value) or not value:
+        return None
+    return float(value)
+
+def prepare_rows(df):
+    """
+    Nettoie et convertit toutes les colonnes en une fois
+    Retourne un DataFrame aux colonnes normalisées et le masque des lignes valides
+    """
+    data = pd.DataFrame(index=df.index)
+    for field, column in TEXT_COLUMNS.items():
+        data[field] = clean_column(get_column(df, column))
+
+    price = get_column(df, 'Prix (DH) *')
+    quantity = get_column(df, 'Quantité *')
+    data['price'] = numeric_column(price)
+    data['quantity'] = numeric_column(quantity)
+    data['discount_price'] = numeric_column(get_column(df, 'Prix Promo (DH)'))
+    data['weight'] = numeric_column(get_column(df, 'Poids (kg)'))
+    data['is_bestseller'] = boolean_column(get_column(df, 'Best Seller'))
+    data['is_featured'] = boolean_column(get_column(df, 'En vedette'))
+    data['is_new'] = boolean_column(get_column(df, 'Nouveau'))
+    data['status'] = status_column(get_column(df, 'Statut'))
+    data['has_status'] = clean_column(get_column(df, 'Statut')).notna()
+
+    # Données obligatoires, prix et quantité numériques
+    valid = (
+        data['reference'].notna() & data['name'].notna()
+        & data['category'].notna() & data['subcategory'].notna()
+        & data['price'].notna() & data['quantity'].notna()
+    )
+    return data, valid
+
+# Champs obligatoires: (colonne normalisée, colonne du fichier)
+REQUIRED_COLUMNS = [
+    ('reference', 'Référence *'),
+    ('name', 'Nom du produit *'),
+    ('category', 'Catégorie *'),
+    ('subcategory', 'Sous-catégorie *'),
+    ('price', 'Prix (DH) *'),
+    ('quantity', 'Quantité *'),
+]
+
+# Mode mise à jour: champs comparés aux produits existants
+UPSERT_FIELDS = ['price', 'discount_price', 'quantity', 'status', 'is_bestseller', 'is_featured', 'is_new']
+
+# Champs optionnels mis à jour seulement si leur colonne est présente dans le fichier
+UPSERT_COLUMNS = {
+    'discount_price': 'Prix Promo (DH)',
+    'is_bestseller': 'Best Seller',
+    'is_featured': 'En vedette',
+    'is_new': 'Nouveau',
+}
+
+def to_decimal(value):
+    """Prix du fichier -> Decimal à 2 décimales, comparable aux valeurs de la base"""
+    return Decimal(str(float(value))).quantize(Decimal('0.01'))
+
+# Lignes lues et préparées à la fois: la mémoire dépend de ce lot, pas de la taille du fichier
+READ_CHUNK_SIZE = 5000
+
+def reference_key(reference):
+    """Clé de comparaison des références: insensible à la casse et aux accents, comme l'index unique MySQL"""
+    return fold(reference).strip()
+
+def sniff_csv(file_path):
+    """Encodage et séparateur d'un fichier CSV (les exports Excel français utilisent ';')"""
+    with open(file_path, 'rb') as f:
+        head = f.read(65536)
+    try:
+        # Décodeur incrémental: un caractère coupé en fin d'échantillon n'est pas une erreur
+        sample = codecs.getincrementaldecoder('utf-8-sig')().decode(head)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        sample = head.decode('cp1252', errors='replace')
+        encoding = 'cp1252'
+    try:
+        delimiter = csv.Sniffer().sniff(sample.split('\n', 1)[0], delimiters=';,\t').delimiter
+    except csv.Error:
+        delimiter = ','
+    return encoding, delimiter
+
+def read_csv_chunks(file_path, chunk_size):
+    """DataFrames successifs de chunk_size lignes d'un fichier CSV"""
+    encoding, delimiter = sniff_csv(file_path)
+    # L'index continue d'un lot à l'autre: Index + 2 reste le numéro de ligne du fichier
+    yield from pd.read_csv(file_path, sep=delimiter, encoding=encoding, dtype=str, chunksize=chunk_size)
+
+def read_xlsx_chunks(file_path, chunk_size):
+    """DataFrames successifs de chunk_size lignes de la première feuille (openpyxl en lecture seule)"""
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(value) if value is not None else f"Unnamed: {i}" for i, value in enumerate(header)]
+        width = len(columns)
+        
+        chunk, index = [], []
+        for number, values in enumerate(rows, 2):
+            # Lignes vides ignorées, comme pd.read_excel
+            if all(value is None or value == '' for value in values):
+                continue
+            chunk.append(tuple(values[:width]) + (None,) * (width - len(values)))
+            index.append(number - 2)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns, index=index, dtype=object)
+                chunk, index = [], []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, index=index, dtype=object)
+    finally:
+        workbook.close()
+
+def estimate_rows(file_path):
+    """Nombre approximatif (majorant) de lignes de données, pour la progression"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        with open(file_path, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    if extension == '.xlsx':
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            return max((workbook.worksheets[0].max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    return 0
+
+def missing_columns(row):
+    """Colonnes obligatoires vides ou invalides d'une ligne rejetée par prepare_rows"""
+    return [column for field, column in REQUIRED_COLUMNS if pd.isna(getattr(row, field))]
 
 class ExcelImporter:
-    """Classe pour gérer l'importation de produits depuis Excel"""
+    """
+    Classe pour gérer l'importation de produits depuis Excel
+    
+    Les références, slugs et noms de catégories / sous-catégories / marques / types /
+    collections existants sont chargés une fois en mémoire; les produits et leurs
+    caractéristiques sont insérés par lots (bulk_create) dans une seule transaction.
+    Le fichier (.xlsx, .csv) est lu en flux par lots de chunk_size lignes.
+    
+    En mode aperçu (dry_run), les créations restent en mémoire (ids négatifs): preview()
+    exécute les mêmes contrôles sans rien écrire en base.
+    
+    En mode mise à jour (upsert), les lignes dont la référence existe mettent à jour prix,
+    stock, statut et indicateurs du produit: seuls les champs modifiés sont écrits
+    (bulk_update par lots), les autres lignes créent des produits comme d'habitude.
+    """
     
-    def __init__(self):
+    def __init__(self, batch_size=500, progress=None, dry_run=False, upsert=False, chunk_size=READ_CHUNK_SIZE):
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        # progress(lignes traitées, total, créés, mis à jour, ignorés): suivi d'un import en arrière-plan
+        self.progress = progress
+        self.dry_run = dry_run
+        self.upsert = upsert
+        self.placeholder_id = 0
         self.created_products = 0
         self.updated_products = 0
+        self.unchanged_products = 0
         self.skipped_products = 0
         self.errors = []
+        self.created_categories = []
+        self.created_subcategories = []
         self.created_brands = []
         self.created_types = []
         self.created_collections = []
     
+    def load_existing(self):
+        """Charge en mémoire les données existantes utilisées pour les contrôles"""
+        # Clés insensibles à la casse et aux accents, comme name__iexact sous MySQL
+        self.categories = {}
+        for category in Category.objects.all():
+            self.categories.setdefault(fold(category.name), category)
+        
+        self.subcategories = {}
+        for subcategory in SubCategory.objects.all():
+            self.subcategories.setdefault((subcategory.category_id, fold(subcategory.name)), subcategory)
+        
+        self.brands = {}
+        for brand in Brand.objects.all():
+            self.brands.setdefault(fold(brand.name), brand)
+        
+        self.types = {}
+        for type_obj in Type.objects.all():
+            self.types.setdefault((fold(type_obj.name), type_obj.subcategory_id, type_obj.brand_id), type_obj)
+        
+        self.collections = {}
+        for collection in Collection.objects.all():
+            self.collections.setdefault(fold(collection.name), collection)
+        
+        # Mode mise à jour: valeurs actuelles des champs comparés, en une seule requête (clés: reference_key)
+        self.existing = {}
+        self.updated_references = set()
+        if self.upsert:
+            for values in Product.objects.values('id', 'reference', *UPSERT_FIELDS).iterator(chunk_size=2000):
+                self.existing[reference_key(values.pop('reference'))] = values
+            self.references = set(self.existing)
+        else:
+            self.references = {reference_key(reference) for reference in Product.objects.values_list('reference', flat=True)}
+        self.product_slugs = set(Product.objects.values_list('slug', flat=True))
+        self.subcategory_slugs = set(SubCategory.objects.values_list('slug', flat=True))
+        self.type_slugs = set(Type.objects.values_list('slug', flat=True))
+    
+    def unique_slug(self, slug, existing):
+        """Ajoute -1, -2... jusqu'à obtenir un slug absent de existing, puis le réserve"""
+        original_slug = slug
+        counter = 1
+        while slug in existing:
+            slug = f"{original_slug}-{counter}"
+            counter += 1
+        existing.add(slug)
+        return slug
+    
+    def create_object(self, model, **fields):
+        """Crée l'objet (point de sauvegarde), ou en mode aperçu un objet non enregistré"""
+        if self.dry_run:
+            self.placeholder_id -= 1
+            return model(id=self.placeholder_id, **fields)
+        with transaction.atomic():
+            return model.objects.create(**fields)
+    
     def get_or_create_category(self, name):
         """Récupère ou crée une catégorie"""
         if not name:
             return None
         
-        name = clean_data(name)
-        if not name:
-            return None
-        
-        # Chercher la catégorie (insensible à la casse)
-        category = Category.objects.filter(name__iexact=name).first()
+        category = self.categories.get(fold(name))
         
         # Si elle n'existe pas, la créer
         if not category:
-            category = Category.objects.create(
+            category = self.create_object(
+                Category,
                 name=name,
                 slug=slugify(name),
                 is_active=True
             )
-            print(f"[OK] Categorie '{name}' creee automatiquement")
+            self.categories[fold(name)] = category
+            self.created_categories.append(name)
         
         return category
     
@@ -166,91 +429,62 @@ class ExcelImporter:
         if not name or not category:
             return None
         
-        name = clean_data(name)
-        if not name:
-            return None
-        
         normalized_name = normalize_subcategory_name(name)
-        
-        # Chercher la sous-catégorie (insensible à la casse)
-        subcategory = SubCategory.objects.filter(
-            name__iexact=normalized_name,
-            category=category
-        ).first()
+        key = (category.id, fold(normalized_name))
+        subcategory = self.subcategories.get(key)
         
         # Si elle n'existe pas, la créer
         if not subcategory:
-            # Créer un slug unique
-            slug = slugify(normalized_name)
-            counter = 1
-            original_slug = slug
-            
-            while SubCategory.objects.filter(slug=slug).exists():
-                slug = f"{original_slug}-{counter}"
-                counter += 1
-            
-            subcategory = SubCategory.objects.create(
+            subcategory = self.create_object(
+                SubCategory,
                 name=normalized_name,
                 category=category,
-                slug=slug,
+                slug=self.unique_slug(slugify(normalized_name), self.subcategory_slugs),
                 is_active=True
             )
-            print(f"[OK] Sous-categorie '{normalized_name}' creee automatiquement dans {category.name}")
+            self.subcategories[key] = subcategory
+            self.created_subcategories.append(f"{normalized_name} ({category.name})")
         
         return subcategory
     
     def get_or_create_brand(self, name):
         """Récupère ou crée une marque"""
-        if not name:
-            return None
-        
-        name = clean_data(name)
         if not name or ',' in name:
             return None
         
-        brand = Brand.objects.filter(name__iexact=name).first()
+        brand = self.brands.get(fold(name))
         
         if not brand:
-            brand = Brand.objects.create(
+            brand = self.create_object(
+                Brand,
                 name=name,
                 slug=slugify(name),
                 is_active=True
             )
+            self.brands[fold(name)] = brand
             self.created_brands.append(name)
         
         return brand
     
     def get_or_create_type(self, name, subcategory, brand):
         """Récupère ou crée un type"""
-        if not name or not subcategory:
+        if not name or not subcategory or ',' in name:
             return None
         
-        name = clean_data(name)
-        if not name or ',' in name:
-            return None
-        
-        type_obj = Type.objects.filter(
-            name__iexact=name,
-            subcategory=subcategory,
-            brand=brand
-        ).first()
+        key = (fold(name), subcategory.id, brand.id if brand else None)
+        type_obj = self.types.get(key)
         
         if not type_obj:
-            slug = slugify(f"{brand.name if brand else ''}-{name}")
-            counter = 1
-            original_slug = slug
-            
-            while Type.objects.filter(slug=slug).exists():
-                slug = f"{original_slug}-{counter}"
-                counter += 1
-            
-            type_obj = Type.objects.create(
+            slug = self.unique_slug(slugify(f"{brand.name if brand else ''}-{name}"), self.type_slugs)
+            type_obj = self.create_object(
+                Type,
                 name=name,
                 subcategory=subcategory,
                 brand=brand,
                 slug=slug,
                 is_active=True
             )
+            self.types[key] = type_obj
             self.created_types.append(f"{name} ({brand.name if brand else 'Sans marque'})")
         
         return type_obj
@@ -260,188 +494,378 @@ class ExcelImporter:
         if not name:
             return None
         
-        name = clean_data(name)
-        if not name:
-            return None
-        
-        collection = Collection.objects.filter(name__iexact=name).first()
+        collection = self.collections.get(fold(name))
         
         if not collection:
-            collection = Collection.objects.create(
+            collection = self.create_object(
+                Collection,
                 name=name,
                 slug=slugify(name),
                 is_active=True
             )
+            self.collections[fold(name)] = collection
             self.created_collections.append(name)
         
         return collection
     
+    def check_lengths(self, product):
+        """Erreur équivalente à celle de MySQL (mode strict) pour un texte trop long"""
+        for field in ('reference', 'name', 'slug', 'brand_text', 'warranty', 'meta_title'):
+            max_length = Product._meta.get_field(field).max_length
+            if len(getattr(product, field)) > max_length:
+                raise ValueError(f"Data too long for column '{field}' (max {max_length})")
+    
+    def check_numbers(self, values):
+        """Erreur équivalente à celle de MySQL (mode strict) pour un nombre hors limites du champ"""
+        for field, value in values.items():
+            if value is None:
+                continue
+            model_field = Product._meta.get_field(field)
+            if isinstance(model_field, models.DecimalField):
+                # max_digits=10, decimal_places=2 -> 99999999.99 au plus, après arrondi au centime
+                step = Decimal(10) ** -model_field.decimal_places
+                high = Decimal(10) ** (model_field.max_digits - model_field.decimal_places) - step
+                if not abs(Decimal(str(float(value)))) < high + step / 2:
+                    raise ValueError(f"Out of range value for column '{field}' (max {high})")
+            elif isinstance(model_field, models.IntegerField):
+                # Bornes de la base (aucune sous SQLite)
+                low, high = connection.ops.integer_field_range(model_field.get_internal_type())
+                if (low is not None and value < low) or (high is not None and value > high):
+                    raise ValueError(f"Out of range value for column '{field}' ({low} à {high})")
+    
+    def build_product(self, row):
+        """Construit le produit (non enregistré) d'une ligne, ou None si elle est ignorée"""
+        # Vérifier si le produit existe déjà (en base ou plus haut dans le fichier)
+        if reference_key(row.reference) in self.references:
+            return None
+        
+        # Récupérer les relations
+        category = self.get_or_create_category(row.category)
+        if not category:
+            return None
+        
+        subcategory = self.get_or_create_subcategory(row.subcategory, category)
+        if not subcategory:
+            return None
+        
+        brand = self.get_or_create_brand(row.brand) if row.brand else None
+        type_obj = self.get_or_create_type(row.type, subcategory, brand) if row.type else None
+        collection = self.get_or_create_collection(row.collection) if row.collection else None
+        
+        product = Product(
+            reference=row.reference,
+            name=row.name,
+            slug=slugify(f"{row.reference}-{row.name}"),
+            category=category,
+            subcategory=subcategory,
+            type=type_obj,
+            collection=collection,
+            brand_text=row.brand or '',
+            brand=brand,
+            price=float(row.price),
+            discount_price=optional_number(row.discount_price),
+            quantity=int(row.quantity),
+            status=row.status,
+            description=row.description or '',
+            caracteristiques=row.caracteristiques or '',
+            warranty=row.warranty or '',
+            weight=optional_number(row.weight),
+            meta_title=row.meta_title or '',
+            meta_description=row.meta_description or '',
+            is_bestseller=bool(row.is_bestseller),
+            is_featured=bool(row.is_featured),
+            is_new=bool(row.is_new),
+            show_in_ad_slider=False,
+            views_count=0,
+        )
+        self.check_lengths(product)
+        self.check_numbers({field: getattr(product, field) for field in ('price', 'discount_price', 'quantity', 'weight')})
+        product.slug = self.unique_slug(product.slug, self.product_slugs)
+        self.references.add(reference_key(product.reference))
+        return product
+    
+    def sheet_values(self, row):
+        """Valeurs de la ligne pour les champs mis à jour (cellules vides et colonnes absentes exclues)"""
+        values = {}
+        if not pd.isna(row.price):
+            values['price'] = to_decimal(row.price)
+        if not pd.isna(row.quantity):
+            values['quantity'] = int(row.quantity)
+        if row.has_status:
+            values['status'] = row.status
+        if 'discount_price' in self.update_fields:
+            discount_price = optional_number(row.discount_price)
+            values['discount_price'] = to_decimal(discount_price) if discount_price is not None else None
+        for field in ('is_bestseller', 'is_featured', 'is_new'):
+            if field in self.update_fields:
+                values[field] = bool(getattr(row, field))
+        return values
+    
+    def build_update(self, row):
+        """
+        Produit existant (non enregistré) portant les seuls champs modifiés
+        Retourne (produit, {champ: (ancienne valeur, nouvelle valeur)}), produit None si rien ne change
+        """
+        key = reference_key(row.reference)
+        current = self.existing[key]
+        values = self.sheet_values(row)
+        self.check_numbers(values)
+        changes = {
+            field: (current[field], value)
+            for field, value in values.items()
+            if current[field] != value
+        }
+        self.updated_references.add(key)
+        if not changes:
+            return None, changes
+        product = Product(id=current['id'], **{field: value for field, (_, value) in changes.items()})
+        return product, changes
+    
+    def iter_rows(self, chunks):
+        """
+        Une passe sur les lignes, sans requête par ligne (hors créations de taxonomie)
+        Génère (ligne, action, produit, détail), action parmi create, update, unchanged,
+        duplicate, invalid et error; détail: modifications, colonnes manquantes ou erreur.
+        """
+        for data, valid in chunks:
+            yield from self.iter_chunk(data, valid)
+    
+    def iter_chunk(self, data, valid):
+        for row in data.itertuples():
+            try:
+                key = reference_key(row.reference)
+                if self.upsert and key in self.existing:
+                    if key in self.updated_references:
+                        result = ('duplicate', None, None)
+                    else:
+                        product, changes = self.build_update(row)
+                        result = ('update', product, changes) if product else ('unchanged', None, None)
+                elif not valid[row.Index]:
+                    result = ('invalid', None, missing_columns(row))
+                else:
+                    product = self.build_product(row)
+                    result = ('create', product, None) if product else ('duplicate', None, None)
+            except Exception as e:
+                result = ('error', None, str(e))
+            yield (row,) + result
+    
+    def report_progress(self, processed, total):
+        if self.progress:
+            self.progress(processed, total, self.created_products, self.updated_products, self.skipped_products)
+    
+    def write_batch(self, products):
+        """Insère un lot de produits et leurs caractéristiques, retourne les ids créés"""
+        Product.objects.bulk_create(products)
+        
+        # bulk_create ne renvoie pas les ids sous MySQL: les relire par référence
+        ids = dict(Product.objects.filter(
+            reference__in=[product.reference for product in products]
+        ).values_list('reference', 'id'))
+        
+        specifications = []
+        for product in products:
+            for order, (key, value) in enumerate(parse_characteristics(product.caracteristiques), 1):
+                specifications.append(ProductSpecification(
+                    product_id=ids[product.reference],
+                    key=key[:200],
+                    value=value[:500],
+                    order=order
+                ))
+        ProductSpecification.objects.bulk_create(specifications, batch_size=self.batch_size)
+        return list(ids.values())
+    
+    def write_updates(self, updates):
+        """Enregistre les produits modifiés: un bulk_update par combinaison de champs modifiés"""
+        # bulk_update n'applique pas auto_now: updated_at est renseigné explicitement
+        now = timezone.now()
+        groups = {}
+        for product, changes in updates:
+            product.updated_at = now
+            groups.setdefault(tuple(sorted(changes)), []).append(product)
+        for fields, products in groups.items():
+            Product.objects.bulk_update(products, list(fields) + ['updated_at'], batch_size=self.batch_size)
+    
+    def stream_file(self, file_path):
+        """DataFrames successifs du fichier (.xls, sans lecteur en flux, est lu en une fois)"""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == '.csv':
+            return read_csv_chunks(file_path, self.chunk_size)
+        if extension == '.xls':
+            return iter([pd.read_excel(file_path)])
+        return read_xlsx_chunks(file_path, self.chunk_size)
+    
+    def prepare_chunk(self, df):
+        """Prépare un lot de lignes (voir prepare_rows)"""
+        self.update_fields = {field for field, column in UPSERT_COLUMNS.items() if column in df.columns}
+        data, valid = prepare_rows(df)
+        data['quantity'] = np.trunc(data['quantity'])
+        return data, valid
+    
+    def read_rows(self, file_path):
+        """
+        Lots (data, valid) préparés du fichier
+        Le premier lot est lu immédiatement: un fichier illisible lève l'erreur ici.
+        """
+        chunks = (self.prepare_chunk(df) for df in self.stream_file(file_path))
+        first = next(chunks, None)
+        if first is None:
+            return iter([])
+        return itertools.chain([first], chunks)
+    
+    def new_relations(self, product):
+        """Relations du produit qui seraient créées par l'import (mode aperçu)"""
+        relations = [
+            ('Catégorie', product.category), ('Sous-catégorie', product.subcategory),
+            ('Marque', product.brand), ('Type', product.type), ('Collection', product.collection),
+        ]
+        return [f"{label}: {obj.name}" for label, obj in relations if obj is not None and obj.pk < 0]
+    
+    def preview(self, file_path, write_rows=None):
+        """
+        Simule l'import sans écriture: une passe sur le fichier, taxonomie et références en mémoire
+        Le détail ligne par ligne (action: create, update, unchanged, duplicate, invalid, error) est
+        passé par lots de batch_size lignes à write_rows; sans write_rows, il est renvoyé dans 'rows'.
+        """
+        self.dry_run = True
+        try:
+            total = estimate_rows(file_path)
+            chunks = self.read_rows(file_path)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Erreur de lecture du fichier: {str(e)}"
+            }
+        
+        self.load_existing()
+        all_rows, rows, processed = [], [], 0
+        collect = write_rows is None
+        if collect:
+            write_rows = all_rows.extend
+        counts = {'create': 0, 'update': 0, 'unchanged': 0, 'duplicate': 0, 'invalid': 0, 'error': 0}
+        self.report_progress(processed, total)
+        for row, action, product, detail in self.iter_rows(chunks):
+            if action == 'create':
+                message = ", ".join(self.new_relations(product))
+            elif action == 'update':
+                message = ", ".join(
+                    f"{Product._meta.get_field(field).verbose_name}: {old} → {new}"
+                    for field, (old, new) in detail.items()
+                )
+            elif action == 'duplicate':
+                message = "Référence déjà existante" if not self.upsert else "Référence en double dans le fichier"
+            elif action == 'invalid':
+                message = "Champs manquants ou invalides: " + ", ".join(detail)
+            else:
+                message = detail or ''
+            counts[action] += 1
+            processed += 1
+            rows.append({
+                'line': row.Index + 2,
+                'action': action,
+                'reference': row.reference or '',
+                'name': row.name or '',
+                'price': '' if pd.isna(row.price) else f"{float(row.price):.15g}",
+                'quantity': '' if pd.isna(row.quantity) else f"{float(row.quantity):.15g}",
+                'message': message,
+            })
+            if len(rows) >= self.batch_size:
+                write_rows(rows)
+                rows = []
+                self.report_progress(processed, max(total, processed))
+        if rows:
+            write_rows(rows)
+        self.report_progress(processed, processed)
+        
+        report = {
+            'success': True,
+            'upsert': self.upsert,
+            'total': processed,
+            'counts': counts,
+            'created_categories': self.created_categories,
+            'created_subcategories': self.created_subcategories,
+            'created_brands': self.created_brands,
+            'created_types': self.created_types,
+            'created_collections': self.created_collections
+        }
+        if collect:
+            report['rows'] = all_rows
+        return report
+    
     def import_from_excel(self, file_path):
-        """Importe tous les produits depuis un fichier Excel"""
+        """Importe tous les produits depuis un fichier Excel (ou CSV)"""
         
         try:
-            df = pd.read_excel(file_path)
+            total = estimate_rows(file_path)
+            chunks = self.read_rows(file_path)
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Erreur de lecture du fichier: {str(e)}"
             }
         
-        for index, row in df.iterrows():
-            try:
-                # Vérifier les champs obligatoires
-                reference = clean_data(row.get('Référence *'))
-                name = clean_data(row.get('Nom du produit *'))
-                cat_name = clean_data(row.get('Catégorie *'))
-                subcat_name = clean_data(row.get('Sous-catégorie *'))
-                price = row.get('Prix (DH) *')
-                quantity = row.get('Quantité *')
-                description = clean_data(row.get('Description *'))
-                
-                # Vérifier données obligatoires
-                if not reference or not name or not cat_name or not subcat_name:
-                    self.skipped_products += 1
-                    continue
-                
-                # Vérifier prix et quantité
-                if pd.isna(price) or str(price).strip() in ['-', '', 'nan']:
-                    self.skipped_products += 1
-                    continue
-                
-                if pd.isna(quantity) or str(quantity).strip() in ['-', '', 'nan']:
-                    self.skipped_products += 1
-                    continue
-                
-                try:
-                    price = float(price)
-                    quantity = int(float(quantity))
-                except (ValueError, TypeError):
-                    self.skipped_products += 1
-                    continue
-                
-                # Vérifier si le produit existe déjà
-                existing_product = Product.objects.filter(reference=reference).first()
-                if existing_product:
-                    self.skipped_products += 1
-                    continue
-                
-                # Récupérer les relations
-                category = self.get_or_create_category(cat_name)
-                if not category:
-                    self.skipped_products += 1
-                    continue
-                
-                subcategory = self.get_or_create_subcategory(subcat_name, category)
-                if not subcategory:
-                    self.skipped_products += 1
-                    continue
-                
-                brand_name = clean_data(row.get('Marque'))
-                brand = self.get_or_create_brand(brand_name) if brand_name else None
-                
-                type_name = clean_data(row.get('Type'))
-                type_obj = self.get_or_create_type(type_name, subcategory, brand) if type_name else None
-                
-                collection_name = clean_data(row.get('Collection'))
-                collection = self.get_or_create_collection(collection_name) if collection_name else None
-                
-                # Créer le slug unique
-                slug = slugify(f"{reference}-{name}")
-                counter = 1
-                original_slug = slug
-                
-                while Product.objects.filter(slug=slug).exists():
-                    slug = f"{original_slug}-{counter}"
-                    counter += 1
-                
-                # Préparer les données
-                discount_price = row.get('Prix Promo (DH)')
-                if not pd.isna(discount_price) and discount_price:
-                    try:
-                        discount_price = float(discount_price)
-                    except:
-                        discount_price = None
-                else:
-                    discount_price = None
-                
-                caracteristiques = clean_data(row.get('Caractéristiques'))
-                warranty = clean_data(row.get('Garantie'))
-                
-                weight = row.get('Poids (kg)')
-                if not pd.isna(weight) and weight:
-                    try:
-                        weight = float(weight)
-                    except:
-                        weight = None
-                else:
-                    weight = None
-                
-                meta_title = clean_data(row.get('Meta Titre SEO'))
-                meta_description = clean_data(row.get('Meta Description SEO'))
-                
-                is_bestseller = parse_boolean(row.get('Best Seller'))
-                is_featured = parse_boolean(row.get('En vedette'))
-                is_new = parse_boolean(row.get('Nouveau'))
-                status = parse_status(row.get('Statut'))
+        processed = 0
+        self.report_progress(processed, total)
+        
+        created_ids = []
+        try:
+            with transaction.atomic():
+                self.load_existing()
                 
-                # Créer le produit avec SQL brut pour éviter les conflits
-                with transaction.atomic():
-                    cursor = connection.cursor()
-                    
-                    sql = """
-                        INSERT INTO shop_product (
-                            reference, name, slug, category_id, subcategory_id, type_id, collection_id,
-                            brand_text, brand_id, price, discount_price, quantity, status,
-                            description, caracteristiques, warranty, weight, meta_title, meta_description,
-                            is_bestseller, is_featured, is_new, show_in_ad_slider, views_count,
-                            created_at, updated_at
-                        ) VALUES (
-                            %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s,
-                            NOW(), NOW()
-                        )
-                    """
+                batch, updates = [], []
+                for row, action, product, detail in self.iter_rows(chunks):
+                    processed += 1
+                    if action == 'create':
+                        batch.append(product)
+                    elif action == 'update':
+                        updates.append((product, detail))
+                    elif action == 'unchanged':
+                        self.unchanged_products += 1
+                    else:
+                        # Lignes incomplètes, doublons et erreurs
+                        self.skipped_products += 1
+                        if action == 'error':
+                            self.errors.append(f"Ligne {row.Index + 2}: {detail}")
                     
-                    cursor.execute(sql, [
-                        reference, name, slug, category.id, subcategory.id,
-                        type_obj.id if type_obj else None, collection.id if collection else None,
-                        brand_name or '', brand.id if brand else None,
-                        price, discount_price, quantity, status,
-                        description or '', caracteristiques or '', warranty or '',
-                        weight, meta_title or '', meta_description or '',
-                        is_bestseller, is_featured, is_new,
-                        False, 0
-                    ])
-                    
-                    product_id = cursor.lastrowid
-                    product = Product.objects.get(id=product_id)
-                    
-                    # Ajouter les caractéristiques détaillées
-                    if caracteristiques:
-                        characteristics = parse_characteristics(caracteristiques)
-                        
-                        for order, (key, value) in enumerate(characteristics, 1):
-                            ProductSpecification.objects.create(
-                                product=product,
-                                key=key,
-                                value=value,
-                                order=order
-                            )
-                    
-                    self.created_products += 1
-            
-            except Exception as e:
-                error_msg = f"Ligne {index + 2}: {str(e)}"
-                self.errors.append(error_msg)
-                self.skipped_products += 1
+                    if len(batch) >= self.batch_size:
+                        created_ids.extend(self.write_batch(batch))
+                        self.created_products = len(created_ids)
+                        batch = []
+                    if len(updates) >= self.batch_size:
+                        self.write_updates(updates)
+                        self.updated_products += len(updates)
+                        updates = []
+                    if processed % self.batch_size == 0:
+                        self.report_progress(processed, max(total, processed))
+                
+                if batch:
+                    created_ids.extend(self.write_batch(batch))
+                if updates:
+                    self.write_updates(updates)
+                    self.updated_products += len(updates)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Erreur d'enregistrement: {str(e)}"
+            }
+        
+        self.created_products = len(created_ids)
+        self.report_progress(processed, processed)
+        
+        # bulk_create ne déclenche pas les signaux post_save
+        index_products(created_ids)
+        index_product_attributes(created_ids)
+        bump_catalog_version()
         
         return {
             'success': True,
+            'upsert': self.upsert,
             'created': self.created_products,
+            'updated': self.updated_products,
+            'unchanged': self.unchanged_products,
             'skipped': self.skipped_products,
             'errors': self.errors,
+            'created_categories': self.created_categories,
+            'created_subcategories': self.created_subcategories,
             'created_brands': self.created_brands,
             'created_types': self.created_types,
             'created_collections': self.created_collections
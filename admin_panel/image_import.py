@@ -0,0 +1,272 @@
+"""
+Module pour l'importation des images de produits depuis un dossier via l'interface admin
+
+Structure attendue: Dossier principal / Nom du produit / Référence / Image|Menu / fichier.
+Les produits sont retrouvés en mémoire (index des références et des noms chargé en une
+requête); les fichiers sont lus, hachés (SHA-256), vérifiés et écrits par un pool de
+threads. Le nom du fichier stocké est dérivé de son contenu: une même image importée pour
+plusieurs produits n'est écrite qu'une fois, et une image déjà présente sur un produit est
+ignorée. Les ProductImage sont insérées avec bulk_create, puis leurs tailles WebP sont
+générées par un pool de process (voir shop.images).
+"""
+import hashlib
+import io
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image
+
+from shop.catalog_cache import bump_catalog_version
+from shop.images import refresh_variants
+from shop.models import Product, ProductImage
+from shop.search import fold
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
+
+GALLERY_DIR = 'products/gallery/'
+
+# Dossiers des images principales / supplémentaires
+MAIN_FOLDER = 'image'
+GALLERY_FOLDER = 'menu'
+
+REFERENCE_PATTERNS = [
+    r'\b([A-Z0-9]+-[A-Z0-9-]+)\b',
+    r'\b(RTX\s*\d{4}\s*[A-Z]*|GTX\s*\d{4}\s*[A-Z]*)\b',
+    r'\b(RX\s*\d{4}\s*[A-Z]*)\b',
+    r'\b([iI][3579]-\d{4,5}[A-Z]{0,2})\b',
+    r'\b(Ryzen\s*[3579]\s*\d{4}[A-Z]{0,2})\b',
+    r'\b([A-Z]\d{3,4}[A-Z]*-[A-Z0-9]+)\b',
+    r'\b([A-Z]{2,}\d{3,})\b',
+]
+
+
+def extract_reference_from_name(name):
+    """Référence produit contenue dans un nom de dossier, ou None"""
+    for pattern in REFERENCE_PATTERNS:
+        match = re.search(pattern, name, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def is_valid_filename(name):
+    """Nom de fichier ASCII sans caractère interdit"""
+    try:
+        name.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    invalid_chars = set('<>:"/\\|?*')
+    return not any(c in invalid_chars for c in name)
+
+
+def split_path(relative_path):
+    """'Dossier/Produit/REF/Image/photo.webp' -> (['Produit', 'REF', 'Image'], 'photo.webp')"""
+    parts = [part for part in re.split(r'[\\/]', relative_path) if part]
+    if not parts:
+        return [], ''
+    # Le premier dossier est celui sélectionné dans le navigateur (dossier principal)
+    return parts[1:-1], parts[-1]
+
+
+class ImageImporter:
+    """
+    Classe pour gérer l'importation des images de produits
+
+    import_files(entries): entries = [(chemin relatif dans le dossier uploadé, fichier sur le
+    serveur ou None si non conservé)].
+    """
+
+    def __init__(self, max_workers=None, progress=None):
+        self.max_workers = max_workers or settings.IMAGE_IMPORT_WORKERS
+        # progress(fichiers traités, total, importés, mis à jour, ignorés)
+        self.progress = progress
+        self.imported = 0
+        self.duplicates = 0
+        self.not_found = 0
+        self.errors = 0
+        self.ignored = 0
+        self.logs = []
+        self.error_logs = []
+        self.not_found_products = set()
+
+    def load_products(self):
+        """Index en mémoire: référence -> produit, et noms normalisés dans l'ordre par défaut"""
+        self.by_reference = {}
+        self.names = []
+        for pk, reference, name in Product.objects.values_list('pk', 'reference', 'name'):
+            self.by_reference.setdefault(reference.upper().strip(), (pk, reference))
+            self.names.append((fold(name), pk, reference))
+        self.folder_matches = {}
+
+    def match_name(self, folder):
+        """Premier produit dont le nom contient le nom du dossier (comme name__icontains)"""
+        if folder not in self.folder_matches:
+            key = fold(folder)
+            self.folder_matches[folder] = next(
+                ((pk, reference) for name, pk, reference in self.names if key and key in name), None
+            )
+        return self.folder_matches[folder]
+
+    def resolve_product(self, folders):
+        """Produit d'un fichier: référence exacte d'un dossier, référence extraite, puis nom"""
+        folders = [folder for folder in folders if folder.lower() not in (MAIN_FOLDER, GALLERY_FOLDER)]
+        for folder in reversed(folders):
+            product = self.by_reference.get(folder.upper().strip())
+            if product:
+                return product
+        for folder in reversed(folders):
+            reference = extract_reference_from_name(folder)
+            if reference and reference.upper().strip() in self.by_reference:
+                return self.by_reference[reference.upper().strip()]
+        for folder in folders:
+            product = self.match_name(folder)
+            if product:
+                return product
+        return None
+
+    def process_file(self, source_path, extension):
+        """
+        Exécuté dans le pool: lit, hache et vérifie le fichier puis l'écrit sous son nom de
+        contenu s'il n'existe pas encore. Retourne (chemin stocké, erreur).
+        """
+        try:
+            with open(source_path, 'rb') as f:
+                content = f.read()
+            with Image.open(io.BytesIO(content)) as img:
+                img.verify()
+        except Exception as e:
+            return None, str(e)
+
+        digest = hashlib.sha256(content).hexdigest()
+        extension = '.jpg' if extension == '.jpeg' else extension
+        relative_path = f"{GALLERY_DIR}{digest[:32]}{extension}"
+        destination = os.path.join(settings.MEDIA_ROOT, relative_path)
+        if not os.path.exists(destination):
+            # Écriture atomique: deux threads peuvent écrire le même contenu en parallèle
+            temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(content)
+            os.replace(temporary, destination)
+        return relative_path, None
+
+    def report_progress(self, processed, total):
+        if self.progress:
+            skipped = self.duplicates + self.not_found + self.errors + self.ignored
+            self.progress(processed, total, self.imported, 0, skipped)
+
+    def log_error(self, message):
+        self.logs.append(message)
+        self.error_logs.append(message)
+        self.errors += 1
+
+    def import_files(self, entries):
+        """Importe les images listées dans entries"""
+        self.load_products()
+        total = len(entries)
+
+        # 1. Produit de chaque fichier (en mémoire, sans requête)
+        tasks = []
+        for relative_path, source_path in entries:
+            folders, filename = split_path(relative_path)
+            extension = os.path.splitext(filename)[1].lower()
+            if extension not in IMAGE_EXTENSIONS or not source_path:
+                self.logs.append(f"[IGNORÉ] Fichier non image: {relative_path}")
+                self.ignored += 1
+                continue
+            if not is_valid_filename(filename):
+                self.log_error(f"[ERREUR] Nom de fichier non valide (emoji ou caractère spécial interdit): {filename}")
+                continue
+            product = self.resolve_product(folders)
+            if not product:
+                self.logs.append(f"[ATTENTION] Produit non trouvé pour: {relative_path}")
+                self.not_found += 1
+                self.not_found_products.add(folders[0] if folders else relative_path)
+                continue
+            is_main = bool(folders) and folders[-1].lower() == MAIN_FOLDER
+            tasks.append((relative_path, source_path, extension, product, is_main))
+
+        processed = total - len(tasks)
+        self.report_progress(processed, total)
+
+        # 2. Lecture, hachage, vérification et écriture en parallèle
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, GALLERY_DIR), exist_ok=True)
+        # Ordre alphabétique: la première image du dossier Image devient l'image principale
+        tasks.sort(key=lambda task: task[0])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda task: self.process_file(task[1], task[2]), tasks)
+            processed_tasks = []
+            for task, (stored_path, error) in zip(tasks, results):
+                processed += 1
+                if error:
+                    self.log_error(f"[ERREUR] Erreur lors de l'import de {task[0]}: {error}")
+                else:
+                    processed_tasks.append(task + (stored_path,))
+                if processed % 100 == 0:
+                    self.report_progress(processed, total)
+
+        # 3. Images existantes des produits concernés (une requête)
+        product_ids = {task[3][0] for task in processed_tasks}
+        existing = set()
+        next_order = {}
+        for product_id, image, order in ProductImage.objects.filter(product_id__in=product_ids).values_list(
+            'product_id', 'image', 'order'
+        ):
+            existing.add((product_id, image))
+            next_order[product_id] = max(next_order.get(product_id, 0), order + 1)
+
+        images, new_main = [], set()
+        for relative_path, _, _, (product_id, reference), is_main, stored_path in processed_tasks:
+            if (product_id, stored_path) in existing:
+                self.logs.append(f"[IGNORÉ] Image déjà existante: {relative_path} ({reference})")
+                self.duplicates += 1
+                continue
+            if is_main and product_id in new_main:
+                self.logs.append(f"[IGNORÉ] Image principale déjà fournie: {relative_path} ({reference})")
+                self.duplicates += 1
+                continue
+            existing.add((product_id, stored_path))
+
+            if is_main:
+                new_main.add(product_id)
+                order = 0
+            else:
+                order = next_order.get(product_id, 1)
+                next_order[product_id] = order + 1
+            images.append(ProductImage(product_id=product_id, image=stored_path, is_main=is_main, order=order))
+            self.logs.append(f"[OK] Image {'principale' if is_main else 'ajoutée'}: {relative_path} pour {reference}")
+
+        # 4. Enregistrement groupé
+        with transaction.atomic():
+            if new_main:
+                ProductImage.objects.filter(product_id__in=new_main, is_main=True).delete()
+            ProductImage.objects.bulk_create(images, batch_size=500)
+            # bulk_create ne déclenche pas les signaux: pointeur d'image principale recalculé ici
+            Product.refresh_main_images({image.product_id for image in images})
+        self.imported = len(images)
+        bump_catalog_version()
+
+        # 5. Tailles WebP (bulk_create ne déclenche pas les signaux)
+        stored_paths = {image.image.name for image in images}
+        _, variant_errors = refresh_variants('product_images', ProductImage.objects.filter(image__in=stored_paths))
+        for name, error in variant_errors.items():
+            self.logs.append(f"[ATTENTION] Tailles WebP non générées pour {name}: {error}")
+        self.report_progress(total, total)
+
+        return {
+            'success': True,
+            'total': total,
+            'created': self.imported,
+            'updated': 0,
+            'unchanged': 0,
+            'skipped': self.duplicates + self.not_found + self.errors + self.ignored,
+            'duplicates': self.duplicates,
+            'not_found': self.not_found,
+            'error_count': self.errors,
+            'errors': self.error_logs,
+            'not_found_products': sorted(self.not_found_products),
+            'logs': self.logs,
+        }
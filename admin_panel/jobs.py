@@ -0,0 +1,335 @@
+"""
+File d'attente des imports Excel et des imports d'images (base de données, sans broker externe)
+
+La vue d'import enregistre le fichier et crée un job d'analyse; le worker
+"python manage.py run_import_jobs" prend les jobs un par un hors requête HTTP et calcule
+d'abord l'aperçu (ExcelImporter en mode dry_run, sans écriture, diff enregistré par lots
+dans ImportPreviewRow et paginé par la page d'import). Une fois l'aperçu confirmé, le job
+repasse en attente et le worker exécute l'import. L'import s'exécutant dans une seule transaction, la progression en cours
+est publiée dans le cache partagé et lue par l'endpoint JSON de la page d'import.
+Les images uploadées sont copiées dans un dossier du job (manifest.json: chemins relatifs)
+puis importées par le même worker (voir admin_panel.image_import).
+"""
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .excel_import import ExcelImporter
+from .image_import import IMAGE_EXTENSIONS, ImageImporter
+from .models import ImportJob, ImportPreviewRow
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = 'import_job:{}:progress'
+
+
+def get_progress_cache():
+    return caches[settings.IMPORT_JOB_CACHE_ALIAS]
+
+
+def enqueue_import(uploaded_file, user=None, status='pending', mode='create'):
+    """Enregistre le fichier uploadé et crée le job d'import"""
+    os.makedirs(settings.IMPORT_JOBS_DIR, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    file_path = os.path.join(settings.IMPORT_JOBS_DIR, f"{uuid.uuid4().hex}{extension}")
+    with open(file_path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    return ImportJob.objects.create(
+        file_path=file_path,
+        file_name=uploaded_file.name[:255],
+        created_by=user if user and user.is_authenticated else None,
+        status=status,
+        mode=mode,
+    )
+
+
+def delete_file(job):
+    if os.path.isdir(job.file_path):
+        shutil.rmtree(job.file_path, ignore_errors=True)
+        return
+    try:
+        os.unlink(job.file_path)
+    except OSError:
+        pass
+
+
+def enqueue_images(uploaded_files, relative_paths, user=None):
+    """
+    Copie les images uploadées dans le dossier du job et crée le job d'import
+    relative_paths: chemins dans le dossier sélectionné (webkitRelativePath), dans l'ordre des fichiers
+    """
+    directory = os.path.join(settings.IMPORT_JOBS_DIR, uuid.uuid4().hex)
+    os.makedirs(directory)
+    entries = []
+    for i, uploaded_file in enumerate(uploaded_files):
+        relative_path = relative_paths[i] if i < len(relative_paths) and relative_paths[i] else uploaded_file.name
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        stored_name = None
+        # Fichiers non image: seulement journalisés par l'import
+        if extension in IMAGE_EXTENSIONS:
+            stored_name = f"{i:05d}{extension}"
+            with open(os.path.join(directory, stored_name), 'wb') as destination:
+                for chunk in uploaded_file.chunks():
+                    destination.write(chunk)
+        entries.append([relative_path, stored_name])
+
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as manifest:
+        json.dump(entries, manifest)
+
+    root = relative_paths[0].replace('\\', '/').split('/')[0] if relative_paths and relative_paths[0] else 'images'
+    return ImportJob.objects.create(
+        kind='images',
+        file_path=directory,
+        file_name=f"{root} ({len(entries)} fichiers)"[:255],
+        total_rows=len(entries),
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def import_images(directory, progress=None):
+    """Import d'un dossier préparé par enqueue_images"""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as manifest:
+        entries = [
+            (relative_path, os.path.join(directory, stored_name) if stored_name else None)
+            for relative_path, stored_name in json.load(manifest)
+        ]
+    return ImageImporter(progress=progress).import_files(entries)
+
+
+def create_preview(uploaded_file, user=None, mode='create'):
+    """Enregistre le fichier et met en file d'attente l'analyse de l'import (aperçu calculé par le worker)"""
+    return enqueue_import(uploaded_file, user, status='analysis', mode=mode)
+
+
+def run_preview(job, progress=None):
+    """Calcule l'aperçu d'un job pris par claim_next_job: résumé dans result, lignes dans ImportPreviewRow"""
+    def write_rows(rows):
+        ImportPreviewRow.objects.bulk_create([ImportPreviewRow(job=job, **row) for row in rows])
+
+    try:
+        importer = ExcelImporter(dry_run=True, upsert=job.mode == 'upsert', progress=progress)
+        report = importer.preview(job.file_path, write_rows)
+    except Exception as e:
+        logger.exception("Échec de l'aperçu de l'import #%s", job.pk)
+        report = {'success': False, 'error': str(e)}
+
+    if report['success']:
+        job.status = 'preview'
+        job.result = report
+        job.total_rows = job.processed_rows = report['total']
+    else:
+        job.status = 'failed'
+        job.error_message = report['error']
+        job.finished_at = timezone.now()
+        ImportPreviewRow.objects.filter(job=job).delete()
+        delete_file(job)
+    job.save()
+    return job
+
+
+def confirm_import(job):
+    """Met en file d'attente un job en aperçu (False s'il a déjà été confirmé ou annulé)"""
+    if not ImportJob.objects.filter(pk=job.pk, status='preview').update(status='pending', result=None):
+        return False
+    ImportPreviewRow.objects.filter(job=job).delete()
+    return True
+
+
+def discard_preview(job):
+    """Annule un aperçu: supprime le fichier et le job"""
+    if ImportJob.objects.filter(pk=job.pk, status='preview').delete()[0]:
+        delete_file(job)
+        return True
+    return False
+
+
+def preview_rows(job, action=None):
+    """Lignes du diff d'un aperçu (queryset à paginer), éventuellement limitées à une action (create, duplicate...)"""
+    rows = job.preview_rows.order_by('line')
+    if action:
+        rows = rows.filter(action=action)
+    return rows
+
+
+def claim_next_job():
+    """
+    Prend le plus ancien job en attente (analyse d'un aperçu ou import confirmé)
+    UPDATE conditionnel: si deux workers visent le même job, un seul le passe en cours.
+    """
+    for job in ImportJob.objects.filter(status__in=['analysis', 'pending']).order_by('created_at', 'id')[:5]:
+        claimed = ImportJob.objects.filter(pk=job.pk, status=job.status).update(
+            status='analyzing' if job.status == 'analysis' else 'running', started_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def fail_stale_jobs():
+    """Marque en échec les jobs restés en cours (worker arrêté pendant l'analyse ou l'import)"""
+    limit = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    stale = ImportJob.objects.filter(status__in=['analyzing', 'running'], started_at__lt=limit).update(
+        status='failed',
+        finished_at=timezone.now(),
+        error_message="Import interrompu (worker arrêté ou délai dépassé)",
+    )
+    # Lignes d'aperçu des analyses interrompues
+    ImportPreviewRow.objects.filter(job__status='failed').delete()
+    return stale
+
+
+def discard_stale_previews():
+    """Supprime les aperçus jamais confirmés (et leurs fichiers)"""
+    limit = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    stale = list(ImportJob.objects.filter(status='preview', created_at__lt=limit))
+    return sum(discard_preview(job) for job in stale)
+
+
+def publish_progress(job_id, processed, total, created, updated, skipped):
+    get_progress_cache().set(PROGRESS_KEY.format(job_id), {
+        'processed_rows': processed,
+        'total_rows': total,
+        'created_count': created,
+        'updated_count': updated,
+        'skipped_count': skipped,
+    }, timeout=settings.IMPORT_JOB_TIMEOUT)
+
+
+def run_job(job):
+    """Exécute l'analyse ou l'import d'un job déjà pris par claim_next_job"""
+    progress = lambda *counters: publish_progress(job.pk, *counters)
+    if job.status == 'analyzing':
+        run_preview(job, progress)
+        get_progress_cache().delete(PROGRESS_KEY.format(job.pk))
+        return job
+
+    try:
+        if job.kind == 'images':
+            result = import_images(job.file_path, progress)
+        else:
+            importer = ExcelImporter(progress=progress, upsert=job.mode == 'upsert')
+            result = importer.import_from_excel(job.file_path)
+    except Exception as e:
+        logger.exception("Échec de l'import #%s", job.pk)
+        result = {'success': False, 'error': str(e)}
+
+    job.finished_at = timezone.now()
+    job.result = result
+    if result['success']:
+        job.status = 'done'
+        job.created_count = result['created']
+        job.updated_count = result['updated']
+        job.unchanged_count = result['unchanged']
+        job.skipped_count = result['skipped']
+        job.errors = result['errors']
+        job.processed_rows = job.total_rows = (
+            result['created'] + result['updated'] + result['unchanged'] + result['skipped']
+        )
+    else:
+        job.status = 'failed'
+        job.error_message = result['error']
+    job.save()
+
+    get_progress_cache().delete(PROGRESS_KEY.format(job.pk))
+    delete_file(job)
+    return job
+
+
+def format_images_result(result):
+    """Messages (succès, avertissement) affichés à la fin d'un import d'images"""
+    success_msg = f"[OK] Importation terminée !\n"
+    success_msg += f"- {result['created']}/{result['total']} images importées\n"
+    success_msg += f"- {result['duplicates']} doublons ignorés\n"
+    success_msg += f"- {result['not_found']} produits non trouvés\n"
+    success_msg += f"- {result['error_count']} erreurs"
+
+    warning_msg = None
+    not_found_products = result['not_found_products']
+    if not_found_products:
+        warning_msg = f"[ATTENTION] Produits non trouvés ({len(not_found_products)}) :\n"
+        warning_msg += "\n".join([f"- {name}" for name in not_found_products[:10]])
+        if len(not_found_products) > 10:
+            warning_msg += f"\n... et {len(not_found_products) - 10} autres"
+    return success_msg, warning_msg
+
+
+def format_import_result(result):
+    """Messages (succès, avertissement) affichés à la fin d'un import"""
+    success_msg = f"[OK] Importation terminee avec succes!\n"
+    success_msg += f"• {result['created']} produits créés\n"
+    if result.get('upsert'):
+        success_msg += f"• {result['updated']} produits mis à jour\n"
+        success_msg += f"• {result['unchanged']} produits inchangés\n"
+    success_msg += f"• {result['skipped']} produits ignorés (doublons ou données manquantes)\n"
+
+    if result.get('created_categories'):
+        success_msg += f"• {len(result['created_categories'])} nouvelles catégories créées: {', '.join(result['created_categories'])}\n"
+
+    if result.get('created_subcategories'):
+        success_msg += f"• {len(result['created_subcategories'])} nouvelles sous-catégories créées: {', '.join(result['created_subcategories'])}\n"
+
+    if result['created_brands']:
+        success_msg += f"• {len(result['created_brands'])} nouvelles marques créées: {', '.join(result['created_brands'][:5])}"
+        if len(result['created_brands']) > 5:
+            success_msg += f" et {len(result['created_brands']) - 5} autres"
+        success_msg += "\n"
+
+    if result['created_types']:
+        success_msg += f"• {len(result['created_types'])} nouveaux types créés: {', '.join(result['created_types'][:5])}"
+        if len(result['created_types']) > 5:
+            success_msg += f" et {len(result['created_types']) - 5} autres"
+        success_msg += "\n"
+
+    if result['created_collections']:
+        success_msg += f"• {len(result['created_collections'])} nouvelles collections créées: {', '.join(result['created_collections'])}\n"
+
+    # Afficher les erreurs s'il y en a
+    error_msg = None
+    if result['errors']:
+        error_msg = "[ATTENTION] Erreurs rencontrees:\n" + "\n".join(result['errors'][:10])
+        if len(result['errors']) > 10:
+            error_msg += f"\n... et {len(result['errors']) - 10} autres erreurs"
+
+    return success_msg, error_msg
+
+
+def get_job_status(job):
+    """État du job pour l'endpoint JSON (progression du cache pendant l'import)"""
+    data = {
+        'id': job.pk,
+        'file_name': job.file_name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'finished': job.is_finished,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'kind': job.kind,
+        'mode': job.mode,
+        'created_count': job.created_count,
+        'updated_count': job.updated_count,
+        'unchanged_count': job.unchanged_count,
+        'skipped_count': job.skipped_count,
+        'error_count': len(job.errors),
+        'message': None,
+        'warning': None,
+        'error': job.error_message or None,
+    }
+    if job.status in ('analyzing', 'running'):
+        data.update(get_progress_cache().get(PROGRESS_KEY.format(job.pk)) or {})
+    elif job.status == 'done' and job.result:
+        format_result = format_images_result if job.kind == 'images' else format_import_result
+        data['message'], data['warning'] = format_result(job.result)
+
+    total = data['total_rows']
+    data['percent'] = 100 if job.status == 'done' else (int(data['processed_rows'] * 100 / total) if total else 0)
+    return data
@@ -0,0 +1,46 @@
+"""
+Statistiques du pool de connexions MySQL (tous les workers, voir config/db_backend/pool.py)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.db_backend.pool import STATS_INTERVAL, get_shared_stats, reset_shared_stats
+
+LABELS = {
+    'opened': "Connexions ouvertes",
+    'reused': "Connexions reprises du pool",
+    'returned': "Connexions rendues au pool",
+    'expired': "Fermées (MAX_AGE atteint)",
+    'failed_checks': "Fermées (ping en échec)",
+    'overflow': "Fermées (pool plein)",
+    'discarded': "Fermées (erreur ou transaction en cours)",
+}
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs du pool de connexions à la base (ouvertures, réutilisations)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Remet les compteurs à zéro")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_shared_stats()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro"))
+
+        pool = settings.DATABASES['default'].get('POOL')
+        if not pool:
+            self.stdout.write(self.style.WARNING("Pool désactivé (DB_POOL=0): une connexion par requête"))
+        else:
+            self.stdout.write(
+                f"Pool: {pool['MAX_SIZE']} connexions inactives max par worker, durée de vie {pool['MAX_AGE']} s, "
+                f"ping après {pool['HEALTH_CHECK_INTERVAL']} s d'inactivité"
+            )
+
+        stats = get_shared_stats()
+        for name, label in LABELS.items():
+            self.stdout.write(f"{label:<42} {stats[name]:>10}")
+        checkouts = stats['opened'] + stats['reused']
+        ratio = (stats['reused'] / checkouts * 100) if checkouts else 0
+        self.stdout.write(f"Taux de réutilisation: {ratio:.1f}% (compteurs publiés par chaque worker toutes les "
+                          f"{STATS_INTERVAL} s)")
@@ -0,0 +1,37 @@
+"""
+Export des produits vers un fichier (Excel, CSV ou Parquet), ex: pour la BI
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.excel_export import EXPORT_CHUNK_SIZE, EXPORT_WRITERS, parquet_available
+
+
+class Command(BaseCommand):
+    help = "Exporte tous les produits (colonnes de l'import) dans un fichier"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Fichier de sortie (le format est déduit de l'extension si --format est absent)")
+        parser.add_argument('--format', choices=list(EXPORT_WRITERS), help="xlsx, csv ou parquet")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="Produits lus par requête")
+
+    def handle(self, *args, **options):
+        export_format = options['format'] or os.path.splitext(options['output'])[1].lstrip('.').lower()
+        if export_format not in EXPORT_WRITERS:
+            raise CommandError("Format inconnu: utilisez --format xlsx, csv ou parquet")
+        if export_format == 'parquet' and not parquet_available():
+            raise CommandError("L'export Parquet nécessite le paquet pyarrow (pip install pyarrow)")
+
+        start = time.perf_counter()
+        # Écriture dans un fichier temporaire: un export interrompu ne remplace pas le précédent
+        temporary = f"{options['output']}.tmp"
+        with open(temporary, 'wb') as output:
+            EXPORT_WRITERS[export_format](output, options['chunk_size'])
+        os.replace(temporary, options['output'])
+
+        size = os.path.getsize(options['output']) / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Export {export_format} écrit dans {options['output']} ({size:.1f} Mo, {time.perf_counter() - start:.1f} s)"
+        ))
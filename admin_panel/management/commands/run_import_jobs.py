@@ -0,0 +1,53 @@
+"""
+Worker des imports Excel en arrière-plan (file d'attente ImportJob)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from admin_panel.jobs import claim_next_job, discard_stale_previews, fail_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Exécute les imports (Excel, images) en attente (à lancer en service, ex: systemd ou supervisor)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Traiter les jobs en attente puis s'arrêter (cron)")
+        parser.add_argument('--interval', type=float, default=settings.IMPORT_JOB_POLL_INTERVAL,
+                            help="Secondes entre deux vérifications de la file d'attente")
+
+    def handle(self, *args, **options):
+        stale = fail_stale_jobs()
+        if stale:
+            self.stdout.write(self.style.WARNING(f"{stale} job(s) interrompu(s) marqué(s) en échec"))
+        discarded = discard_stale_previews()
+        if discarded:
+            self.stdout.write(f"{discarded} aperçu(s) non confirmé(s) supprimé(s)")
+
+        while True:
+            # Connexions MySQL fermées par le serveur (wait_timeout) pendant l'attente
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"Import #{job.pk} ({job.file_name})...")
+            job = run_job(job)
+            if job.status == 'done' and job.kind == 'images':
+                self.stdout.write(self.style.SUCCESS(
+                    f"Import #{job.pk} terminé: {job.created_count} images importées, {job.skipped_count} ignorées"
+                ))
+            elif job.status == 'preview':
+                self.stdout.write(f"Aperçu de l'import #{job.pk} prêt: {job.total_rows} lignes analysées")
+            elif job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(
+                    f"Import #{job.pk} terminé: {job.created_count} créés, {job.updated_count} mis à jour, "
+                    f"{job.unchanged_count} inchangés, {job.skipped_count} ignorés"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"Import #{job.pk} en échec: {job.error_message}"))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500, verbose_name='Fichier (serveur)')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('total_rows', models.IntegerField(default=0, verbose_name='Lignes')),
+                ('processed_rows', models.IntegerField(default=0, verbose_name='Lignes traitées')),
+                ('created_count', models.IntegerField(default=0, verbose_name='Produits créés')),
+                ('skipped_count', models.IntegerField(default=0, verbose_name='Lignes ignorées')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Erreurs')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Rapport')),
+                ('error_message', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Début')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+            ],
+            options={
+                'verbose_name': 'Import Excel',
+                'verbose_name_plural': 'Imports Excel',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='import_job_queue_idx')],
+            },
+        ),
+    ]
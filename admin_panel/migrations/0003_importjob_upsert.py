@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_importjob_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='mode',
+            field=models.CharField(choices=[('create', 'Création uniquement'), ('upsert', 'Création et mise à jour (prix, stock, statut)')], default='create', max_length=10, verbose_name='Mode'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.IntegerField(default=0, verbose_name='Produits inchangés'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_count',
+            field=models.IntegerField(default=0, verbose_name='Produits mis à jour'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_importjob_upsert'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='importjob',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Import', 'verbose_name_plural': 'Imports'},
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('products', 'Produits (Excel)'), ('images', 'Images')], default='products', max_length=10, verbose_name="Type d'import"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0004_importjob_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('analysis', "En attente d'analyse"), ('analyzing', 'Analyse en cours'), ('preview', 'Aperçu'), ('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut'),
+        ),
+        migrations.CreateModel(
+            name='ImportPreviewRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.IntegerField(verbose_name='Ligne')),
+                ('action', models.CharField(max_length=10, verbose_name='Action')),
+                ('reference', models.TextField(blank=True, verbose_name='Référence')),
+                ('name', models.TextField(blank=True, verbose_name='Nom du produit')),
+                ('price', models.CharField(blank=True, max_length=40, verbose_name='Prix (DH)')),
+                ('quantity', models.CharField(blank=True, max_length=40, verbose_name='Quantité')),
+                ('message', models.TextField(blank=True, verbose_name='Détail')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preview_rows', to='admin_panel.importjob', verbose_name='Import')),
+            ],
+            options={
+                'verbose_name': "Ligne d'aperçu d'import",
+                'verbose_name_plural': "Lignes d'aperçu d'import",
+                'ordering': ['line'],
+                'indexes': [models.Index(fields=['job', 'line'], name='import_preview_line_idx'), models.Index(fields=['job', 'action', 'line'], name='import_preview_action_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import models
+
+
+class ImportJob(models.Model):
+    """
+    Import Excel de produits ou d'images exécuté en arrière-plan (voir admin_panel.jobs)
+    Un import Excel est d'abord analysé par le worker ('analysis' puis 'analyzing'), puis attend
+    en aperçu ('preview') la confirmation de l'utilisateur: result contient alors le résumé du
+    diff et ImportPreviewRow son détail ligne par ligne.
+    """
+    STATUS_CHOICES = [
+        ('analysis', "En attente d'analyse"),
+        ('analyzing', 'Analyse en cours'),
+        ('preview', 'Aperçu'),
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échoué'),
+    ]
+
+    KIND_CHOICES = [
+        ('products', 'Produits (Excel)'),
+        ('images', 'Images'),
+    ]
+
+    MODE_CHOICES = [
+        ('create', 'Création uniquement'),
+        ('upsert', 'Création et mise à jour (prix, stock, statut)'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='products', verbose_name="Type d'import")
+    # Fichier Excel, ou dossier des images (avec manifest.json) pour un import d'images
+    file_path = models.CharField(max_length=500, verbose_name="Fichier (serveur)")
+    file_name = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='create', verbose_name="Mode")
+
+    # Compteurs (mis à jour à la fin de l'import, la progression en cours est dans le cache)
+    total_rows = models.IntegerField(default=0, verbose_name="Lignes")
+    processed_rows = models.IntegerField(default=0, verbose_name="Lignes traitées")
+    created_count = models.IntegerField(default=0, verbose_name="Produits créés")
+    updated_count = models.IntegerField(default=0, verbose_name="Produits mis à jour")
+    unchanged_count = models.IntegerField(default=0, verbose_name="Produits inchangés")
+    skipped_count = models.IntegerField(default=0, verbose_name="Lignes ignorées")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Erreurs")
+    result = models.JSONField(null=True, blank=True, verbose_name="Rapport")
+    error_message = models.TextField(blank=True, verbose_name="Erreur")
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs', verbose_name="Créé par")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Début")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        verbose_name = "Import"
+        verbose_name_plural = "Imports"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='import_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Import #{self.pk} - {self.file_name} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+
+class ImportPreviewRow(models.Model):
+    """Ligne du diff d'un aperçu d'import (supprimée avec le job ou à la confirmation)"""
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='preview_rows', verbose_name="Import")
+    line = models.IntegerField(verbose_name="Ligne")
+    # create, update, unchanged, duplicate, invalid ou error
+    action = models.CharField(max_length=10, verbose_name="Action")
+    # Valeurs du fichier telles quelles (éventuellement invalides ou trop longues)
+    reference = models.TextField(blank=True, verbose_name="Référence")
+    name = models.TextField(blank=True, verbose_name="Nom du produit")
+    price = models.CharField(max_length=40, blank=True, verbose_name="Prix (DH)")
+    quantity = models.CharField(max_length=40, blank=True, verbose_name="Quantité")
+    message = models.TextField(blank=True, verbose_name="Détail")
+
+    class Meta:
+        verbose_name = "Ligne d'aperçu d'import"
+        verbose_name_plural = "Lignes d'aperçu d'import"
+        ordering = ['line']
+        indexes = [
+            models.Index(fields=['job', 'line'], name='import_preview_line_idx'),
+            models.Index(fields=['job', 'action', 'line'], name='import_preview_action_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ligne {self.line} ({self.action})"
@@ -14,6 +14,7 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
     
     # Catégories
     path('categories/', views.category_list, name='category_list'),
@@ -45,6 +46,10 @@ urlpatterns = [
     path('products/<int:pk>/edit/', views.product_edit, name='product_edit'),
     path('products/<int:pk>/delete/', views.product_delete, name='product_delete'),
     path('products/import/', views.product_import, name='product_import'),
+    path('products/import/jobs/<int:pk>/', views.import_job_status, name='import_job_status'),
+    path('products/import/jobs/<int:pk>/confirm/', views.import_job_confirm, name='import_job_confirm'),
+    path('products/import/jobs/<int:pk>/discard/', views.import_job_discard, name='import_job_discard'),
+    path('products/export/', views.export_products_excel, name='export_products_excel'),
     path('products/images-import/', views.product_images_import, name='product_images_import'),
     path('product/image/<int:pk>/delete/', views.product_image_delete, name='product_image_delete'),
     
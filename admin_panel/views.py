@@ -1,18 +1,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Sum, Count, Q
-from django.db.models.functions import TruncDate
+from django.core.paginator import Paginator
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
+import tempfile
 
 from shop.models import Category, SubCategory, Type, Product, ProductImage, ProductSpecification, Brand, HeroSlide
 from orders.models import Order, OrderItem, Delivery
+from orders.stats import daily_sales, day_bounds, sales_summary, top_products
+from orders.stock import InsufficientStock, change_status
 from .forms import CategoryForm, SubCategoryForm, TypeForm, ProductForm, OrderStatusForm, DeliveryForm, HeroSlideForm
-from .excel_import import ExcelImporter
+from .excel_export import EXPORT_FORMATS, EXPORT_WRITERS, iter_csv, parquet_available
+from .jobs import confirm_import, create_preview, discard_preview, enqueue_images, get_job_status, preview_rows
+from .models import ImportJob
 import os
 from django.conf import settings
 
@@ -45,27 +52,26 @@ def admin_logout(request):
 
 # ==================== Dashboard ====================
 
-@login_required
-def dashboard(request):
-    # Filtres par date
+def get_dashboard_period(request):
+    """(période, date_from, date_to) du tableau de bord d'après les paramètres GET"""
     period = request.GET.get('period', 'all')  # all, today, week, month
     
-    # Définir les dates selon la période
-    now = timezone.now()
+    # Définir les dates selon la période (jours locaux, comme les agrégats quotidiens)
+    today = timezone.localdate()
     date_from = None
     date_to = None
     
     # Si une période rapide est sélectionnée, utiliser les calculs de dates
     # IMPORTANT: Ne PAS utiliser les paramètres date_from/date_to de l'URL si period != 'all'
     if period == 'today':
-        date_from = now.date()
-        date_to = now.date()
+        date_from = today
+        date_to = today
     elif period == 'week':
-        date_from = (now - timedelta(days=7)).date()
-        date_to = now.date()
+        date_from = today - timedelta(days=7)
+        date_to = today
     elif period == 'month':
-        date_from = (now - timedelta(days=30)).date()
-        date_to = now.date()
+        date_from = today - timedelta(days=30)
+        date_to = today
     elif period == 'all':
         # Utiliser les dates manuelles uniquement si period='all'
         date_from_str = request.GET.get('date_from', '').strip()
@@ -83,85 +89,53 @@ def dashboard(request):
             except ValueError:
                 pass
     
-    # Filtrer les commandes selon la période - utiliser des datetimes au lieu de dates
-    orders_query = Order.objects.all()
-    
-    if date_from:
-        # Convertir la date en datetime avec début de journée (00:00:00)
-        from datetime import datetime as dt
-        datetime_from = timezone.make_aware(dt.combine(date_from, dt.min.time()))
-        orders_query = orders_query.filter(created_at__gte=datetime_from)
-    if date_to:
-        # Convertir la date en datetime avec fin de journée (23:59:59)
-        from datetime import datetime as dt
-        datetime_to = timezone.make_aware(dt.combine(date_to, dt.max.time()))
-        orders_query = orders_query.filter(created_at__lte=datetime_to)
+    return period, date_from, date_to
+
+
+@login_required
+def dashboard(request):
+    # Filtres par date
+    period, date_from, date_to = get_dashboard_period(request)
     
     # Statistiques globales
     total_products = Product.objects.count()
     total_categories = Category.objects.count()
     total_users = User.objects.filter(is_staff=True).count()
     
-    # Statistiques des commandes
-    total_orders = orders_query.count()
-    pending_orders = orders_query.filter(status='pending').count()
-    confirmed_orders = orders_query.filter(status='confirmed').count()
-    # Compter les livraisons réellement livrées (Delivery.status='delivered') pour les commandes filtrées
-    delivered_orders = Delivery.objects.filter(order__in=orders_query, status='delivered').count()
-    cancelled_orders = orders_query.filter(status='cancelled').count()
-    
-    # Revenus
-    total_revenue = orders_query.filter(status__in=['confirmed', 'delivered']).aggregate(
-        total=Sum('total'))['total'] or 0
-    pending_revenue = orders_query.filter(status='pending').aggregate(
-        total=Sum('total'))['total'] or 0
+    # Commandes, revenus et produits vendus: agrégats quotidiens (orders.stats), pas la table des commandes
+    summary = sales_summary(date_from, date_to)
     
     # Statistiques par jour (pour le graphique)
-    daily_stats_query = orders_query.annotate(
-        date=TruncDate('created_at')
-    ).values('date').annotate(
-        count=Count('id'),
-        revenue=Sum('total')
-    ).order_by('-date')[:30]
-    
-    # Convertir en liste pour le template et JSON
-    daily_stats = []
-    for stat in daily_stats_query:
-        # Vérifier que la date existe
-        if stat['date'] is not None:
-            daily_stats.append({
-                'date': stat['date'].strftime('%d/%m'),
-                'count': stat['count'],
-                'revenue': float(stat['revenue'] or 0)
-            })
-    daily_stats.reverse()  # Ordre chronologique pour le graphique
-    
-    # Dernières commandes
-    recent_orders = orders_query.select_related('customer').order_by('-created_at')[:10]
-    
-    # Produits les plus vendus dans la période
-    from orders.models import OrderItem
-    top_products = OrderItem.objects.filter(
-        order__in=orders_query
-    ).values(
-        'product__name', 'product__reference'
-    ).annotate(
-        quantity=Sum('quantity')
-    ).order_by('-quantity')[:5]
+    daily_stats = [
+        {
+            'date': stat['date'].strftime('%d/%m'),
+            'count': stat['count'],
+            'revenue': float(stat['revenue'] or 0)
+        }
+        for stat in daily_sales(date_from, date_to)
+    ]
+    
+    # Dernières commandes (index sur created_at)
+    recent_orders = Order.objects.select_related('customer').order_by('-created_at')
+    if date_from:
+        recent_orders = recent_orders.filter(created_at__gte=day_bounds(date_from)[0])
+    if date_to:
+        recent_orders = recent_orders.filter(created_at__lt=day_bounds(date_to)[1])
+    recent_orders = recent_orders[:10]
     
     context = {
         'total_products': total_products,
         'total_categories': total_categories,
         'total_users': total_users,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'confirmed_orders': confirmed_orders,
-        'delivered_orders': delivered_orders,
-        'cancelled_orders': cancelled_orders,
-        'total_revenue': total_revenue,
-        'pending_revenue': pending_revenue,
+        'total_orders': summary['total_orders'],
+        'pending_orders': summary['pending_orders'],
+        'confirmed_orders': summary['confirmed_orders'],
+        'delivered_orders': summary['delivered_orders'],
+        'cancelled_orders': summary['cancelled_orders'],
+        'total_revenue': summary['total_revenue'],
+        'pending_revenue': summary['pending_revenue'],
         'recent_orders': recent_orders,
-        'top_products': top_products,
+        'top_products': top_products(date_from, date_to),
         'daily_stats': json.dumps(daily_stats) if daily_stats else '[]',
         'has_stats': len(daily_stats) > 0,
         'date_from': date_from,
@@ -173,6 +147,28 @@ def dashboard(request):
     return render(request, 'admin_panel/dashboard.html', context)
 
 
+@login_required
+def dashboard_stats(request):
+    """Statistiques de ventes de la période en JSON (mêmes paramètres que le tableau de bord)"""
+    period, date_from, date_to = get_dashboard_period(request)
+    summary = sales_summary(date_from, date_to)
+    return JsonResponse({
+        'period': period,
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'orders': {key: value for key, value in summary.items() if not key.endswith('revenue')},
+        'revenue': {key: float(value) for key, value in summary.items() if key.endswith('revenue')},
+        'daily': [
+            {'date': stat['date'].isoformat(), 'count': stat['count'], 'revenue': float(stat['revenue'] or 0)}
+            for stat in daily_sales(date_from, date_to)
+        ],
+        'top_products': [
+            {'name': product['product__name'], 'reference': product['product__reference'], 'quantity': product['quantity']}
+            for product in top_products(date_from, date_to)
+        ],
+    })
+
+
 # ==================== Catégories ====================
 
 @login_required
@@ -525,7 +521,7 @@ def brand_delete(request, pk):
 
 @login_required
 def product_list(request):
-    products = Product.objects.select_related('category', 'subcategory', 'brand', 'type').prefetch_related('images').order_by('-created_at')
+    products = Product.objects.select_related('category', 'subcategory', 'brand', 'type', 'main_product_image').order_by('-created_at')
     
     # Récupérer tous les éléments pour les filtres
     categories = Category.objects.filter(is_active=True).order_by('name')
@@ -699,6 +695,10 @@ def product_edit(request, pk):
                 product.images.update(is_main=False)
                 product.images.filter(id=existing_main_id).update(is_main=True)
             
+            # update() ne déclenche pas les signaux: resynchroniser l'image principale
+            if images or existing_main_id:
+                product.refresh_main_image()
+            
             # Gérer les caractéristiques
             # D'abord, supprimer les anciennes caractéristiques
             product.specifications.all().delete()
@@ -848,36 +848,19 @@ def order_confirm(request, pk):
     order = get_object_or_404(Order, pk=pk)
     if request.method == 'POST':
         try:
-            # Verifier si le stock a deja ete deduit
-            if order.stock_deducted:
+            # Verifier si la commande a deja ete confirmee (stock deja deduit)
+            if order.status not in ('pending', 'cancelled') and order.stock_deducted:
                 messages.warning(request, f'La commande {order.order_number} a deja ete confirmee et le stock a deja ete deduit.')
                 return redirect('admin_panel:order_detail', pk=pk)
             
-            # Verifier le stock disponible pour tous les produits
-            insufficient_stock = []
-            for item in order.items.all():
-                if item.product.quantity < item.quantity:
-                    insufficient_stock.append(f"{item.product_name} (Stock disponible: {item.product.quantity}, Quantite demandee: {item.quantity})")
-            
-            if insufficient_stock:
-                messages.error(request, f'Stock insuffisant pour: {", ".join(insufficient_stock)}')
+            # Confirmer: le stock reserve a la creation devient definitif, il est reserve
+            # (verrou des produits, verification de la disponibilite) si la commande n'en detient pas
+            try:
+                order = change_status(order, 'confirmed')
+            except InsufficientStock as e:
+                messages.error(request, f'Stock insuffisant pour: {e}')
                 return redirect('admin_panel:order_detail', pk=pk)
             
-            # Deduire les quantites du stock
-            for item in order.items.all():
-                product = item.product
-                old_quantity = product.quantity
-                product.quantity -= item.quantity
-                product.save(update_fields=['quantity'])
-                # Log pour debug
-                print(f"Stock mis a jour pour {product.name}: {old_quantity} -> {product.quantity}")
-            
-            # Mettre a jour le statut de la commande et marquer le stock comme deduit
-            order.status = 'confirmed'
-            order.confirmed_at = timezone.now()
-            order.stock_deducted = True
-            order.save()
-            
             # Creer une livraison si elle n'existe pas
             if not hasattr(order, 'delivery'):
                 Delivery.objects.create(order=order)
@@ -898,23 +881,13 @@ def order_cancel(request, pk):
     order = get_object_or_404(Order, pk=pk)
     if request.method == 'POST':
         try:
-            # Si le stock a ete deduit, le restaurer
-            if order.stock_deducted:
-                for item in order.items.all():
-                    product = item.product
-                    old_quantity = product.quantity
-                    product.quantity += item.quantity
-                    product.save(update_fields=['quantity'])
-                    # Log pour debug
-                    print(f"Stock restaure pour {product.name}: {old_quantity} -> {product.quantity}")
-                
-                order.stock_deducted = False
+            # Si la commande detient du stock, le restaurer
+            stock_deducted = order.stock_deducted
+            order = change_status(order, 'cancelled')
+            if stock_deducted:
                 messages.success(request, f'Commande {order.order_number} annulee. Le stock a ete restaure.')
             else:
                 messages.success(request, f'Commande {order.order_number} annulee.')
-            
-            order.status = 'cancelled'
-            order.save()
             return redirect('admin_panel:order_detail', pk=pk)
         except Exception as e:
             import traceback
@@ -1273,70 +1246,20 @@ def hero_slide_delete(request, pk):
 
 @login_required
 def product_import(request):
-    """Page d'importation de produits depuis Excel"""
+    """Page d'importation de produits depuis Excel (aperçu, puis import exécuté en arrière-plan)"""
     if request.method == 'POST' and request.FILES.get('excel_file'):
         excel_file = request.FILES['excel_file']
         
         # Vérifier l'extension du fichier
-        if not excel_file.name.endswith(('.xlsx', '.xls')):
-            messages.error(request, 'Veuillez uploader un fichier Excel valide (.xlsx ou .xls)')
+        if not excel_file.name.lower().endswith(('.xlsx', '.xls', '.csv')):
+            messages.error(request, 'Veuillez uploader un fichier Excel valide (.xlsx, .xls ou .csv)')
             return redirect('admin_panel:product_import')
         
-        # Sauvegarder temporairement le fichier
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            for chunk in excel_file.chunks():
-                tmp_file.write(chunk)
-            tmp_path = tmp_file.name
-        
-        try:
-            # Importer les produits
-            importer = ExcelImporter()
-            result = importer.import_from_excel(tmp_path)
-            
-            if result['success']:
-                # Message de succes detaille
-                success_msg = f"[OK] Importation terminee avec succes!\n"
-                success_msg += f"• {result['created']} produits créés\n"
-                success_msg += f"• {result['skipped']} produits ignorés (doublons ou données manquantes)\n"
-                
-                if result['created_brands']:
-                    success_msg += f"• {len(result['created_brands'])} nouvelles marques créées: {', '.join(result['created_brands'][:5])}"
-                    if len(result['created_brands']) > 5:
-                        success_msg += f" et {len(result['created_brands']) - 5} autres"
-                    success_msg += "\n"
-                
-                if result['created_types']:
-                    success_msg += f"• {len(result['created_types'])} nouveaux types créés: {', '.join(result['created_types'][:5])}"
-                    if len(result['created_types']) > 5:
-                        success_msg += f" et {len(result['created_types']) - 5} autres"
-                    success_msg += "\n"
-                
-                if result['created_collections']:
-                    success_msg += f"• {len(result['created_collections'])} nouvelles collections créées: {', '.join(result['created_collections'])}\n"
-                
-                messages.success(request, success_msg)
-                
-                # Afficher les erreurs s'il y en a
-                if result['errors']:
-                    error_msg = "[ATTENTION] Erreurs rencontrees:\n" + "\n".join(result['errors'][:10])
-                    if len(result['errors']) > 10:
-                        error_msg += f"\n... et {len(result['errors']) - 10} autres erreurs"
-                    messages.warning(request, error_msg)
-            else:
-                messages.error(request, f"[ERREUR] {result['error']}")
-        
-        except Exception as e:
-            messages.error(request, f"[ERREUR] Erreur lors de l'importation: {str(e)}")
-        
-        finally:
-            # Supprimer le fichier temporaire
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-        
-        return redirect('admin_panel:product_import')
+        # Aperçu sans écriture calculé par le worker "python manage.py run_import_jobs",
+        # qui exécute ensuite l'import une fois l'aperçu confirmé
+        mode = 'upsert' if request.POST.get('mode') == 'upsert' else 'create'
+        job = create_preview(excel_file, request.user, mode)
+        return redirect(f"{reverse('admin_panel:product_import')}?job={job.pk}")
     
     # Statistiques actuelles
     stats = {
@@ -1347,7 +1270,56 @@ def product_import(request):
         'types': Type.objects.count(),
     }
     
-    return render(request, 'admin_panel/product_import.html', {'stats': stats})
+    # Job suivi par la page: celui passé en paramètre, sinon le dernier import non terminé
+    job = None
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id, kind='products').first()
+    if job is None:
+        job = ImportJob.objects.filter(
+            kind='products', status__in=['analysis', 'analyzing', 'pending', 'running']
+        ).order_by('-created_at').first()
+    
+    context = {'stats': stats, 'job': job}
+    if job is not None and job.status == 'preview':
+        # Diff de l'aperçu, paginé et filtrable par action
+        action = request.GET.get('action', '')
+        paginator = Paginator(preview_rows(job, action), settings.IMPORT_PREVIEW_PAGE_SIZE)
+        context.update({
+            'preview': job.result,
+            'preview_action': action,
+            'preview_page': paginator.get_page(request.GET.get('page')),
+        })
+    
+    return render(request, 'admin_panel/product_import.html', context)
+
+
+@login_required
+def import_job_confirm(request, pk):
+    """Confirme l'import d'un aperçu (mise en file d'attente)"""
+    job = get_object_or_404(ImportJob, pk=pk)
+    if request.method == 'POST':
+        if confirm_import(job):
+            messages.success(request, "Import confirmé: traitement en arrière-plan.")
+        else:
+            messages.warning(request, "Cet import a déjà été confirmé ou annulé.")
+    return redirect(f"{reverse('admin_panel:product_import')}?job={job.pk}")
+
+
+@login_required
+def import_job_discard(request, pk):
+    """Annule un aperçu d'import (le fichier est supprimé)"""
+    job = get_object_or_404(ImportJob, pk=pk)
+    if request.method == 'POST' and discard_preview(job):
+        messages.info(request, "Import annulé.")
+    return redirect('admin_panel:product_import')
+
+
+@login_required
+def import_job_status(request, pk):
+    """Progression d'un import en arrière-plan (JSON, interrogé par la page d'import)"""
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(get_job_status(job))
 
 
 # ==================== Importation des Images ====================
@@ -1356,138 +1328,27 @@ def product_import(request):
 
 @login_required
 def product_images_import(request):
-    """Page d'importation des images de produits depuis un dossier"""
+    """Page d'importation des images de produits depuis un dossier (import exécuté en arrière-plan)"""
     if request.method == 'POST':
         files = request.FILES.getlist('images')
         if not files:
             messages.error(request, "Aucun fichier reçu. Veuillez sélectionner des images ou un dossier.")
             return redirect('admin_panel:product_images_import')
 
-        IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
-        logs = []
-        stats = {'total': len(files), 'success': 0, 'not_found': 0, 'errors': 0}
-        not_found_products = set()
-
-        def normalize_name(name):
-            return name.lower().strip()
-
-        def extract_reference_from_name(name):
-            import re
-            patterns = [
-                r'\b([A-Z0-9]+-[A-Z0-9-]+)\b',
-                r'\b(RTX\s*\d{4}\s*[A-Z]*|GTX\s*\d{4}\s*[A-Z]*)\b',
-                r'\b(RX\s*\d{4}\s*[A-Z]*)\b',
-                r'\b([iI][3579]-\d{4,5}[A-Z]{0,2})\b',
-                r'\b(Ryzen\s*[3579]\s*\d{4}[A-Z]{0,2})\b',
-                r'\b([A-Z]\d{3,4}[A-Z]*-[A-Z0-9]+)\b',
-                r'\b([A-Z]{2,}\d{3,})\b',
-            ]
-            for pattern in patterns:
-                match = re.search(pattern, name, re.IGNORECASE)
-                if match:
-                    return match.group(1).strip()
-            return None
-
-        import unicodedata
-        def is_valid_filename(name):
-            try:
-                name.encode('ascii')
-            except UnicodeEncodeError:
-                return False
-            invalid_chars = set('<>:"/\\|?*')
-            return not any(c in invalid_chars for c in name)
-
-        for f in files:
-            filename = f.name
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in IMAGE_EXTENSIONS:
-                logs.append(f"[IGNORÉ] Fichier non image: {filename}")
-                continue
-
-            if not is_valid_filename(filename):
-                logs.append(f"[ERREUR] Nom de fichier non valide (emoji ou caractère spécial interdit): {filename}")
-                stats['errors'] += 1
-                continue
-
-            rel_path = getattr(f, 'relative_path', filename)
-            path_parts = rel_path.split('/') if '/' in rel_path else rel_path.split('\\')
-            product_folder = path_parts[0] if len(path_parts) > 1 else None
-            reference_folder = path_parts[1] if len(path_parts) > 2 else None
-
-            product = None
-            reference = None
-            if reference_folder:
-                reference = extract_reference_from_name(reference_folder)
-                if reference:
-                    product = Product.objects.filter(reference__iexact=reference.upper().strip()).first()
-                if not product:
-                    product = Product.objects.filter(name__icontains=product_folder).first()
-            elif product_folder:
-                product = Product.objects.filter(name__icontains=product_folder).first()
-
-            if not product:
-                logs.append(f"[ATTENTION] Produit non trouvé pour: {rel_path}")
-                stats['not_found'] += 1
-                not_found_products.add(product_folder or rel_path)
-                continue
-
-            is_main = False
-            if len(path_parts) > 2 and path_parts[-2].lower() == 'image':
-                is_main = True
-
-            destination_subdir = 'products/gallery/'
-            media_root = os.path.join(settings.BASE_DIR, 'media', destination_subdir)
-            os.makedirs(media_root, exist_ok=True)
-            dest_filename = f"{product.reference}_{filename}"
-            relative_path = os.path.join(destination_subdir, dest_filename)
-            destination_path = os.path.join(settings.BASE_DIR, 'media', destination_subdir, dest_filename)
-
-            if ProductImage.objects.filter(product=product, image__icontains=dest_filename).exists():
-                logs.append(f"[IGNORÉ] Image déjà existante: {dest_filename}")
-                continue
-
-            try:
-                with open(destination_path, 'wb+') as dest:
-                    for chunk in f.chunks():
-                        dest.write(chunk)
-                from PIL import Image
-                with Image.open(destination_path) as img:
-                    img.verify()
-            except Exception as e:
-                logs.append(f"[ERREUR] Erreur lors de l'import de {dest_filename}: {e}")
-                if os.path.exists(destination_path):
-                    os.remove(destination_path)
-                stats['errors'] += 1
-                continue
-
-            if is_main:
-                ProductImage.objects.filter(product=product, is_main=True).delete()
-
-            ProductImage.objects.create(
-                product=product,
-                image=relative_path,
-                is_main=is_main,
-                order=0 if is_main else ProductImage.objects.filter(product=product).count()
-            )
-            logs.append(f"[OK] Image {'principale' if is_main else 'ajoutée'}: {dest_filename} pour {product.reference}")
-            stats['success'] += 1
-
-        success_msg = f"[OK] Importation terminée !\n"
-        success_msg += f"- {stats['success']}/{stats['total']} images importées\n"
-        success_msg += f"- {stats['not_found']} produits non trouvés\n"
-        success_msg += f"- {stats['errors']} erreurs"
-        messages.success(request, success_msg)
-        if not_found_products:
-            warning_msg = f"[ATTENTION] Produits non trouvés ({len(not_found_products)}) :\n"
-            warning_msg += "\n".join([f"- {name}" for name in list(not_found_products)[:10]])
-            if len(not_found_products) > 10:
-                warning_msg += f"\n... et {len(not_found_products) - 10} autres"
-            messages.warning(request, warning_msg)
-        request.session['import_logs'] = logs
-        return redirect('admin_panel:product_images_import')
-    
-    # Récupérer les logs de la dernière importation si disponibles
-    import_logs = request.session.pop('import_logs', None)
+        # Les fichiers sont traités par le worker "python manage.py run_import_jobs"
+        job = enqueue_images(files, request.POST.getlist('relative_paths'), request.user)
+        return redirect(f"{reverse('admin_panel:product_images_import')}?job={job.pk}")
+    
+    # Job suivi par la page: celui passé en paramètre, sinon le dernier import d'images non terminé
+    job = None
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id, kind='images').first()
+    if job is None:
+        job = ImportJob.objects.filter(kind='images', status__in=['pending', 'running']).order_by('-created_at').first()
+    
+    # Logs détaillés de l'import terminé
+    import_logs = job.result.get('logs') if job is not None and job.status == 'done' and job.result else None
     
     # Statistiques actuelles
     stats = {
@@ -1498,126 +1359,38 @@ def product_images_import(request):
     
     return render(request, 'admin_panel/product_images_import.html', {
         'stats': stats,
+        'job': job,
         'import_logs': import_logs
     })
 
 
 @login_required
 def export_products_excel(request):
-    """Exporte les produits vers un fichier Excel avec le format attendu pour l'import d'images"""
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-    from openpyxl.utils import get_column_letter
-    
-    # Créer un nouveau classeur Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Produits"
-    
-    # Définir les colonnes (même format que data_product.xlsx)
-    columns = [
-        'Référence *',
-        'Nom du produit *',
-        'Catégorie *',
-        'Sous-catégorie *',
-        'Marque',
-        'Type',
-        'Collection',
-        'Prix (DH) *',
-        'Prix Promo (DH)',
-        'Quantité *',
-        'Statut',
-        'Description *',
-        'Caractéristiques',
-        'Garantie',
-        'Poids (kg)',
-        'Meta Titre SEO',
-        'Meta Description SEO',
-        'Best Seller',
-        'En vedette',
-        'Nouveau'
-    ]
-    
-    # Styles pour l'en-tête
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Écrire les en-têtes
-    for col_num, column_title in enumerate(columns, 1):
-        cell = ws.cell(row=1, column=col_num, value=column_title)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Récupérer les produits avec les relations
-    products = Product.objects.select_related(
-        'category', 'subcategory', 'brand', 'type', 'collection'
-    ).order_by('reference')
-    
-    # Mapping des statuts
-    status_mapping = {
-        'in_stock': 'En Stock',
-        'out_of_stock': 'Rupture de Stock',
-        'preorder': 'Précommande',
-        'discontinued': 'Discontinué',
-    }
-    
-    # Écrire les données des produits
-    for row_num, product in enumerate(products, 2):
-        row_data = [
-            product.reference,
-            product.name,
-            product.category.name if product.category else '',
-            product.subcategory.name if product.subcategory else '',
-            product.brand.name if product.brand else (product.brand_text or ''),
-            product.type.name if product.type else '',
-            product.collection.name if product.collection else '',
-            float(product.price) if product.price else '',
-            float(product.discount_price) if product.discount_price else '',
-            product.quantity,
-            status_mapping.get(product.status, product.status),
-            product.description or '',
-            product.caracteristiques or '',
-            product.warranty or '',
-            float(product.weight) if product.weight else '',
-            product.meta_title or '',
-            product.meta_description or '',
-            'OUI' if product.is_bestseller else 'NON',
-            'OUI' if product.is_featured else 'NON',
-            'OUI' if product.is_new else 'NON'
-        ]
-        
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(vertical="center", wrap_text=True)
-    
-    # Ajuster la largeur des colonnes
-    column_widths = [15, 50, 20, 25, 20, 20, 20, 12, 15, 10, 18, 60, 50, 20, 12, 50, 80, 12, 12, 10]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Figer la première ligne
-    ws.freeze_panes = 'A2'
-    
-    # Créer la réponse HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    
+    """Exporte les produits (Excel par défaut, ?format=csv ou ?format=parquet) avec les colonnes de l'import"""
+    export_format = request.GET.get('format')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'xlsx'
+    content_type, extension = EXPORT_FORMATS[export_format]
+
     # Nom du fichier avec la date
-    filename = f"produits_goback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # Sauvegarder le classeur dans la réponse
-    wb.save(response)
-    
-    return response
\ No newline at end of file
+    filename = f"produits_goback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+    if export_format == 'csv':
+        # Lignes envoyées au fur et à mesure de la lecture des lots
+        response = StreamingHttpResponse(iter_csv(), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    if export_format == 'parquet' and not parquet_available():
+        messages.error(request, "L'export Parquet nécessite le paquet pyarrow (pip install pyarrow).")
+        return redirect('admin_panel:product_import')
+
+    # Fichier temporaire anonyme (supprimé à la fermeture), envoyé par blocs
+    output = tempfile.TemporaryFile()
+    try:
+        EXPORT_WRITERS[export_format](output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=content_type)
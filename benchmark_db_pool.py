@@ -0,0 +1,121 @@
+"""
+Benchmark du pool de connexions MySQL (config/db_backend/pool.py)
+
+Crée une base de test (comme "manage.py test", la base configurée n'est pas modifiée)
+puis mesure la latence de requêtes HTTP complètes (client de test Django, signaux de
+début/fin de requête compris) sur un endpoint qui interroge la base, sans pool (une
+connexion ouverte et fermée par requête, CONN_MAX_AGE = 0) puis avec le pool, en
+séquentiel puis avec plusieurs threads (comme des workers gthread).
+
+Nécessite la base MySQL/MariaDB configurée (DB_HOST, DB_USER...). Pour mesurer le coût
+d'une connexion TLS ou distante, pointer DB_HOST vers le serveur de production.
+
+Usage: python benchmark_db_pool.py [--requests 500] [--threads 8] [--url /api/orders/]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from config.db_backend import pool as db_pool
+from orders.models import Customer, Order
+
+MODES = [
+    ('sans pool', None),
+    ('pool (ping à chaque reprise)', {'MAX_SIZE': 10, 'MAX_AGE': 300, 'HEALTH_CHECK_INTERVAL': 0}),
+    ('pool (ping après 30 s)', {'MAX_SIZE': 10, 'MAX_AGE': 300, 'HEALTH_CHECK_INTERVAL': 30}),
+]
+
+checkouts = []
+connection_created.connect(lambda sender, connection, **kwargs: checkouts.append(1))
+
+
+def run_requests(url, count, latencies):
+    client = Client()
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, f"{url}: HTTP {response.status_code}"
+
+
+def measure(url, requests, threads):
+    """Latences (ms) de requests requêtes réparties sur threads threads"""
+    latencies = []
+    workers = [
+        threading.Thread(target=run_requests, args=(url, requests // threads, latencies))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--url', default='/api/orders/', help="Endpoint GET qui interroge la base (hors cache)")
+    args = parser.parse_args()
+
+    if connection.vendor != 'mysql':
+        print("Ce benchmark nécessite MySQL/MariaDB (backend config.db_backend)")
+        return 2
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        customer = Customer.objects.create(first_name='Test', last_name='Pool', phone='0600000000',
+                                           address='-', city='-')
+        for _ in range(20):
+            Order.objects.create(customer=customer, subtotal=Decimal('100'), total=Decimal('100'))
+
+        print("=" * 100)
+        print(f"POOL DE CONNEXIONS - GET {args.url}, {args.requests} requêtes par mesure")
+        print("=" * 100)
+        print(f"{'Mode':<30} {'threads':>7} {'moy. ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} "
+              f"{'ouvertes':>9} {'reprises':>9}")
+        print("-" * 100)
+        for name, options in MODES:
+            connections.close_all()
+            db_pool.close_pools()
+            connection.settings_dict['POOL'] = options
+            for threads in (1, args.threads):
+                # Échauffement (chargement des modules, requêtes préparées)
+                run_requests(args.url, 5, [])
+                before = db_pool.get_stats()
+                checkouts.clear()
+                latencies, elapsed = measure(args.url, args.requests, threads)
+                after = db_pool.get_stats()
+                opened = after['opened'] - before['opened'] if options else len(checkouts)
+                reused = after['reused'] - before['reused']
+                print(f"{name:<30} {threads:>7} {statistics.mean(latencies):>8.2f} "
+                      f"{statistics.median(latencies):>8.2f} {statistics.quantiles(latencies, n=20)[-1]:>8.2f} "
+                      f"{len(latencies) / elapsed:>8.0f} {opened:>9} {reused:>9}")
+        print("-" * 100)
+        return 0
+    finally:
+        connections.close_all()
+        db_pool.close_pools()
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
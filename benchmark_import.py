@@ -0,0 +1,54 @@
+"""
+Script pour mesurer l'import Excel des produits (durée et nombre de requêtes)
+L'import est exécuté dans une transaction annulée à la fin: la base n'est pas modifiée.
+
+Usage: python benchmark_import.py fichier.xlsx [--batch-size 500] [--keep]
+"""
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from admin_panel.excel_import import ExcelImporter
+
+args = sys.argv[1:]
+if not args:
+    print(__doc__)
+    sys.exit(1)
+
+batch_size = 500
+if '--batch-size' in args:
+    position = args.index('--batch-size')
+    batch_size = int(args[position + 1])
+    del args[position:position + 2]
+keep = '--keep' in args
+file_path = [arg for arg in args if arg != '--keep'][0]
+
+print("=" * 80)
+print(f"BENCHMARK IMPORT EXCEL - {file_path} (lots de {batch_size})")
+print("=" * 80)
+
+with transaction.atomic():
+    importer = ExcelImporter(batch_size=batch_size)
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        result = importer.import_from_excel(file_path)
+    duration = time.perf_counter() - start
+    if not keep:
+        transaction.set_rollback(True)
+
+if not result['success']:
+    print(f"Erreur: {result['error']}")
+    sys.exit(1)
+
+print(f"Durée: {duration:.2f} s")
+print(f"Requêtes SQL: {len(queries.captured_queries)}")
+print(f"Créés: {result['created']} | Ignorés: {result['skipped']} | Erreurs: {len(result['errors'])}")
+print("Import conservé" if keep else "Import annulé (--keep pour le conserver)")
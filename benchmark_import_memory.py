@@ -0,0 +1,130 @@
+"""
+Script pour mesurer la mémoire (pic RSS) de la lecture des fichiers d'import produits
+
+Compare, pour chaque nombre de lignes, la lecture complète historique (pd.read_excel) et
+la lecture en flux d'ExcelImporter (openpyxl read_only pour .xlsx, CSV par lots). Chaque
+mesure est faite dans un process séparé; les fichiers générés ont de longues colonnes
+Description et Caractéristiques, comme les fichiers fournisseurs.
+La base n'est pas utilisée: seules la lecture et la préparation des lignes sont mesurées.
+
+Usage: python benchmark_import_memory.py [--rows 10000,50000,100000] [--chunk-size 5000]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import openpyxl
+import pandas as pd
+
+from admin_panel.excel_import import ExcelImporter, prepare_rows
+
+COLUMNS = [
+    'Référence *', 'Nom du produit *', 'Catégorie *', 'Sous-catégorie *', 'Marque', 'Type',
+    'Prix (DH) *', 'Prix Promo (DH)', 'Quantité *', 'Description *', 'Caractéristiques', 'Statut',
+]
+
+
+def peak_rss_mb():
+    """Pic RSS du process en Mo"""
+    # VmHWM (Linux) repart de zéro à l'exec; ru_maxrss garde le pic du process parent forké
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def generate(directory, rows):
+    """Crée les fichiers .xlsx et .csv de test (écriture en flux)"""
+    xlsx_path = os.path.join(directory, f'products_{rows}.xlsx')
+    csv_path = os.path.join(directory, f'products_{rows}.csv')
+    if os.path.exists(xlsx_path) and os.path.exists(csv_path):
+        return xlsx_path, csv_path
+
+    description = "Produit gaming haut de gamme, garantie constructeur. " * 12
+    characteristics = "\n".join(f"• Caractéristique {i}: valeur détaillée {i} Go" for i in range(12))
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(COLUMNS)
+    for i in range(rows):
+        sheet.append([
+            f'BENCH-{i:07d}', f'Produit de test {i}', 'Composants', 'Cartes Graphiques', 'Asus', 'ROG',
+            1000 + i % 500, None, i % 20, description, characteristics, 'En stock',
+        ])
+    workbook.save(xlsx_path)
+    pd.read_excel(xlsx_path, dtype=str).to_csv(csv_path, sep=';', index=False, encoding='utf-8-sig')
+    return xlsx_path, csv_path
+
+
+def measure(mode, file_path, chunk_size):
+    """Exécuté dans le process enfant: lit et prépare toutes les lignes, affiche lignes / pic RSS / durée"""
+    start = time.perf_counter()
+    rows = 0
+    if mode == 'legacy':
+        data, valid = prepare_rows(pd.read_excel(file_path))
+        rows = sum(1 for _ in data.itertuples())
+    else:
+        importer = ExcelImporter(chunk_size=chunk_size)
+        for data, valid in importer.read_rows(file_path):
+            rows += sum(1 for _ in data.itertuples())
+    print(f"{rows} {peak_rss_mb():.1f} {time.perf_counter() - start:.2f}")
+
+
+def run(mode, file_path, chunk_size):
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', mode, file_path, '--chunk-size', str(chunk_size)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return int(output[0]), float(output[1]), float(output[2])
+
+
+def main(args):
+    chunk_size = 5000
+    if '--chunk-size' in args:
+        position = args.index('--chunk-size')
+        chunk_size = int(args[position + 1])
+        del args[position:position + 2]
+
+    if args and args[0] == '--measure':
+        measure(args[1], args[2], chunk_size)
+        return
+
+    row_counts = [10000, 50000]
+    if '--rows' in args:
+        row_counts = [int(value) for value in args[args.index('--rows') + 1].split(',')]
+
+    print("=" * 80)
+    print(f"BENCHMARK MÉMOIRE IMPORT PRODUITS (lots de {chunk_size} lignes)")
+    print("=" * 80)
+    print(f"{'Lignes':>8} | {'read_excel':>18} | {'flux .xlsx':>18} | {'flux .csv':>18}")
+    print("-" * 80)
+
+    directory = os.path.join(tempfile.gettempdir(), 'benchmark_import_memory')
+    os.makedirs(directory, exist_ok=True)
+    for rows in row_counts:
+        xlsx_path, csv_path = generate(directory, rows)
+        cells = []
+        for mode, file_path in (('legacy', xlsx_path), ('stream', xlsx_path), ('stream', csv_path)):
+            read, rss, duration = run(mode, file_path, chunk_size)
+            assert read == rows, f"{read} lignes lues sur {rows}"
+            cells.append(f"{rss:7.0f} Mo {duration:6.1f} s")
+        print(f"{rows:>8} | " + " | ".join(cells))
+
+    print("-" * 80)
+    print(f"Pic RSS du process (Django chargé) et durée de lecture; fichiers conservés dans {directory}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
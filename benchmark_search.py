@@ -0,0 +1,63 @@
+"""
+Script pour comparer la recherche produits: ancienne requête icontains vs index plein texte
+
+Usage: python benchmark_search.py [requêtes...] [--repeat N]
+"""
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db.models import Q
+
+from shop.models import Product
+from shop.search import get_backend, search_products
+
+DEFAULT_QUERIES = ['ecran', 'écrans', 'clavier mécanique', 'rtx 4060', 'souris sans fil', 'ssd 1to']
+
+
+def old_search(query):
+    """Requête de l'ancienne version de ProductViewSet (OR de 5 LIKE '%...%')"""
+    return list(Product.objects.filter(
+        Q(name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(reference__icontains=query) |
+        Q(brand__name__icontains=query) |
+        Q(brand_text__icontains=query)
+    ).values_list('pk', flat=True))
+
+
+def new_search(query):
+    return [product_id for product_id, _ in search_products(query)]
+
+
+def measure(func, query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = func(query)
+    return (time.perf_counter() - start) / repeat * 1000, len(results)
+
+
+args = sys.argv[1:]
+repeat = 20
+if '--repeat' in args:
+    position = args.index('--repeat')
+    repeat = int(args[position + 1])
+    del args[position:position + 2]
+queries = args or DEFAULT_QUERIES
+
+# Première recherche: chargement de l'index (moteur python)
+new_search(queries[0])
+
+print("=" * 80)
+print(f"BENCHMARK RECHERCHE - {Product.objects.count()} produits, moteur {get_backend()}, {repeat} répétitions")
+print("=" * 80)
+print(f"{'Requête':<25} {'icontains (ms)':>15} {'résultats':>10} {'index (ms)':>12} {'résultats':>10}")
+for query in queries:
+    old_ms, old_count = measure(old_search, query, repeat)
+    new_ms, new_count = measure(new_search, query, repeat)
+    print(f"{query:<25} {old_ms:>15.2f} {old_count:>10} {new_ms:>12.2f} {new_count:>10}")
@@ -0,0 +1,186 @@
+"""
+Test de charge des profils gunicorn (GUNICORN_PROFILE de gunicorn_config.py): sync, gthread, asgi
+
+Pour chaque profil, démarre gunicorn avec gunicorn_config.py sur un port libre (logs dans un
+dossier temporaire), envoie des requêtes GET depuis plusieurs clients simultanés pendant une
+durée fixe (une connexion HTTP par requête, comme nginx vers gunicorn) et mesure le débit,
+les latences et la mémoire des process gunicorn (PSS: les pages partagées grâce à preload_app
+sont réparties entre les process au lieu d'être comptées dans chacun).
+
+Utilise la base et le cache configurés (requêtes en lecture seule). --uncached ajoute un
+paramètre unique à chaque requête pour contourner le cache de l'API catalogue.
+Le client tourne sur la même machine et partage ses CPU avec le serveur.
+
+Usage: python benchmark_workers.py [--profiles sync gthread asgi] [--clients 32] [--duration 20]
+                                   [--url /api/products/] [--uncached]
+"""
+import argparse
+import http.client
+import importlib.util
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from gunicorn_config import PROFILES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path, headers={'Host': 'localhost'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def wait_ready(port, path, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            get(port, path)
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def process_tree(pid):
+    """pid et ses descendants (workers gunicorn)"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f'/proc/{parent}/task/{parent}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_mb(pid):
+    """PSS (Linux) cumulé du master et des workers, en Mo"""
+    total = 0
+    for child in process_tree(pid):
+        try:
+            with open(f'/proc/{child}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def load(port, path, clients, duration, uncached):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    counter = iter(range(10 ** 9))
+
+    def client():
+        while time.monotonic() < deadline:
+            url = f"{path}{'&' if '?' in path else '?'}_={next(counter)}" if uncached else path
+            start = time.perf_counter()
+            try:
+                status = get(port, url)
+            except OSError as e:
+                errors.append(str(e))
+                continue
+            if status != 200:
+                errors.append(f"HTTP {status}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def run_profile(profile, args, log_dir):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PROFILE=profile)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BASE_DIR, 'gunicorn_config.py'),
+         '--bind', f'127.0.0.1:{port}', '--pid', os.path.join(log_dir, f'{profile}.pid'),
+         '--access-logfile', os.devnull, '--error-logfile', os.path.join(log_dir, f'{profile}.log')],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_ready(port, args.url, process):
+            return None
+        # Échauffement: chaque worker charge ses modules et ouvre ses connexions
+        load(port, args.url, args.clients, 2, args.uncached)
+        latencies, errors, elapsed = load(port, args.url, args.clients, args.duration, args.uncached)
+        return {
+            'workers': len(process_tree(process.pid)) - 1,
+            'memory': memory_mb(process.pid),
+            'latencies': latencies,
+            'errors': errors,
+            'elapsed': elapsed,
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=['sync', 'gthread', 'asgi'])
+    parser.add_argument('--clients', type=int, default=32, help="Clients simultanés")
+    parser.add_argument('--duration', type=int, default=20, help="Durée de chaque mesure (secondes)")
+    parser.add_argument('--url', default='/api/products/')
+    parser.add_argument('--uncached', action='store_true', help="Contourner le cache de l'API catalogue")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix='benchmark_workers_')
+    print("=" * 100)
+    print(f"PROFILS GUNICORN - GET {args.url}{' (hors cache)' if args.uncached else ''}, "
+          f"{args.clients} clients, {args.duration} s, {os.cpu_count()} CPU")
+    print("=" * 100)
+    print(f"{'Profil':<10} {'process':>8} {'threads':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'erreurs':>8} {'PSS Mo':>8}")
+    print("-" * 100)
+    for profile in args.profiles:
+        if profile == 'asgi' and importlib.util.find_spec('uvicorn') is None:
+            print(f"{profile:<10} ignoré: uvicorn n'est pas installé (pip install uvicorn)")
+            continue
+        result = run_profile(profile, args, log_dir)
+        if result is None:
+            print(f"{profile:<10} gunicorn n'a pas démarré, voir {os.path.join(log_dir, profile + '.log')}")
+            continue
+        latencies = result['latencies'] or [0]
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        threads = os.getenv('GUNICORN_THREADS', PROFILES[profile]['threads'])
+        print(f"{profile:<10} {result['workers']:>8} {threads:>8} {len(result['latencies']) / result['elapsed']:>8.0f} "
+              f"{percentiles[49]:>8.1f} {percentiles[94]:>8.1f} {percentiles[98]:>8.1f} "
+              f"{len(result['errors']):>8} {result['memory']:>8.0f}")
+    print("-" * 100)
+    print(f"Logs gunicorn: {log_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
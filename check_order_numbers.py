@@ -0,0 +1,143 @@
+"""
+Test multi-process des numéros de commande (orders.numbers)
+
+Crée une base de test (comme "manage.py test", la base configurée n'est pas modifiée),
+puis lance plusieurs process qui créent chacun des milliers de commandes en même temps:
+en autocommit, dans une transaction, et dans des transactions annulées (le bloc réservé
+ne doit pas être redistribué). Vérifie ensuite qu'aucun numéro n'a été attribué deux
+fois (y compris ceux des commandes annulées), que les numéros de chaque process sont
+croissants et qu'aucune commande n'a échoué.
+
+Les agrégats de ventes (signal de Order) sont désactivés pendant le test: seule
+l'attribution des numéros et l'insertion des commandes sont mesurées.
+
+Usage: python check_order_numbers.py [--processes 8] [--orders 2000]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models.signals import post_save
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from orders.models import Customer, Order, OrderNumberCounter
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_orders(count, customer_id, barrier, results):
+    """Process de test: crée count commandes -> (pid, numéros dans l'ordre d'attribution, commités, erreurs, durée)"""
+    connections.close_all()
+    assigned, committed, errors = [], 0, 0
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(count):
+        order = Order(customer_id=customer_id, subtotal=Decimal('100'), total=Decimal('100'))
+        try:
+            if i % 10 == 9:
+                # Transaction annulée: le numéro est perdu, jamais réattribué
+                try:
+                    with transaction.atomic():
+                        order.save()
+                        raise Rollback
+                except Rollback:
+                    pass
+            elif i % 3 == 0:
+                with transaction.atomic():
+                    order.save()
+                committed += 1
+            else:
+                order.save()
+                committed += 1
+        except IntegrityError:
+            errors += 1
+        assigned.append(int(order.order_number.rsplit('-', 1)[1]))
+    elapsed = time.perf_counter() - start
+    connections.close_all()
+    results.put((os.getpid(), assigned, committed, errors, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=2000, help="Commandes par process")
+    args = parser.parse_args()
+
+    if connection.vendor == 'sqlite':
+        # Base de test en mémoire invisible des autres process: fichier temporaire
+        test_file = os.path.join(tempfile.mkdtemp(), 'check_order_numbers.sqlite3')
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = test_file
+        settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 60
+
+    post_save.disconnect(sender=Order, dispatch_uid='sales_stats_order_saved')
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        customer = Customer.objects.create(first_name='Test', last_name='Numéros', phone='0600000000',
+                                           address='-', city='-')
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(args.processes)
+        results = context.Queue()
+        processes = [
+            context.Process(target=create_orders, args=(args.orders, customer.pk, barrier, results))
+            for _ in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        all_numbers, errors, failures = [], 0, []
+        for pid, assigned, _, process_errors, _ in outcomes:
+            all_numbers += assigned
+            errors += process_errors
+            if any(a >= b for a, b in zip(assigned, assigned[1:])):
+                failures.append(f"process {pid}: numéros non croissants")
+        duplicates = len(all_numbers) - len(set(all_numbers))
+        created = sum(committed for _, _, committed, _, _ in outcomes)
+
+        print("=" * 72)
+        print(f"NUMÉROS DE COMMANDE: {args.processes} process x {args.orders} commandes ({connection.vendor}, "
+              f"blocs de {settings.ORDER_NUMBER_BLOCK_SIZE})")
+        print("=" * 72)
+        for pid, assigned, committed, process_errors, process_elapsed in sorted(outcomes):
+            print(f"process {pid:>7}: {committed:>6} commandes, {len(assigned) - committed:>5} annulées, "
+                  f"{process_errors} erreur(s), {len(assigned) / process_elapsed:>8.0f} commandes/s")
+        print("-" * 72)
+        print(f"Commandes en base: {Order.objects.count()} (attendu {created}), "
+              f"{created / elapsed:.0f} commandes/s au total")
+        print(f"Compteur: {OrderNumberCounter.objects.get(name='order').value}, "
+              f"numéros attribués: {len(all_numbers)}, doublons: {duplicates}")
+        print("-" * 72)
+        if duplicates or errors or failures or Order.objects.count() != created:
+            for failure in failures:
+                print(f"ÉCHEC {failure}")
+            print(f"ÉCHEC: {duplicates} doublon(s), {errors} erreur(s) d'unicité")
+            return 1
+        print("OK: numéros uniques et croissants dans chaque process, aucune collision")
+        return 0
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
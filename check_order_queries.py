@@ -0,0 +1,112 @@
+"""
+Script pour vérifier que la création d'une commande (POST /api/orders/create/) a un
+nombre de requêtes fixe
+
+Crée une base de test (comme "manage.py test", la base configurée n'est pas modifiée),
+des produits avec marque et image principale, puis passe des commandes de 1, 5 et 15
+lignes: le nombre de requêtes doit être identique, la réponse complète (ids des articles,
+détails des produits) et le stock réservé.
+
+Usage: python check_order_queries.py
+"""
+import json
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+
+from orders.models import Order
+from shop.models import Brand, Category, Product, ProductImage, SubCategory
+
+CART_SIZES = [1, 5, 15]
+
+
+def create_products(count):
+    category = Category.objects.create(name='Commandes', slug='commandes')
+    subcategory = SubCategory.objects.create(category=category, name='Commandes', slug='commandes')
+    brand = Brand.objects.create(name='Marque', slug='marque')
+    Product.objects.bulk_create([
+        Product(reference=f'ORDER-{i:03d}', name=f'Produit {i}', slug=f'order-{i}', description='-',
+                category=category, subcategory=subcategory, brand=brand, price=100, quantity=1000)
+        for i in range(count)
+    ])
+    products = list(Product.objects.order_by('pk'))
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=f'products/order-{product.pk}.jpg', is_main=True) for product in products
+    ])
+    Product.refresh_main_images([product.pk for product in products])
+    return products
+
+
+def order_payload(products, lines):
+    return json.dumps({
+        'first_name': 'Test', 'last_name': 'Commande', 'phone': '0600000000', 'address': '-', 'city': '-',
+        'items': [{'product_id': product.pk, 'quantity': 2} for product in products[:lines]],
+    })
+
+
+def main():
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        products = create_products(max(CART_SIZES))
+        client = Client()
+
+        # Première commande non mesurée: elle réserve le bloc de numéros de commande du process
+        # (4 requêtes, une fois toutes les ORDER_NUMBER_BLOCK_SIZE commandes)
+        client.post('/api/orders/create/', order_payload(products, 1), content_type='application/json')
+
+        counts = {}
+        failed = False
+        for lines in CART_SIZES:
+            with CaptureQueriesContext(connection) as context:
+                response = client.post('/api/orders/create/', order_payload(products, lines),
+                                       content_type='application/json')
+            assert response.status_code == 201, f"{lines} ligne(s): HTTP {response.status_code} {response.content[:200]}"
+            counts[lines] = len(context.captured_queries)
+
+            data = response.json()
+            order = Order.objects.get(pk=data['id'])
+            items_ok = (
+                len(data['items']) == lines
+                and all(item['id'] and item['product_details']['category_name'] for item in data['items'])
+                and order.stock_deducted
+            )
+            if not items_ok:
+                failed = True
+                print(f"ÉCHEC: réponse ou réservation incorrecte pour {lines} ligne(s)")
+
+        stock = Product.objects.get(pk=products[0].pk).quantity
+        if stock != 1000 - 2 * (len(CART_SIZES) + 1):
+            failed = True
+            print(f"ÉCHEC: stock du premier produit {stock}, attendu {1000 - 2 * (len(CART_SIZES) + 1)}")
+
+        print("=" * 60)
+        print("REQUÊTES DE POST /api/orders/create/")
+        print("=" * 60)
+        for lines, count in counts.items():
+            print(f"{lines:>3} ligne(s): {count:>4} requêtes")
+        print("-" * 60)
+        if len(set(counts.values())) > 1:
+            failed = True
+            print("ÉCHEC: nombre de requêtes variable")
+        elif not failed:
+            print("OK: nombre de requêtes fixe")
+        return 1 if failed else 0
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
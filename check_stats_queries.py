@@ -0,0 +1,133 @@
+"""
+Script pour vérifier que les statistiques de ventes ont un nombre de requêtes fixe
+
+Crée une base de test (comme "manage.py test", la base configurée n'est pas modifiée),
+mesure les requêtes de sales_summary, order_summary, get_dashboard_stats, du tableau de
+bord et de l'API JSON des statistiques avec un petit historique, puis avec un historique
+dix fois plus long: le nombre de requêtes doit être identique et les agrégats quotidiens
+égaux aux totaux calculés sur la table des commandes.
+
+Usage: python check_stats_queries.py
+"""
+import os
+import random
+import sys
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from orders.models import Customer, Delivery, Order, OrderItem
+from orders.stats import order_summary, rebuild, sales_summary
+from shop.dashboard import get_dashboard_stats
+from shop.models import Category, Product, SubCategory
+
+STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def create_orders(count, days, products):
+    """Crée count commandes réparties sur les days derniers jours (sans signaux, puis rebuild)"""
+    customer = Customer.objects.create(first_name='Test', last_name='Stats', phone='0600000000', address='-', city='-')
+    start = Order.objects.count()
+    orders = Order.objects.bulk_create([
+        Order(
+            order_number=f"CHECK-{start + i:08d}", customer=customer, status=random.choice(STATUSES),
+            subtotal=Decimal(100 + i % 900), total=Decimal(100 + i % 900),
+        )
+        for i in range(count)
+    ])
+    orders = list(Order.objects.filter(order_number__in=[order.order_number for order in orders]))
+    now = timezone.now()
+    for order in orders:
+        order.created_at = now - timedelta(days=random.randrange(days), minutes=random.randrange(1440))
+    Order.objects.bulk_update(orders, ['created_at'], batch_size=500)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, product_name=product.name, product_reference=product.reference,
+                  unit_price=order.total, quantity=1, total_price=order.total)
+        for order in orders for product in random.sample(products, 2)
+    ], batch_size=1000)
+    Delivery.objects.bulk_create([
+        Delivery(order=order, status=random.choice(['pending', 'delivered'])) for order in orders[::2]
+    ])
+    rebuild()
+
+
+def measure(client):
+    """Nombre de requêtes de chaque lecture des statistiques"""
+    today = timezone.localdate()
+    readers = {
+        'sales_summary (tout)': lambda: sales_summary(),
+        'sales_summary (30 jours)': lambda: sales_summary(today - timedelta(days=30), today),
+        'order_summary': lambda: order_summary(Order.objects.all()),
+        'get_dashboard_stats': get_dashboard_stats,
+        'dashboard': lambda: client.get('/admin-panel/dashboard/'),
+        'dashboard (mois)': lambda: client.get('/admin-panel/dashboard/?period=month'),
+        'API statistiques': lambda: client.get('/admin-panel/dashboard/stats/?period=all'),
+    }
+    counts = {}
+    for name, reader in readers.items():
+        with CaptureQueriesContext(connection) as context:
+            result = reader()
+        if hasattr(result, 'status_code'):
+            assert result.status_code == 200, f"{name}: HTTP {result.status_code}"
+        counts[name] = len(context.captured_queries)
+    return counts
+
+
+def main():
+    random.seed(0)
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        category = Category.objects.create(name='Stats', slug='stats')
+        subcategory = SubCategory.objects.create(category=category, name='Stats', slug='stats')
+        products = [
+            Product(reference=f'STATS-{i:03d}', name=f'Produit {i}', slug=f'stats-{i}', description='-',
+                    category=category, subcategory=subcategory, price=100)
+            for i in range(20)
+        ]
+        Product.objects.bulk_create(products)
+        products = list(Product.objects.all())
+        User.objects.create_user('stats', password='stats', is_staff=True)
+        client = Client()
+        client.login(username='stats', password='stats')
+
+        runs = []
+        for count, days in ((100, 30), (1000, 365)):
+            create_orders(count, days, products)
+            runs.append((Order.objects.count(), measure(client)))
+            assert sales_summary() == dict(order_summary(Order.objects.all()), total_items=sales_summary()['total_items']), \
+                "Agrégats quotidiens différents des totaux des commandes"
+
+        print("=" * 72)
+        print("REQUÊTES DES STATISTIQUES DE VENTES")
+        print("=" * 72)
+        print(f"{'Lecture':<28} | " + " | ".join(f"{orders:>6} cmd." for orders, _ in runs))
+        print("-" * 72)
+        failed = False
+        for name in runs[0][1]:
+            values = [counts[name] for _, counts in runs]
+            failed |= len(set(values)) > 1
+            print(f"{name:<28} | " + " | ".join(f"{value:>11}" for value in values) + ("  <-- variable" if len(set(values)) > 1 else ""))
+        print("-" * 72)
+        print("ÉCHEC: nombre de requêtes variable" if failed else "OK: nombre de requêtes fixe, agrégats cohérents")
+        return 1 if failed else 0
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,6 @@
 """
 ASGI config for gaming project.
+Servie par gunicorn avec GUNICORN_PROFILE=asgi (workers uvicorn, voir gunicorn_config.py).
 """
 
 import os
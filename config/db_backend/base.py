@@ -1,12 +1,46 @@
 """
-Custom MySQL backend pour contourner la vérification de version MariaDB
+Custom MySQL backend pour contourner la vérification de version MariaDB,
+avec pool de connexions par process si DATABASES[...]['POOL'] est défini (voir pool.py)
 """
+from functools import partial
+
 from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
 
+from .pool import get_pool, publish_stats
+
 
 class DatabaseWrapper(MySQLDatabaseWrapper):
     """Wrapper qui désactive la vérification de version pour MariaDB 10.4"""
-    
+
+    pool_opened_at = None
+
     def check_database_version_supported(self):
         """Désactiver la vérification de version pour MariaDB 10.4"""
         pass
+
+    def get_pool(self):
+        """Pool du process pour ces paramètres de connexion (None sans DATABASES[...]['POOL'])"""
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        settings_dict = self.settings_dict
+        key = (self.alias, settings_dict['HOST'], settings_dict['PORT'], settings_dict['USER'], settings_dict['NAME'])
+        return get_pool(key, options)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection, self.pool_opened_at = pool.acquire(partial(super().get_new_connection, conn_params))
+        return connection
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Après une erreur ou dans une transaction, l'état de la session est incertain
+        if self.in_atomic_block or self.errors_occurred or not self.autocommit or self.pool_opened_at is None:
+            pool.discard(self.connection)
+        else:
+            pool.release(self.connection, self.pool_opened_at)
+        publish_stats()
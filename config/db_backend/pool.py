@@ -0,0 +1,197 @@
+"""
+Pool de connexions MySQL par process, partagé par ses threads
+
+Django ouvre une connexion par thread et, avec CONN_MAX_AGE = 0, la ferme à la fin de
+chaque requête: chaque requête paie la connexion TCP (TLS) et l'authentification. Avec
+DATABASES[...]['POOL'], la fermeture rend la connexion PyMySQL au pool du process et la
+prochaine ouverture, dans n'importe quel thread du worker, la reprend:
+- MAX_SIZE: connexions inactives conservées (les suivantes sont fermées); les connexions
+  ouvertes restent bornées par le nombre de threads qui exécutent des requêtes
+- MAX_AGE: durée de vie maximale (secondes), à garder sous le wait_timeout du serveur
+- HEALTH_CHECK_INTERVAL: une connexion inactive depuis au moins N secondes est vérifiée
+  (ping) avant d'être reprise, 0 = à chaque reprise
+
+Une connexion est fermée au lieu d'être rendue après une erreur ou dans une transaction.
+Un process issu d'un fork (preload de gunicorn) abandonne le pool de son parent. Les
+compteurs sont tenus par process et ajoutés périodiquement aux totaux du cache partagé
+DB_POOL_STATS_CACHE (python manage.py db_pool).
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+
+STATS_PREFIX = 'db_pool:'
+# ouvertes, reprises du pool, rendues au pool, fermées: trop vieilles, ping en échec,
+# pool plein, état incertain (erreur, transaction)
+COUNTERS = ['opened', 'reused', 'returned', 'expired', 'failed_checks', 'overflow', 'discarded']
+STATS_INTERVAL = 60
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+_published = {'counters': Counter(), 'at': time.monotonic()}
+_publish_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Connexions PyMySQL inactives (la plus récemment rendue est reprise en premier)"""
+
+    def __init__(self, max_size=10, max_age=300, health_check_interval=0):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+        self.stats = Counter()
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def acquire(self, connect):
+        """Connexion inactive encore valide, sinon connect() -> (connexion, date d'ouverture)"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, opened_at, released_at = self._idle.pop()
+            now = time.monotonic()
+            if now - opened_at >= self.max_age:
+                self.discard(connection, 'expired')
+            elif now - released_at >= self.health_check_interval and not ping(connection):
+                self.discard(connection, 'failed_checks')
+            else:
+                self._count('reused')
+                return connection, opened_at
+        connection = connect()
+        self._count('opened')
+        return connection, time.monotonic()
+
+    def release(self, connection, opened_at):
+        """Rend une connexion en autocommit, sans transaction en cours"""
+        now = time.monotonic()
+        if now - opened_at >= self.max_age:
+            self.discard(connection, 'expired')
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, opened_at, now))
+                self.stats['returned'] += 1
+                return
+        self.discard(connection, 'overflow')
+
+    def discard(self, connection, reason='discarded'):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._count(reason)
+
+    def close(self):
+        """Ferme les connexions inactives"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+
+def ping(connection):
+    try:
+        connection.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+def get_pool(key, options):
+    """Pool du process pour une base (options: DATABASES[...]['POOL'])"""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Fork: les connexions du parent ne sont ni reprises ni fermées (il peut les utiliser)
+            _pools.clear()
+            _published['counters'] = Counter()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                max_age=options.get('MAX_AGE', 300),
+                health_check_interval=options.get('HEALTH_CHECK_INTERVAL', 0),
+            )
+        return pool
+
+
+def close_pools():
+    """Ferme les connexions inactives de tous les pools du process (ex: master gunicorn avant le fork)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+def get_stats():
+    """Compteurs du process courant (tous pools) et connexions inactives"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    stats = Counter({name: 0 for name in COUNTERS})
+    for pool in pools:
+        stats.update(pool.stats)
+    stats['idle'] = sum(pool.idle for pool in pools)
+    return dict(stats)
+
+
+def _stats_cache():
+    from django.conf import settings
+    from django.core.cache import caches
+
+    alias = getattr(settings, 'DB_POOL_STATS_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def publish_stats(force=False):
+    """Ajoute aux totaux partagés les compteurs du process depuis la dernière publication"""
+    now = time.monotonic()
+    if not force and now - _published['at'] < STATS_INTERVAL:
+        return
+    # Un seul thread publie (les autres ne l'attendent pas)
+    if not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        _published['at'] = now
+        stats = get_stats()
+        deltas = {name: stats[name] - _published['counters'][name] for name in COUNTERS}
+        _published['counters'].update(deltas)
+    finally:
+        _publish_lock.release()
+    try:
+        cache = _stats_cache()
+        if cache is None:
+            return
+        for name, delta in deltas.items():
+            if delta and not cache.add(STATS_PREFIX + name, delta, timeout=None):
+                cache.incr(STATS_PREFIX + name, delta)
+    except Exception:
+        # Statistiques uniquement: jamais d'erreur pour la requête en cours
+        pass
+
+
+def get_shared_stats():
+    """Totaux de tous les workers (publiés au plus toutes les STATS_INTERVAL secondes)"""
+    cache = _stats_cache()
+    values = cache.get_many([STATS_PREFIX + name for name in COUNTERS]) if cache else {}
+    return {name: values.get(STATS_PREFIX + name, 0) for name in COUNTERS}
+
+
+def reset_shared_stats():
+    cache = _stats_cache()
+    if cache:
+        cache.delete_many([STATS_PREFIX + name for name in COUNTERS])
@@ -105,6 +105,13 @@ DATABASES = {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
         },
+        # Connexions rendues à un pool par process à la fin des requêtes au lieu d'être
+        # fermées (voir config/db_backend/pool.py); DB_POOL=0 pour le désactiver
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'MAX_AGE': int(os.getenv('DB_POOL_MAX_AGE', '300')),
+            'HEALTH_CHECK_INTERVAL': int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '0')),
+        } if os.getenv('DB_POOL', '1') == '1' else None,
     }
 }
 
@@ -229,6 +236,76 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Cache
+# L'alias 'catalog' met en cache les réponses de l'API catalogue (voir shop.catalog_cache).
+# Par défaut: fichiers locaux partagés entre les workers gunicorn. Alternatives via l'env:
+# django.core.cache.backends.locmem.LocMemCache (1 worker) ou
+# django.core.cache.backends.redis.RedisCache avec CATALOG_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': os.getenv('CATALOG_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CATALOG_CACHE_LOCATION', str(BASE_DIR / 'var' / 'cache' / 'catalog')),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '5000')),
+        },
+    },
+}
+CATALOG_CACHE_ALIAS = 'catalog'
+# Compteurs du pool de connexions de tous les workers (cache partagé, pas un cache en base)
+DB_POOL_STATS_CACHE = 'catalog'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '3600'))
+
+# Compteur de vues produits: tampon SQLite local vidé vers MySQL toutes les N secondes
+# (0 = vidage uniquement via "python manage.py flush_view_counts", ex: cron)
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNTER_FLUSH_INTERVAL', '60'))
+VIEW_COUNTER_PATH = os.getenv('VIEW_COUNTER_PATH', str(BASE_DIR / 'var' / 'view_counts.sqlite3'))
+
+# Recherche produits (voir shop.search): 'mysql' (index FULLTEXT), 'python' (index en mémoire)
+# ou 'auto' (mysql si la base est MySQL).
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'auto')
+# Seuls les N produits les plus pertinents sont retenus: /api/products/?search=... ne liste
+# (count et pagination compris) jamais plus de N résultats
+PRODUCT_SEARCH_MAX_RESULTS = int(os.getenv('PRODUCT_SEARCH_MAX_RESULTS', '500'))
+# innodb_ft_min_token_size du serveur: les termes plus courts sont cherchés par LIKE
+PRODUCT_SEARCH_FULLTEXT_MIN_TOKEN_SIZE = int(os.getenv('PRODUCT_SEARCH_FULLTEXT_MIN_TOKEN_SIZE', '3'))
+
+# Autocomplétion /api/products/suggest/ (voir shop.suggest)
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
+# Bornes (DH) des tranches de prix de /api/products/facets/
+PRODUCT_PRICE_BUCKETS = [0, 500, 1000, 2000, 5000, 10000, 20000]
+
+# Imports Excel en arrière-plan (voir admin_panel.jobs, worker: python manage.py run_import_jobs)
+IMPORT_JOBS_DIR = os.getenv('IMPORT_JOBS_DIR', str(BASE_DIR / 'var' / 'imports'))
+IMPORT_JOB_POLL_INTERVAL = 2
+IMPORT_JOB_TIMEOUT = int(os.getenv('IMPORT_JOB_TIMEOUT', '21600'))
+# La progression doit être lisible par les workers gunicorn: cache partagé (fichiers)
+IMPORT_JOB_CACHE_ALIAS = CATALOG_CACHE_ALIAS
+# Lignes par page du diff d'aperçu avant confirmation d'un import
+IMPORT_PREVIEW_PAGE_SIZE = 50
+# Import d'images: threads de lecture / vérification / écriture des fichiers
+IMAGE_IMPORT_WORKERS = int(os.getenv('IMAGE_IMPORT_WORKERS', '8'))
+# Un dossier d'images est envoyé en une requête (fichiers + chemins relatifs)
+DATA_UPLOAD_MAX_NUMBER_FILES = 5000
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 11000
+
+# Images dérivées (WebP) des images du catalogue (voir shop.images)
+IMAGE_VARIANT_WIDTHS = [160, 320, 600, 1200]
+IMAGE_VARIANT_QUALITY = 80
+# Process du pool de "python manage.py build_image_variants" et des imports d'images
+IMAGE_VARIANT_PROCESSES = int(os.getenv('IMAGE_VARIANT_PROCESSES', str(os.cpu_count() or 2)))
+
+# Réservation du stock des commandes en attente (voir orders.stock), restituée après N heures
+# par "python manage.py release_expired_reservations" (cron)
+ORDER_RESERVATION_HOURS = int(os.getenv('ORDER_RESERVATION_HOURS', '48'))
+# Numéros de commande réservés par bloc dans chaque worker (voir orders.numbers)
+ORDER_NUMBER_BLOCK_SIZE = int(os.getenv('ORDER_NUMBER_BLOCK_SIZE', '50'))
+
 # Login URLs
 LOGIN_URL = '/admin-panel/login/'
 LOGIN_REDIRECT_URL = '/admin-panel/dashboard/'
@@ -2,17 +2,39 @@
 Configuration Gunicorn pour gaming Backend
 """
 import multiprocessing
+import os
 
 # Bind
 bind = "127.0.0.1:8000"
 
-# Workers
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# Workers: profil choisi par GUNICORN_PROFILE (benchmark_workers.py pour comparer)
+# - sync: un process par requête en cours, une requête lente (export, import) bloque un process
+# - gthread: moins de process, GUNICORN_THREADS requêtes simultanées par process (mémoire
+#   partagée entre les threads, connexions MySQL du pool de config/db_backend/pool.py)
+# - asgi: workers uvicorn sur config.asgi (pip install uvicorn), vues exécutées dans des threads
+# Garder DB_POOL_MAX_SIZE >= GUNICORN_THREADS pour que chaque thread reprenne une connexion.
+PROFILES = {
+    'sync': {'worker_class': 'sync', 'workers': multiprocessing.cpu_count() * 2 + 1, 'threads': 1,
+             'app': 'config.wsgi:application'},
+    'gthread': {'worker_class': 'gthread', 'workers': multiprocessing.cpu_count() + 1, 'threads': 8,
+                'app': 'config.wsgi:application'},
+    'asgi': {'worker_class': 'uvicorn.workers.UvicornWorker', 'workers': multiprocessing.cpu_count() + 1,
+             'threads': 1, 'app': 'config.asgi:application'},
+}
+profile = PROFILES[os.getenv('GUNICORN_PROFILE', 'sync')]
+
+wsgi_app = profile['app']
+worker_class = profile['worker_class']
+workers = int(os.getenv('GUNICORN_WORKERS', profile['workers']))
+threads = int(os.getenv('GUNICORN_THREADS', profile['threads']))
 worker_connections = 1000
 timeout = 120
 keepalive = 5
 
+# Charger l'application dans le master avant le fork: les index en mémoire
+# (autocomplétion, voir shop.suggest) sont construits une fois et partagés par les workers
+preload_app = True
+
 # Logging
 accesslog = "/home/gobackma/logs/gunicorn_access.log"
 errorlog = "/home/gobackma/logs/gunicorn_error.log"
@@ -43,6 +65,11 @@ def on_reload(server):
 
 def when_ready(server):
     print("Gunicorn is ready. Spawning workers")
+    from shop.suggest import warm_up
+    warm_up()
+    # Connexions ouvertes par le master (warm_up): fermées avant le fork des workers
+    from config.db_backend.pool import close_pools
+    close_pools()
 
 def on_exit(server):
     print("Gunicorn is shutting down...")
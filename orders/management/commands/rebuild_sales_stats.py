@@ -0,0 +1,54 @@
+"""
+Recalcule les agrégats de ventes quotidiens (DailySalesStat, DailyProductSales)
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import DailySalesStat, Order
+from orders.stats import order_summary, rebuild, sales_summary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Date invalide: {value} (format AAAA-MM-JJ)")
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques de ventes du tableau de bord à partir des commandes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="Premier jour (AAAA-MM-JJ, par défaut: première commande)")
+        parser.add_argument('--to', dest='date_to', help="Dernier jour (AAAA-MM-JJ, par défaut: dernière commande)")
+        parser.add_argument('--check', action='store_true',
+                            help="Comparer les agrégats aux commandes sans rien recalculer")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_totals()
+            return
+
+        date_from = parse_date(options['date_from']) if options['date_from'] else None
+        date_to = parse_date(options['date_to']) if options['date_to'] else None
+
+        def progress(done, total, day):
+            if done % 30 == 0 or done == total:
+                self.stdout.write(f"  {done}/{total} jours ({day})")
+
+        days = rebuild(date_from, date_to, progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"{days} jours recalculés ({DailySalesStat.objects.count()} lignes d'agrégats)"
+        ))
+
+    def check_totals(self):
+        """Totaux des agrégats quotidiens == totaux calculés sur la table des commandes"""
+        expected = order_summary(Order.objects.all())
+        actual = sales_summary()
+        differences = {key: (actual[key], value) for key, value in expected.items() if actual[key] != value}
+        for key, (stored, computed) in differences.items():
+            self.stdout.write(self.style.WARNING(f"  {key}: {stored} (agrégats) / {computed} (commandes)"))
+        if differences:
+            raise CommandError("Agrégats désynchronisés: lancez python manage.py rebuild_sales_stats")
+        self.stdout.write(self.style.SUCCESS(f"Agrégats à jour ({expected['total_orders']} commandes)"))
@@ -0,0 +1,18 @@
+"""
+Restitue le stock des commandes en attente dont la réservation a expiré (cron)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.stock import release_expired
+
+
+class Command(BaseCommand):
+    help = "Restitue le stock réservé par les commandes en attente depuis plus de ORDER_RESERVATION_HOURS heures"
+
+    def handle(self, *args, **options):
+        released = release_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f"{released} réservation(s) expirée(s) restituée(s) "
+            f"(délai: {settings.ORDER_RESERVATION_HOURS} h)"
+        ))
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_image_variants'),
+        ('orders', '0002_order_stock_deducted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Quantité')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Montant')),
+            ],
+            options={
+                'verbose_name': "Ventes quotidiennes d'un produit",
+                'verbose_name_plural': 'Ventes quotidiennes des produits',
+                'ordering': ['-date', '-quantity'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('confirmed', 'Confirmée'), ('preparing', 'En préparation'), ('ready', 'Prête à livrer'), ('shipped', 'Expédiée'), ('delivered', 'Livrée'), ('cancelled', 'Annulée')], max_length=20, verbose_name='Statut')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Commandes')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Montant total')),
+                ('item_count', models.IntegerField(default=0, verbose_name='Articles')),
+                ('delivered_count', models.IntegerField(default=0, help_text='Commandes dont la livraison a le statut livré', verbose_name='Commandes livrées')),
+            ],
+            options={
+                'verbose_name': 'Statistique de ventes quotidienne',
+                'verbose_name_plural': 'Statistiques de ventes quotidiennes',
+                'ordering': ['-date', 'status'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesstat',
+            constraint=models.UniqueConstraint(fields=('date', 'status'), name='orders_daily_sales_date_status'),
+        ),
+        migrations.AddField(
+            model_name='dailyproductsales',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='shop.product', verbose_name='Produit'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyproductsales',
+            constraint=models.UniqueConstraint(fields=('date', 'product'), name='orders_daily_product_sales_date_product'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_daily_sales_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name="Stock réservé jusqu'au"),
+        ),
+    ]
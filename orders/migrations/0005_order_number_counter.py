@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    OrderNumberCounter = apps.get_model('orders', 'OrderNumberCounter')
+    OrderNumberCounter.objects.get_or_create(name='order')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_reserved_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Compteur')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Dernier numéro réservé')),
+            ],
+            options={
+                'verbose_name': 'Compteur de numéros de commande',
+                'verbose_name_plural': 'Compteurs de numéros de commande',
+            },
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -68,12 +68,13 @@ class Order(models.Model):
     admin_notes = models.TextField(blank=True, verbose_name="Notes admin")
     
     # Dates
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     confirmed_at = models.DateTimeField(null=True, blank=True, verbose_name="Date de confirmation")
     
     # Gestion du stock
     stock_deducted = models.BooleanField(default=False, verbose_name="Stock déduit")
+    reserved_until = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Stock réservé jusqu'au")
 
     class Meta:
         verbose_name = "Commande"
@@ -85,10 +86,9 @@ class Order(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Générer un numéro de commande unique
-            import datetime
-            timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-            self.order_number = f"CMD-{timestamp}"
+            # Générer un numéro de commande unique (compteur réservé par blocs)
+            from .numbers import next_order_number
+            self.order_number = next_order_number()
         super().save(*args, **kwargs)
 
 
@@ -176,3 +176,64 @@ class DeliveryHistory(models.Model):
 
     def __str__(self):
         return f"{self.delivery} - {self.status} - {self.created_at}"
+
+
+class DailySalesStat(models.Model):
+    """
+    Agrégats quotidiens des commandes par statut (tableau de bord, voir orders.stats)
+    Jour = date locale de création de la commande.
+    """
+    date = models.DateField(verbose_name="Jour")
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Statut")
+    order_count = models.IntegerField(default=0, verbose_name="Commandes")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Montant total")
+    item_count = models.IntegerField(default=0, verbose_name="Articles")
+    delivered_count = models.IntegerField(default=0, verbose_name="Commandes livrées",
+                                          help_text="Commandes dont la livraison a le statut livré")
+
+    class Meta:
+        verbose_name = "Statistique de ventes quotidienne"
+        verbose_name_plural = "Statistiques de ventes quotidiennes"
+        ordering = ['-date', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status'], name='orders_daily_sales_date_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.status}: {self.order_count}"
+
+
+class DailyProductSales(models.Model):
+    """
+    Quantités vendues par produit et par jour (tous statuts, comme le tableau de bord)
+    """
+    date = models.DateField(verbose_name="Jour")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales', verbose_name="Produit")
+    quantity = models.IntegerField(default=0, verbose_name="Quantité")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Montant")
+
+    class Meta:
+        verbose_name = "Ventes quotidiennes d'un produit"
+        verbose_name_plural = "Ventes quotidiennes des produits"
+        ordering = ['-date', '-quantity']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='orders_daily_product_sales_date_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.product_id}: {self.quantity}"
+
+
+class OrderNumberCounter(models.Model):
+    """
+    Dernier numéro de commande réservé (les workers réservent des blocs, voir orders.numbers)
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Compteur")
+    value = models.BigIntegerField(default=0, verbose_name="Dernier numéro réservé")
+
+    class Meta:
+        verbose_name = "Compteur de numéros de commande"
+        verbose_name_plural = "Compteurs de numéros de commande"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
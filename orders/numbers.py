@@ -0,0 +1,88 @@
+"""
+Numéros de commande: CMD-AAAAMMJJ-NNNNNNN
+
+NNNNNNN vient d'un compteur global (table OrderNumberCounter) réservé par blocs de
+ORDER_NUMBER_BLOCK_SIZE numéros: chaque process (worker gunicorn) réserve un bloc par une
+transaction courte (UPDATE value = value + taille, puis lecture de la nouvelle valeur,
+la ligne reste verrouillée jusqu'au commit) et distribue ensuite les numéros en mémoire,
+sans requête par commande. Les numéros d'un process sont croissants, les blocs successifs
+aussi; deux workers ne reçoivent jamais le même bloc.
+
+Un bloc réservé doit être commité avant d'être distribué: dans une transaction en cours
+(dont l'annulation libérerait le bloc), il est réservé sur une connexion dédiée en
+autocommit. Les numéros non distribués d'un bloc sont perdus à l'arrêt du process ou
+quand une commande échoue (trous dans la numérotation, sans conséquence).
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+COUNTER_NAME = 'order'
+
+_lock = threading.Lock()
+_state = {'pid': None, 'next': 0, 'end': 0, 'connection': None}
+
+
+def reserve_block(db, size):
+    """Réserve size numéros sur la connexion db (dans une transaction) -> premier numéro"""
+    from .models import OrderNumberCounter
+
+    table = db.ops.quote_name(OrderNumberCounter._meta.db_table)
+    with db.cursor() as cursor:
+        cursor.execute(f"UPDATE {table} SET value = value + %s WHERE name = %s", [size, COUNTER_NAME])
+        if cursor.rowcount != 1:
+            raise RuntimeError(f"Compteur de numéros de commande '{COUNTER_NAME}' absent (python manage.py migrate)")
+        cursor.execute(f"SELECT value FROM {table} WHERE name = %s", [COUNTER_NAME])
+        return cursor.fetchone()[0] - size + 1
+
+
+def _dedicated_connection():
+    """Connexion propre au process (partagée entre ses threads sous _lock)"""
+    if _state['connection'] is None:
+        db = connections.create_connection(DEFAULT_DB_ALIAS)
+        db.inc_thread_sharing()
+        _state['connection'] = db
+    return _state['connection']
+
+
+def _reserve_committed_block(size):
+    if not connection.in_atomic_block:
+        with transaction.atomic():
+            return reserve_block(connection, size)
+
+    db = _dedicated_connection()
+    try:
+        db.close_if_unusable_or_obsolete()
+        db.set_autocommit(False)
+        try:
+            start = reserve_block(db, size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.set_autocommit(True)
+    except Exception:
+        db.close()
+        _state['connection'] = None
+        raise
+    return start
+
+
+def next_order_number():
+    """Prochain numéro de commande (une requête par bloc de ORDER_NUMBER_BLOCK_SIZE commandes)"""
+    with _lock:
+        if _state['pid'] != os.getpid():
+            # Process issu d'un fork (ex: preload de gunicorn): le bloc et la connexion du parent
+            # ne sont pas réutilisés
+            _state.update(pid=os.getpid(), next=0, end=0, connection=None)
+        if _state['next'] >= _state['end']:
+            size = settings.ORDER_NUMBER_BLOCK_SIZE
+            start = _reserve_committed_block(size)
+            _state.update(next=start, end=start + size)
+        number = _state['next']
+        _state['next'] += 1
+    return f"CMD-{timezone.localdate():%Y%m%d}-{number:07d}"
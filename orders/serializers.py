@@ -85,6 +85,11 @@ class CreateOrderSerializer(serializers.Serializer):
             if 'product_id' not in item or 'quantity' not in item:
                 raise serializers.ValidationError("Chaque article doit avoir un product_id et une quantité")
             
+            try:
+                int(item['product_id'])
+            except ValueError:
+                raise serializers.ValidationError(f"Produit {item['product_id']} introuvable")
+            
             try:
                 quantity = int(item['quantity'])
                 if quantity < 1:
@@ -95,33 +100,54 @@ class CreateOrderSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data):
-        """Créer une nouvelle commande avec client et articles"""
-        from shop.models import Product
+        """Créer une nouvelle commande avec client et articles, en réservant le stock"""
+        from collections import Counter
         from decimal import Decimal
+        from django.db import transaction
+        from django.db.models import Prefetch, prefetch_related_objects
+        from .numbers import next_order_number
+        from .stats import SalesDeltas
+        from .stock import InsufficientStock, lock_products, reservation_deadline, reserve_products
         
         # Extraire les items
         items_data = validated_data.pop('items')
+        quantities = Counter()
+        for item_data in items_data:
+            quantities[int(item_data['product_id'])] += int(item_data['quantity'])
         
-        # Créer le client
-        customer_data = {
-            'first_name': validated_data['first_name'],
-            'last_name': validated_data['last_name'],
-            'phone': validated_data['phone'],
-            'email': validated_data.get('email', ''),
-            'address': validated_data['address'],
-            'city': validated_data['city'],
-            'postal_code': validated_data.get('postal_code', ''),
-            'notes': validated_data.get('notes', ''),
-        }
-        customer = Customer.objects.create(**customer_data)
-        
-        # Calculer le total
-        subtotal = Decimal('0.00')
-        order_items = []
+        # Numéro attribué hors transaction: un nouveau bloc est réservé sur la connexion courante
+        order_number = next_order_number()
         
-        for item_data in items_data:
+        with transaction.atomic():
+            # Verrouiller les produits (une requête, ordre des ids) puis réserver le stock
+            products = lock_products(quantities)
+            for product_id in quantities:
+                if product_id not in products:
+                    raise serializers.ValidationError(f"Produit {product_id} introuvable")
             try:
-                product = Product.objects.get(id=item_data['product_id'])
+                reserve_products(products, quantities)
+            except InsufficientStock as e:
+                raise serializers.ValidationError(f"Stock insuffisant pour: {e}")
+            
+            # Créer le client
+            customer_data = {
+                'first_name': validated_data['first_name'],
+                'last_name': validated_data['last_name'],
+                'phone': validated_data['phone'],
+                'email': validated_data.get('email', ''),
+                'address': validated_data['address'],
+                'city': validated_data['city'],
+                'postal_code': validated_data.get('postal_code', ''),
+                'notes': validated_data.get('notes', ''),
+            }
+            customer = Customer.objects.create(**customer_data)
+            
+            # Calculer le total
+            subtotal = Decimal('0.00')
+            order_items = []
+            
+            for item_data in items_data:
+                product = products[int(item_data['product_id'])]
                 quantity = int(item_data['quantity'])
                 unit_price = Decimal(str(product.final_price or product.price))
                 total_price = unit_price * quantity
@@ -136,27 +162,33 @@ class CreateOrderSerializer(serializers.Serializer):
                 })
                 
                 subtotal += total_price
-            except Product.DoesNotExist:
-                raise serializers.ValidationError(f"Produit {item_data['product_id']} introuvable")
-        
-        # Créer la commande
-        shipping_cost = Decimal('0.00')  # Livraison gratuite
-        total = subtotal + shipping_cost
-        
-        order = Order.objects.create(
-            customer=customer,
-            status='pending',
-            payment_method=validated_data.get('payment_method', 'cod'),
-            subtotal=subtotal,
-            shipping_cost=shipping_cost,
-            total=total,
-            customer_notes=validated_data.get('notes', '')
-        )
-        
-        # Créer les articles de commande
-        for item_data in order_items:
-            OrderItem.objects.create(order=order, **item_data)
+            
+            # Créer la commande
+            shipping_cost = Decimal('0.00')  # Livraison gratuite
+            total = subtotal + shipping_cost
+            
+            order = Order.objects.create(
+                order_number=order_number,
+                customer=customer,
+                status='pending',
+                payment_method=validated_data.get('payment_method', 'cod'),
+                subtotal=subtotal,
+                shipping_cost=shipping_cost,
+                total=total,
+                customer_notes=validated_data.get('notes', ''),
+                stock_deducted=True,
+                reserved_until=reservation_deadline(),
+            )
+            
+            # Créer les articles de commande (une requête, total_price déjà calculé)
+            items = OrderItem.objects.bulk_create([OrderItem(order=order, **item_data) for item_data in order_items])
+            # bulk_create n'envoie pas post_save: articles ajoutés aux agrégats de ventes ici
+            SalesDeltas().add_items(order.status, order.created_at, items).schedule()
         
+        # Articles de la réponse (ids attribués par la base) et produits avec leurs relations: une requête
+        prefetch_related_objects([order], Prefetch('items', queryset=OrderItem.objects.select_related(
+            'product__category', 'product__subcategory', 'product__brand', 'product__main_product_image'
+        ).order_by('pk')))
         return order
 
 
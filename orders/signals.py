@@ -0,0 +1,115 @@
+"""
+Signaux des commandes: variations des agrégats de ventes (voir orders.stats)
+
+pre_save lit les valeurs enregistrées (statut, montant, quantités) pour retirer
+l'ancienne contribution et ajouter la nouvelle après le commit.
+"""
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Delivery, Order, OrderItem
+from .stats import SalesDeltas
+
+# Champs d'une commande comptés dans les agrégats
+ORDER_STATS_FIELDS = {'status', 'total'}
+
+
+def order_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stats_before = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not ORDER_STATS_FIELDS & set(update_fields):
+        return
+    instance._stats_before = Order.objects.filter(pk=instance.pk).order_by('pk').values(
+        'status', 'total', 'created_at', 'delivery__status'
+    ).annotate(item_count=Sum('items__quantity')).first()
+
+
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    """Nouvelle commande: +1 dans son statut. Statut ou montant modifié: déplace sa contribution"""
+    if raw:
+        return
+    if created:
+        SalesDeltas().add_order(instance.status, instance.created_at, instance.total).schedule()
+        return
+    before = getattr(instance, '_stats_before', None)
+    if before is None or (before['status'], before['total']) == (instance.status, instance.total):
+        return
+    item_count = before['item_count'] or 0
+    delivered = before['delivery__status'] == 'delivered'
+    deltas = SalesDeltas().add_order(before['status'], before['created_at'], before['total'],
+                                     item_count, delivered, sign=-1)
+    deltas.add_order(instance.status, instance.created_at, instance.total, item_count, delivered)
+    deltas.schedule()
+
+
+def order_deleted(sender, instance, **kwargs):
+    # Articles et livraison sont retirés par leurs propres signaux (supprimés en cascade avant la commande)
+    SalesDeltas().add_order(instance.status, instance.created_at, instance.total, sign=-1).schedule()
+
+
+def get_order(instance):
+    """Commande d'un article ou d'une livraison (None si elle n'existe plus)"""
+    try:
+        return instance.order
+    except Order.DoesNotExist:
+        return None
+
+
+def item_before_save(sender, instance, raw=False, **kwargs):
+    instance._stats_before = None
+    if not raw and not instance._state.adding:
+        instance._stats_before = OrderItem.objects.filter(pk=instance.pk).only(
+            'product_id', 'quantity', 'total_price'
+        ).first()
+
+
+def item_saved(sender, instance, raw=False, **kwargs):
+    order = None if raw else get_order(instance)
+    if order is None:
+        return
+    deltas = SalesDeltas().add_items(order.status, order.created_at, [instance])
+    before = getattr(instance, '_stats_before', None)
+    if before is not None:
+        deltas.add_items(order.status, order.created_at, [before], sign=-1)
+    deltas.schedule()
+
+
+def item_deleted(sender, instance, **kwargs):
+    order = get_order(instance)
+    if order is not None:
+        SalesDeltas().add_items(order.status, order.created_at, [instance], sign=-1).schedule()
+
+
+def delivery_before_save(sender, instance, raw=False, **kwargs):
+    instance._stats_before = None
+    if not raw and not instance._state.adding:
+        instance._stats_before = Delivery.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+def delivery_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    was_delivered = getattr(instance, '_stats_before', None) == 'delivered'
+    if was_delivered == (instance.status == 'delivered'):
+        return
+    order = get_order(instance)
+    if order is not None:
+        SalesDeltas().add_delivery(order.status, order.created_at, sign=-1 if was_delivered else 1).schedule()
+
+
+def delivery_deleted(sender, instance, **kwargs):
+    order = get_order(instance) if instance.status == 'delivered' else None
+    if order is not None:
+        SalesDeltas().add_delivery(order.status, order.created_at, sign=-1).schedule()
+
+
+pre_save.connect(order_before_save, sender=Order, dispatch_uid='sales_stats_order_before_save')
+post_save.connect(order_saved, sender=Order, dispatch_uid='sales_stats_order_saved')
+post_delete.connect(order_deleted, sender=Order, dispatch_uid='sales_stats_order_deleted')
+pre_save.connect(item_before_save, sender=OrderItem, dispatch_uid='sales_stats_OrderItem_before_save')
+post_save.connect(item_saved, sender=OrderItem, dispatch_uid='sales_stats_OrderItem_saved')
+post_delete.connect(item_deleted, sender=OrderItem, dispatch_uid='sales_stats_OrderItem_deleted')
+pre_save.connect(delivery_before_save, sender=Delivery, dispatch_uid='sales_stats_Delivery_before_save')
+post_save.connect(delivery_saved, sender=Delivery, dispatch_uid='sales_stats_Delivery_saved')
+post_delete.connect(delivery_deleted, sender=Delivery, dispatch_uid='sales_stats_Delivery_deleted')
@@ -0,0 +1,324 @@
+"""
+Statistiques de ventes du tableau de bord (tables DailySalesStat / DailyProductSales)
+
+Les agrégats sont tenus par jour (date locale de création de la commande). Les signaux
+des commandes, articles et livraisons calculent la variation apportée par l'enregistrement
+(ancien et nouveau statut, montant, articles) et l'ajoutent aux lignes du jour après le
+commit (SalesDeltas: un upsert par table, sans relire les commandes du jour). Une erreur à
+ce moment est journalisée et ne fait jamais échouer la requête: la commande est déjà
+enregistrée. Le tableau de bord lit uniquement les tables d'agrégats (une ligne par jour
+et par statut).
+Les modifications en masse (queryset.update, bulk_create hors commande) ne déclenchent pas
+les signaux: "python manage.py rebuild_sales_stats" recalcule alors les agrégats à partir
+des commandes (les variations appliquées pendant un recalcul peuvent être perdues: le
+lancer en heure creuse).
+"""
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Commandes dont le montant est compté comme chiffre d'affaires
+REVENUE_STATUSES = ['confirmed', 'delivered']
+
+# Attente maximale (secondes) du verrou de recalcul d'un jour
+DAY_LOCK_TIMEOUT = 30
+
+# Tentatives d'application des variations (interblocage InnoDB entre deux upserts)
+DELTA_ATTEMPTS = 3
+
+
+def local_date(value):
+    """Jour (fuseau du site) d'une date de création"""
+    return timezone.localtime(value).date()
+
+
+def day_bounds(day):
+    """[début, fin[ d'un jour local, en datetimes aware"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+@contextmanager
+def day_lock(day):
+    """
+    Un seul recalcul à la fois par jour (rebuild_sales_stats lancé deux fois). Sans lui,
+    supprimer puis insérer les lignes d'un même jour en même temps provoque un interblocage InnoDB.
+    SQLite sérialise déjà les écritures. Yield False si le verrou n'a pas été obtenu.
+    """
+    if connection.vendor != 'mysql':
+        yield True
+        return
+    # Verrou nommé: global au serveur, le nom de la base évite les collisions (64 caractères max)
+    name = f"{connection.settings_dict['NAME']}:sales:{day.isoformat()}"[-64:]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", [name, DAY_LOCK_TIMEOUT])
+        acquired = cursor.fetchone()[0] == 1
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", [name])
+
+
+def refresh_days(days):
+    """Recalcule les agrégats des jours donnés à partir des commandes"""
+    for day in sorted(set(days)):
+        with day_lock(day) as acquired:
+            if not acquired:
+                # Le recalcul en cours n'a pas abouti à temps: "rebuild_sales_stats" corrigera ce jour
+                logger.warning("Statistiques du %s non recalculées (verrou occupé)", day)
+                continue
+            refresh_day(day)
+
+
+def refresh_day(day):
+    """Recalcule un jour (sous day_lock: les commandes sont lues après l'acquisition du verrou)"""
+    from .models import DailyProductSales, DailySalesStat, Order, OrderItem
+
+    start, end = day_bounds(day)
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end).order_by()
+
+    item_counts = dict(items.values_list('order__status').annotate(Sum('quantity')))
+    stats = [
+        DailySalesStat(
+            date=day,
+            status=row['status'],
+            order_count=row['order_count'],
+            revenue=row['revenue'] or 0,
+            item_count=item_counts.get(row['status']) or 0,
+            delivered_count=row['delivered_count'],
+        )
+        for row in orders.values('status').annotate(
+            order_count=Count('id'),
+            revenue=Sum('total'),
+            delivered_count=Count('id', filter=Q(delivery__status='delivered')),
+        )
+    ]
+    products = [
+        DailyProductSales(date=day, product_id=row['product_id'], quantity=row['quantity'], revenue=row['revenue'])
+        for row in items.values('product_id').annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+    ]
+
+    with transaction.atomic():
+        DailySalesStat.objects.filter(date=day).delete()
+        DailyProductSales.objects.filter(date=day).delete()
+        DailySalesStat.objects.bulk_create(stats)
+        DailyProductSales.objects.bulk_create(products, batch_size=1000)
+
+
+class SalesDeltas:
+    """
+    Variations des agrégats: {(jour, statut): [commandes, montant, articles, livrées]}
+    et {(jour, produit): [quantité, montant]}. sign=-1 retire une contribution.
+    """
+    SALES_FIELDS = ('order_count', 'revenue', 'item_count', 'delivered_count')
+    PRODUCT_FIELDS = ('quantity', 'revenue')
+
+    def __init__(self):
+        self.sales = defaultdict(lambda: [0, Decimal('0'), 0, 0])
+        self.products = defaultdict(lambda: [0, Decimal('0')])
+
+    def add_order(self, status, created_at, total, item_count=0, delivered=False, sign=1):
+        row = self.sales[(local_date(created_at), status)]
+        row[0] += sign
+        row[1] += sign * Decimal(total)
+        row[2] += sign * item_count
+        row[3] += sign * int(delivered)
+        return self
+
+    def add_items(self, status, created_at, items, sign=1):
+        """items: articles (product_id, quantity, total_price) d'une commande de ce statut"""
+        day = local_date(created_at)
+        for item in items:
+            self.sales[(day, status)][2] += sign * item.quantity
+            row = self.products[(day, item.product_id)]
+            row[0] += sign * item.quantity
+            row[1] += sign * Decimal(item.total_price)
+        return self
+
+    def add_delivery(self, status, created_at, sign=1):
+        self.sales[(local_date(created_at), status)][3] += sign
+        return self
+
+    def schedule(self):
+        """Applique les variations après le commit de la transaction en cours"""
+        transaction.on_commit(self.apply)
+
+    def apply(self):
+        """Ajoute les variations aux agrégats (appelé après le commit, ne lève jamais d'exception)"""
+        from .models import DailyProductSales, DailySalesStat
+
+        sales = {key: values for key, values in self.sales.items() if any(values)}
+        products = {key: values for key, values in self.products.items() if any(values)}
+        if not sales and not products:
+            return
+        for attempt in range(1, DELTA_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    upsert(DailySalesStat, ('date', 'status'), self.SALES_FIELDS, sales)
+                    upsert(DailyProductSales, ('date', 'product'), self.PRODUCT_FIELDS, products)
+                    # Lignes vidées (annulation, suppression): absentes, comme après un recalcul
+                    if any(values[0] < 0 for values in sales.values()):
+                        DailySalesStat.objects.filter(
+                            date__in={day for day, _ in sales}, order_count__lte=0
+                        ).delete()
+                    if any(values[0] < 0 for values in products.values()):
+                        DailyProductSales.objects.filter(
+                            date__in={day for day, _ in products},
+                            product_id__in={product_id for _, product_id in products},
+                            quantity__lte=0,
+                        ).delete()
+                return
+            except DatabaseError:
+                if attempt < DELTA_ATTEMPTS:
+                    continue
+                logger.exception("Statistiques de ventes non mises à jour: lancez rebuild_sales_stats")
+            except Exception:
+                logger.exception("Statistiques de ventes non mises à jour: lancez rebuild_sales_stats")
+                return
+
+
+def upsert(model, keys, fields, rows):
+    """
+    Insère les lignes {clé: valeurs} ou ajoute les valeurs aux colonnes fields de la ligne
+    existante (contrainte unique sur keys), en une requête. Lignes triées par clé: deux
+    upserts simultanés verrouillent les lignes dans le même ordre.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    model_fields = [model._meta.get_field(name) for name in (*keys, *fields)]
+    columns = [quote(field.column) for field in model_fields]
+    added = columns[len(keys):]
+    if connection.vendor == 'mysql':
+        conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(f'{column} = {column} + VALUES({column})' for column in added)
+    else:
+        # SQLite, PostgreSQL
+        conflict = f"ON CONFLICT ({', '.join(columns[:len(keys)])}) DO UPDATE SET " + ', '.join(
+            f'{column} = {table}.{column} + excluded.{column}' for column in added
+        )
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    params = [
+        field.get_db_prep_save(value, connection)
+        for key in sorted(rows)
+        for field, value in zip(model_fields, (*key, *rows[key]))
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([placeholders] * len(rows))} {conflict}",
+            params,
+        )
+
+
+def rebuild(date_from=None, date_to=None, progress=None):
+    """Recalcule tous les jours entre date_from et date_to (par défaut: tout l'historique)"""
+    from .models import DailyProductSales, DailySalesStat, Order
+
+    if date_from is None and date_to is None:
+        first = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        last = Order.objects.order_by('-created_at').values_list('created_at', flat=True).first()
+        # Jours hors de l'historique (commandes supprimées): agrégats obsolètes
+        stale = Q() if first is None else Q(date__lt=local_date(first)) | Q(date__gt=local_date(last))
+        DailySalesStat.objects.filter(stale).delete()
+        DailyProductSales.objects.filter(stale).delete()
+        if first is None:
+            return 0
+        date_from, date_to = local_date(first), local_date(last)
+    date_from = date_from or date_to
+    date_to = date_to or timezone.localdate()
+
+    days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    for i, day in enumerate(days, 1):
+        refresh_days([day])
+        if progress:
+            progress(i, len(days), day)
+    return len(days)
+
+
+def filter_period(queryset, date_from=None, date_to=None):
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset
+
+
+def status_aggregates(count, revenue, delivered):
+    """
+    Expressions d'une seule requête aggregate(): un compteur par statut et les montants
+    par groupe de statuts (Count/Sum filtrés). count(q) et revenue(q) retournent
+    l'agrégat de la source (commandes ou agrégats quotidiens) limité aux lignes q.
+    """
+    from .models import Order
+
+    aggregates = {'total_orders': count(None), 'delivered_orders': delivered}
+    for status, _ in Order.STATUS_CHOICES:
+        aggregates[f'{status}_orders'] = count(Q(status=status))
+    aggregates.update(
+        total_revenue=revenue(Q(status__in=REVENUE_STATUSES)),
+        pending_revenue=revenue(Q(status='pending')),
+        cancelled_revenue=revenue(Q(status='cancelled')),
+        gross_revenue=revenue(None),
+    )
+    return aggregates
+
+
+def fill_zeros(totals):
+    for key, value in totals.items():
+        if value is None:
+            totals[key] = Decimal('0') if key.endswith('revenue') else 0
+    return totals
+
+
+def sales_summary(date_from=None, date_to=None):
+    """Compteurs et montants de la période (une requête sur les agrégats quotidiens)"""
+    from .models import DailySalesStat
+
+    aggregates = status_aggregates(
+        count=lambda q: Sum('order_count', filter=q),
+        revenue=lambda q: Sum('revenue', filter=q),
+        delivered=Sum('delivered_count'),
+    )
+    aggregates['total_items'] = Sum('item_count')
+    return fill_zeros(filter_period(DailySalesStat.objects.all(), date_from, date_to).aggregate(**aggregates))
+
+
+def order_summary(orders):
+    """Mêmes compteurs que sales_summary (sans total_items), en une requête sur un queryset de commandes"""
+    aggregates = status_aggregates(
+        count=lambda q: Count('id', filter=q),
+        revenue=lambda q: Sum('total', filter=q),
+        delivered=Count('id', filter=Q(delivery__status='delivered')),
+    )
+    return fill_zeros(orders.order_by().aggregate(**aggregates))
+
+
+def daily_sales(date_from=None, date_to=None, days=30):
+    """Commandes et montant par jour (les 'days' derniers jours de la période, ordre chronologique)"""
+    from .models import DailySalesStat
+
+    rows = filter_period(DailySalesStat.objects.all(), date_from, date_to).values('date').annotate(
+        count=Sum('order_count'), revenue=Sum('revenue')
+    ).order_by('-date')[:days]
+    return list(reversed(rows))
+
+
+def top_products(date_from=None, date_to=None, limit=5):
+    """Produits les plus vendus (quantités) sur la période"""
+    from .models import DailyProductSales
+
+    return filter_period(DailyProductSales.objects.all(), date_from, date_to).values(
+        'product__name', 'product__reference'
+    ).annotate(quantity=Sum('quantity')).order_by('-quantity')[:limit]
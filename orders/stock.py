@@ -0,0 +1,160 @@
+"""
+Réservation du stock des commandes
+
+Le stock est réservé dès la création de la commande. Les produits des lignes sont
+verrouillés (SELECT ... FOR UPDATE) en une seule requête, toujours dans l'ordre des ids:
+deux commandes concurrentes sur les mêmes produits s'attendent au lieu de s'interbloquer.
+La disponibilité est vérifiée sur les lignes verrouillées puis toutes les quantités sont
+décrémentées par une seule requête UPDATE (expressions F(), jamais de valeur relue puis
+réécrite). Quand une commande existante change d'état, sa ligne est verrouillée avant ses
+produits (même ordre partout).
+
+Order.stock_deducted indique que la commande détient du stock, reserved_until la date
+d'expiration de la réservation d'une commande en attente (aucune une fois confirmée).
+L'annulation restitue le stock; "python manage.py release_expired_reservations" restitue
+celui des réservations expirées (la commande reste en attente et sera réservée à nouveau
+lors de sa confirmation, si le stock le permet).
+
+Les réponses en cache de l'API catalogue ne sont invalidées que si un produit passe en
+rupture ou redevient disponible: une quantité affichée par une liste en cache peut être
+légèrement en retard, jamais la disponibilité.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from shop.catalog_cache import bump_catalog_version
+
+
+class InsufficientStock(Exception):
+    """Stock insuffisant; shortages: [(produit, quantité demandée)]"""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(", ".join(
+            f"{product.name} (Stock disponible: {product.quantity}, Quantite demandee: {quantity})"
+            for product, quantity in shortages
+        ))
+
+
+def reservation_deadline():
+    return timezone.now() + timedelta(hours=settings.ORDER_RESERVATION_HOURS)
+
+
+def lock_products(product_ids):
+    """Verrouille les produits jusqu'à la fin de la transaction -> {id: produit}"""
+    from shop.models import Product
+
+    # in_bulk() sans liste d'ids garde le tri (ordre des verrous); sans select_related:
+    # un FOR UPDATE avec jointure verrouillerait aussi les catégories et marques
+    return Product.objects.select_for_update().filter(pk__in=list(product_ids)).order_by('pk').in_bulk()
+
+
+def adjust_stock(products, quantities, sign):
+    """Ajoute sign * quantité au stock de produits verrouillés par lock_products (une requête UPDATE)"""
+    from shop.models import Product
+
+    if not quantities:
+        return
+    Product.objects.filter(pk__in=list(quantities)).update(
+        quantity=Case(*[When(pk=pk, then=F('quantity') + sign * quantity) for pk, quantity in quantities.items()]),
+        updated_at=timezone.now(),
+    )
+    availability_changed = False
+    for pk, quantity in quantities.items():
+        product = products[pk]
+        before = product.quantity
+        product.quantity += sign * quantity
+        availability_changed |= (before > 0) != (product.quantity > 0)
+    if availability_changed:
+        # update() ne déclenche pas les signaux: rupture ou retour en stock visible dans l'API catalogue
+        transaction.on_commit(bump_catalog_version)
+
+
+def reserve_products(products, quantities):
+    """
+    Réserve {id: quantité} sur des produits verrouillés par lock_products
+    (InsufficientStock si une ligne dépasse le stock, rien n'est alors réservé)
+    """
+    shortages = [(products[pk], quantity) for pk, quantity in quantities.items() if products[pk].quantity < quantity]
+    if shortages:
+        raise InsufficientStock(shortages)
+    adjust_stock(products, quantities, -1)
+
+
+def order_quantities(order):
+    """Quantités commandées par produit (lignes d'un même produit additionnées)"""
+    quantities = Counter()
+    for product_id, quantity in order.items.values_list('product_id', 'quantity'):
+        quantities[product_id] += quantity
+    return quantities
+
+
+def lock_order(order):
+    """Relit et verrouille la commande jusqu'à la fin de la transaction"""
+    from .models import Order
+
+    return Order.objects.select_for_update().get(pk=order.pk)
+
+
+def reserve(order):
+    """Réserve le stock d'une commande verrouillée qui n'en détient pas"""
+    quantities = order_quantities(order)
+    reserve_products(lock_products(quantities), quantities)
+    order.stock_deducted = True
+
+
+def release(order):
+    """Restitue le stock détenu par une commande verrouillée (False si elle n'en détient pas)"""
+    order.reserved_until = None
+    if not order.stock_deducted:
+        return False
+    quantities = order_quantities(order)
+    adjust_stock(lock_products(quantities), quantities, 1)
+    order.stock_deducted = False
+    return True
+
+
+def change_status(order, status):
+    """
+    Change le statut d'une commande en tenant son stock à jour: l'annulation le restitue,
+    les autres statuts le réservent si la commande n'en détient pas (InsufficientStock).
+    Retourne la commande relue sous verrou et enregistrée.
+    """
+    with transaction.atomic():
+        order = lock_order(order)
+        if status == 'cancelled':
+            release(order)
+        else:
+            if not order.stock_deducted:
+                reserve(order)
+            if status != 'pending':
+                order.reserved_until = None
+            elif order.reserved_until is None:
+                order.reserved_until = reservation_deadline()
+        if status == 'confirmed' and not order.confirmed_at:
+            order.confirmed_at = timezone.now()
+        order.status = status
+        order.save()
+    return order
+
+
+def release_expired(now=None):
+    """Restitue le stock des commandes en attente dont la réservation a expiré"""
+    from .models import Order
+
+    now = now or timezone.now()
+    expired = Order.objects.filter(status='pending', stock_deducted=True, reserved_until__lt=now)
+    released = 0
+    for pk in list(expired.values_list('pk', flat=True)):
+        with transaction.atomic():
+            # La commande a pu être confirmée ou annulée entre-temps: nouvelle vérification sous verrou
+            order = expired.select_for_update().filter(pk=pk).first()
+            if order is not None and release(order):
+                order.save(update_fields=['stock_deducted', 'reserved_until', 'updated_at'])
+                released += 1
+    return released
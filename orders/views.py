@@ -1,13 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
+from django.db import transaction
 from django.db.models import Q
 from .models import Customer, Order, OrderItem, Delivery
 from .serializers import (
     CustomerSerializer, OrderSerializer, OrderItemSerializer,
     CreateOrderSerializer, DeliverySerializer
 )
+from .stock import InsufficientStock, change_status, lock_order, release
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -61,6 +64,25 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def perform_update(self, serializer):
+        # Un changement de statut passe par la réservation du stock
+        new_status = serializer.validated_data.pop('status', None)
+        try:
+            with transaction.atomic():
+                order = serializer.save()
+                if new_status and new_status != order.status:
+                    change_status(order, new_status)
+                    order.refresh_from_db()
+        except InsufficientStock as e:
+            raise ValidationError({'status': f'Stock insuffisant pour: {e}'})
+    
+    def perform_destroy(self, instance):
+        # Restituer le stock détenu par la commande supprimée
+        with transaction.atomic():
+            order = lock_order(instance)
+            release(order)
+            order.delete()
+    
     @action(detail=False, methods=['post'], url_path='create')
     def create_order(self, request):
         """
@@ -97,10 +119,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         order = self.get_object()
         if order.status == 'pending':
-            order.status = 'confirmed'
-            from django.utils import timezone
-            order.confirmed_at = timezone.now()
-            order.save()
+            try:
+                order = change_status(order, 'confirmed')
+            except InsufficientStock as e:
+                return Response({'error': f'Stock insuffisant pour: {e}'}, status=status.HTTP_400_BAD_REQUEST)
             serializer = self.get_serializer(order)
             return Response(serializer.data)
         return Response(
@@ -116,8 +138,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         order = self.get_object()
         if order.status in ['pending', 'confirmed']:
-            order.status = 'cancelled'
-            order.save()
+            # Le stock réservé par la commande est restitué
+            order = change_status(order, 'cancelled')
             serializer = self.get_serializer(order)
             return Response(serializer.data)
         return Response(
@@ -142,11 +164,11 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        order.status = new_status
-        if new_status == 'confirmed' and not order.confirmed_at:
-            from django.utils import timezone
-            order.confirmed_at = timezone.now()
-        order.save()
+        # Annulation: stock restitué; autre statut: stock réservé si la commande n'en détient pas
+        try:
+            order = change_status(order, new_status)
+        except InsufficientStock as e:
+            return Response({'error': f'Stock insuffisant pour: {e}'}, status=status.HTTP_400_BAD_REQUEST)
         
         serializer = self.get_serializer(order)
         return Response(serializer.data)
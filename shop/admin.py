@@ -356,6 +356,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_editable = ['show_in_ad_slider']
     inlines = [ProductImageInline]
     readonly_fields = ['image_dimension_info', 'main_image_preview_large', 'all_images_preview']
+    list_select_related = ['category', 'subcategory', 'brand', 'main_product_image']
     
     fieldsets = (
         ('Informations de base', {
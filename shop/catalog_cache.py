@@ -0,0 +1,128 @@
+"""
+Cache des réponses de l'API catalogue
+
+Les réponses sont indexées par endpoint + paramètres normalisés + numéro de version
+du catalogue. Toute modification d'un modèle du catalogue (voir shop.signals) incrémente
+la version: les anciennes entrées ne sont plus jamais lues et expirent d'elles-mêmes.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+HITS_KEY = 'catalog:stats:hits'
+MISSES_KEY = 'catalog:stats:misses'
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Basée sur l'horloge: si la clé de version est évincée, on ne retombe jamais
+    # sur une version déjà utilisée (et donc sur des réponses périmées)
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    """Retourne le numéro de version courant du catalogue"""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _initial_version()
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalide toutes les réponses en cache du catalogue"""
+    cache = get_cache()
+    version = max(get_catalog_version() + 1, _initial_version())
+    cache.set(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def _incr(key):
+    cache = get_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """Retourne les compteurs hits/misses du cache catalogue"""
+    cache = get_cache()
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'version': get_catalog_version(),
+        'hits': values.get(HITS_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def build_cache_key(endpoint, request, view_kwargs):
+    """Clé: version + endpoint + hôte (URLs absolues) + paramètres triés"""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = '|'.join([
+        request.scheme,
+        request.get_host(),
+        urlencode(sorted(view_kwargs.items())),
+        urlencode(params),
+    ])
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"catalog:{get_catalog_version()}:{endpoint}:{digest}"
+
+
+def cache_catalog_response(view_method):
+    """
+    Décorateur pour les actions GET des ViewSets du catalogue
+    Met en cache response.data (avant rendu JSON) des réponses 200
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = build_cache_key(f"{self.basename}.{self.action}", request, kwargs)
+
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY)
+            response = Response(data)
+            response['X-Catalog-Cache'] = 'HIT'
+            return response
+
+        _incr(MISSES_KEY)
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        response['X-Catalog-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+class CatalogCacheMixin:
+    """Met en cache list et retrieve d'un ReadOnlyModelViewSet"""
+
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,121 @@
+"""
+Requêtes GET conditionnelles (ETag / Last-Modified) pour l'API shop
+
+L'ETag est calculé à partir d'une requête d'agrégat (COUNT + MAX(updated_at) des lignes
+concernées et de leurs relations affichées) et de la query string. Si le client possède
+déjà la bonne version, on répond 304 avant toute sérialisation.
+
+Les endpoints de la taxonomie (catégories, marques...) utilisent plutôt la version du
+catalogue (shop.catalog_cache), incrémentée à chaque modification du catalogue: aucune
+requête SQL, là où l'agrégat parcourrait tous les produits joints.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .catalog_cache import get_catalog_version
+
+
+def conditional_get(view_method):
+    """Décorateur pour les actions GET des ViewSets (voir ConditionalGetMixin)"""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not self.use_conditional_get():
+            return view_method(self, request, *args, **kwargs)
+
+        etag, last_modified = self.get_freshness(request, kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        # MAX(updated_at) ne bouge pas quand des lignes sont supprimées ou sortent du filtre: seul
+        # l'ETag (qui inclut le COUNT) peut alors valider. La version du catalogue bouge à chaque changement.
+        validator = timestamp if self.catalog_versioned else None
+        response = get_conditional_response(request, etag=etag, last_modified=validator)
+        if response is not None:
+            self.not_modified(request, kwargs)
+        else:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    Ajoute ETag / Last-Modified à list et retrieve
+
+    freshness_fields: champs datés dont le MAX change quand la réponse change
+    (ex: 'updated_at', 'category__updated_at'). Le COUNT des lignes détecte les suppressions.
+    catalog_versioned: la version du catalogue remplace l'agrégat (réponses qui ne changent
+    qu'avec elle, ex: taxonomie sans quantités de stock)
+    """
+    freshness_fields = ('updated_at',)
+    catalog_versioned = False
+
+    def use_conditional_get(self):
+        """Permet de désactiver l'agrégat pour certaines requêtes"""
+        return True
+
+    def not_modified(self, request, view_kwargs):
+        """Appelé quand la réponse est un 304 (la méthode de la vue n'est pas exécutée)"""
+
+    def get_freshness_queryset(self):
+        """Queryset sans annotations ni tri utilisé pour l'agrégat"""
+        return self.filter_queryset(self.get_queryset())
+
+    def get_freshness_querysets(self):
+        """Liste de (queryset, champs) à agréger, une requête par élément"""
+        queryset = self.get_freshness_queryset()
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return [(queryset, self.freshness_fields)]
+
+    def get_freshness(self, request, view_kwargs):
+        """Retourne (etag, last_modified) pour la requête courante"""
+        parts = [
+            request.path,
+            request.get_host(),
+            urlencode(sorted(
+                (key, value)
+                for key, values in request.query_params.lists()
+                for value in values
+            )),
+        ]
+        if self.catalog_versioned:
+            version = get_catalog_version()
+            parts.append(str(version))
+            # Version en millisecondes depuis l'epoch (voir catalog_cache._initial_version)
+            last_modified = datetime.fromtimestamp(version / 1000, tz=timezone.utc)
+            return quote_etag(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()), last_modified
+
+        last_modified = None
+        for queryset, fields in self.get_freshness_querysets():
+            aggregates = {f'max_{i}': Max(field) for i, field in enumerate(fields)}
+            values = queryset.order_by().aggregate(rows=Count('pk'), **aggregates)
+            parts.append(str(values.pop('rows')))
+            for value in values.values():
+                parts.append(value.isoformat() if value else '-')
+                if value and (last_modified is None or value > last_modified):
+                    last_modified = value
+
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+        return etag, last_modified
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -1,15 +1,17 @@
 """
 Configuration du dashboard admin pour afficher des statistiques
 """
-from django.db.models import Count, Sum, Avg
 from django.utils.translation import gettext_lazy as _
 
 
 def get_dashboard_stats():
     """Retourne les statistiques pour le dashboard"""
     from shop.models import Product, Category, Brand
-    from orders.models import Order, Customer
+    from orders.models import Customer
+    from orders.stats import sales_summary
     
+    # Commandes et revenus: agrégats quotidiens (une requête, voir orders.stats)
+    sales = sales_summary()
     stats = {
         'products': {
             'total': Product.objects.count(),
@@ -18,9 +20,9 @@ def get_dashboard_stats():
             'color': 'primary',
         },
         'orders': {
-            'total': Order.objects.filter(status='confirmed').count(),
-            'pending': Order.objects.filter(status='pending').count(),
-            'revenue': Order.objects.filter(status='confirmed').aggregate(total=Sum('total_price'))['total'] or 0,
+            'total': sales['confirmed_orders'],
+            'pending': sales['pending_orders'],
+            'revenue': sales['total_revenue'],
             'icon': 'fas fa-shopping-cart',
             'color': 'success',
         },
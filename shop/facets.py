@@ -0,0 +1,86 @@
+"""
+Facettes de filtrage des produits (marque, sous-catégorie, type, statut, tranche de prix)
+
+Chaque facette est comptée sur les produits filtrés par tous les autres filtres, mais pas
+par le sien: avec ?brand=asus, la facette marque montre toujours les autres marques et
+leur nombre de produits. Une requête GROUP BY par facette, une seule pour les tranches de prix.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Product
+
+FACETS = ('brand', 'subcategory', 'type', 'status', 'price')
+
+# Facettes liées à un modèle: champs (id, nom, slug)
+RELATED_FACETS = {
+    'brand': ('brand_id', 'brand__name', 'brand__slug'),
+    'subcategory': ('subcategory_id', 'subcategory__name', 'subcategory__slug'),
+    'type': ('type_id', 'type__name', 'type__slug'),
+}
+
+
+def _count_related(queryset, facet):
+    id_field, name_field, slug_field = RELATED_FACETS[facet]
+    rows = queryset.filter(**{f'{id_field}__isnull': False}).order_by().values(
+        id_field, name_field, slug_field
+    ).annotate(count=Count('pk'))
+    values = [
+        {'id': row[id_field], 'name': row[name_field], 'slug': row[slug_field], 'count': row['count']}
+        for row in rows
+    ]
+    return sorted(values, key=lambda value: (-value['count'], value['name']))
+
+
+def _count_status(queryset):
+    counts = dict(queryset.order_by().values_list('status').annotate(count=Count('pk')))
+    return [
+        {'value': value, 'name': label, 'count': counts[value]}
+        for value, label in Product.STATUS_CHOICES
+        if counts.get(value)
+    ]
+
+
+def _count_prices(queryset):
+    """Tranches [min, max[ de PRODUCT_PRICE_BUCKETS, la dernière sans borne haute"""
+    bounds = settings.PRODUCT_PRICE_BUCKETS
+    buckets = []
+    for i, low in enumerate(bounds):
+        high = bounds[i + 1] if i + 1 < len(bounds) else None
+        condition = Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q())
+        buckets.append((low, high, condition))
+
+    counts = queryset.order_by().aggregate(**{
+        f'bucket_{i}': Count('pk', filter=condition) for i, (_, _, condition) in enumerate(buckets)
+    })
+    values = []
+    for i, (low, high, _) in enumerate(buckets):
+        count = counts[f'bucket_{i}']
+        if not count:
+            continue
+        values.append({
+            'name': f'{low} – {high} DH' if high is not None else f'{low} DH et plus',
+            # Paramètres min_price / max_price (inclusifs) sélectionnant exactement la tranche
+            'min_price': str(low),
+            'max_price': str(Decimal(high) - Decimal('0.01')) if high is not None else None,
+            'count': count,
+        })
+    return values
+
+
+def compute_facets(filtered):
+    """
+    filtered(exclude): queryset des produits filtrés par la requête, sauf les facettes exclues
+    Retourne le nombre de produits et les comptages de chaque facette.
+    """
+    facets = {}
+    for facet in RELATED_FACETS:
+        facets[facet] = _count_related(filtered(exclude=(facet,)), facet)
+    facets['status'] = _count_status(filtered(exclude=('status',)))
+    facets['price'] = _count_prices(filtered(exclude=('price',)))
+    return {
+        'count': filtered(exclude=()).count(),
+        'facets': facets,
+    }
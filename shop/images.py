@@ -0,0 +1,193 @@
+"""
+Images dérivées (tailles fixes, WebP) des images du catalogue
+
+Chaque image uploadée est déclinée en largeurs fixes (IMAGE_VARIANT_WIDTHS), sans
+agrandissement, écrites à côté de l'original sous un nom dérivé de son contenu:
+'products/gallery/abc.png' -> 'products/gallery/abc-<sha256[:12]>-320w.webp'. Les chemins
+sont enregistrés dans un champ JSON de la ligne ({'source': nom de l'original, 'widths':
+{'160': chemin, ...}}): les serializers construisent les srcset sans requête ni accès disque.
+Les dérivés sont générés après le commit de l'enregistrement (signaux) ou par la commande
+"python manage.py build_image_variants" (pool de process).
+"""
+import hashlib
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .catalog_cache import bump_catalog_version
+from .indexing import schedule
+
+logger = logging.getLogger(__name__)
+
+# Clé -> (modèle, champ image, champ des dérivés, relation dont updated_at est rafraîchi)
+IMAGE_FIELDS = {
+    'product_images': ('shop.ProductImage', 'image', 'image_variants', 'product'),
+    'categories': ('shop.Category', 'image', 'image_variants', None),
+    'subcategories': ('shop.SubCategory', 'image', 'image_variants', None),
+    'brands': ('shop.Brand', 'logo', 'logo_variants', None),
+    'collections': ('shop.Collection', 'image', 'image_variants', None),
+    'hero_slides': ('shop.HeroSlide', 'custom_image', 'custom_image_variants', None),
+}
+
+# En dessous, les dérivés sont générés dans le process courant
+POOL_MIN_IMAGES = 8
+
+
+def make_variants(media_root, name, widths, quality):
+    """
+    Exécuté dans le pool: écrit les dérivés WebP de l'image 'name' (chemin relatif à
+    media_root) et retourne {'source': name, 'widths': {'largeur': chemin}}
+    Un dérivé déjà présent (même contenu d'origine) n'est pas réencodé.
+    """
+    with open(os.path.join(media_root, name), 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem = os.path.splitext(name)[0]
+
+    variants = {}
+    with Image.open(io.BytesIO(content)) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        for width in widths:
+            # Pas d'agrandissement: une petite image n'a que sa largeur d'origine en plus grand dérivé
+            width = min(width, img.width)
+            if str(width) in variants:
+                continue
+            relative_path = f"{stem}-{digest}-{width}w.webp"
+            destination = os.path.join(media_root, relative_path)
+            if not os.path.exists(destination):
+                height = max(1, round(img.height * width / img.width))
+                resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+                temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+                resized.save(temporary, 'WEBP', quality=quality, method=4)
+                os.replace(temporary, destination)
+            variants[str(width)] = relative_path
+    return {'source': name, 'widths': variants}
+
+
+def _make_variants_safe(name, media_root, widths, quality):
+    try:
+        return make_variants(media_root, name, widths, quality), None
+    except Exception as e:
+        return None, str(e)
+
+
+def generate_variants(names, processes=None):
+    """Dérivés de plusieurs images -> ({nom: dérivés}, {nom: erreur})"""
+    names = sorted(set(names))
+    worker = partial(
+        _make_variants_safe,
+        media_root=settings.MEDIA_ROOT,
+        widths=settings.IMAGE_VARIANT_WIDTHS,
+        quality=settings.IMAGE_VARIANT_QUALITY,
+    )
+    processes = processes or settings.IMAGE_VARIANT_PROCESSES
+    if processes == 1 or len(names) < POOL_MIN_IMAGES or connection.in_atomic_block:
+        results = [worker(name) for name in names]
+    else:
+        # Les process enfants ne doivent pas hériter des connexions ouvertes du parent
+        connections.close_all()
+        chunksize = max(1, min(32, len(names) // (processes * 4)))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(worker, names, chunksize=chunksize))
+
+    generated, errors = {}, {}
+    for name, (variants, error) in zip(names, results):
+        if error:
+            errors[name] = error
+        else:
+            generated[name] = variants
+    return generated, errors
+
+
+def refresh_variants(key, queryset=None, force=False, processes=None):
+    """
+    Génère les dérivés manquants ou périmés (image remplacée) des lignes du queryset et
+    les enregistre. Retourne (lignes mises à jour, {nom: erreur}).
+    """
+    label, field, variants_field, owner = IMAGE_FIELDS[key]
+    model = apps.get_model(label)
+    if queryset is None:
+        queryset = model.objects.all()
+
+    rows = {}
+    for pk, name, variants in queryset.order_by().values_list('pk', field, variants_field):
+        if not name:
+            if variants:
+                rows[pk] = ('', variants)
+        elif force or (variants or {}).get('source') != name:
+            rows[pk] = (name, variants)
+    if not rows:
+        return 0, {}
+
+    generated, errors = generate_variants((name for name, _ in rows.values() if name), processes)
+    for name, error in errors.items():
+        logger.warning("Dérivés non générés pour %s: %s", name, error)
+
+    now = timezone.now()
+    update_fields = [variants_field]
+    if any(f.name == 'updated_at' for f in model._meta.get_fields()):
+        update_fields.append('updated_at')
+    objects = []
+    for pk, (name, _) in rows.items():
+        if name and name not in generated:
+            continue
+        obj = model(pk=pk, updated_at=now) if 'updated_at' in update_fields else model(pk=pk)
+        setattr(obj, variants_field, generated[name] if name else {})
+        objects.append(obj)
+    model.objects.bulk_update(objects, update_fields, batch_size=500)
+
+    if owner and objects:
+        # Les réponses (ETag) du propriétaire dépendent des dérivés: son updated_at est rafraîchi
+        owner_model = model._meta.get_field(owner).related_model
+        owner_ids = model.objects.filter(pk__in=[obj.pk for obj in objects]).values(f'{owner}_id')
+        owner_model.objects.filter(pk__in=owner_ids).update(updated_at=now)
+    if objects:
+        bump_catalog_version()
+    return len(objects), errors
+
+
+def _refresh_ids(key, ids):
+    model = apps.get_model(IMAGE_FIELDS[key][0])
+    refresh_variants(key, model.objects.filter(pk__in=ids), processes=1)
+
+
+# Une fonction par clé: schedule() regroupe les ids d'une même fonction
+VARIANT_BUILDERS = {key: partial(_refresh_ids, key) for key in IMAGE_FIELDS}
+
+
+def schedule_variants(key, instance):
+    """Planifie les dérivés d'une ligne après le commit si son image a changé"""
+    _, field, variants_field, _ = IMAGE_FIELDS[key]
+    name = getattr(instance, field).name or ''
+    variants = getattr(instance, variants_field) or {}
+    if variants.get('source', '') != name:
+        schedule(VARIANT_BUILDERS[key], [instance.pk])
+
+
+def variant_widths(image, variants):
+    """{'largeur': chemin} si les dérivés correspondent à l'image actuelle, sinon {}"""
+    if not image or not variants or variants.get('source') != image.name:
+        return {}
+    return variants.get('widths', {})
+
+
+def build_srcset(request, image, variants):
+    """URLs absolues des dérivés par largeur ({'160': url, ...}), {} si pas encore générés"""
+    widths = variant_widths(image, variants)
+    if not widths or request is None:
+        return {}
+    return {
+        width: request.build_absolute_uri(image.storage.url(path))
+        for width, path in sorted(widths.items(), key=lambda item: int(item[0]))
+    }
@@ -0,0 +1,27 @@
+"""
+Indexation différée après le commit de la transaction en cours
+
+Les signaux d'un même enregistrement (produit puis chacune de ses caractéristiques)
+planifient plusieurs fois les mêmes produits: ils sont regroupés et chaque fonction
+d'indexation n'est exécutée qu'une fois avec l'ensemble des ids.
+"""
+import threading
+from functools import partial
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def _run(func):
+    ids = _pending.ids.pop(func, None)
+    if ids:
+        func(ids)
+
+
+def schedule(func, ids):
+    """Appelle func(ids) après le commit (immédiatement hors transaction)"""
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = {}
+    _pending.ids.setdefault(func, set()).update(ids)
+    transaction.on_commit(partial(_run, func))
@@ -0,0 +1,30 @@
+"""
+Recalcule le pointeur main_product_image de tous les produits
+"""
+from django.core.management.base import BaseCommand
+
+from shop.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'image principale (main_product_image) de tous les produits"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Taille des lots pour bulk_update")
+
+    def handle(self, *args, **options):
+        # Une seule requête sur les images: la première rencontrée par produit est la principale
+        main_images = {}
+        images = ProductImage.objects.order_by('product_id', '-is_main', 'order', 'id').values_list('product_id', 'id')
+        for product_id, image_id in images.iterator(chunk_size=2000):
+            main_images.setdefault(product_id, image_id)
+
+        to_update = []
+        for product in Product.objects.only('id', 'main_product_image_id').iterator(chunk_size=2000):
+            image_id = main_images.get(product.id)
+            if product.main_product_image_id != image_id:
+                product.main_product_image_id = image_id
+                to_update.append(product)
+
+        Product.objects.bulk_update(to_update, ['main_product_image'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{len(to_update)} produits mis à jour"))
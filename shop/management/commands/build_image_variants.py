@@ -0,0 +1,31 @@
+"""
+Génère les tailles WebP (dérivés) des images du catalogue
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.images import IMAGE_FIELDS, refresh_variants
+
+
+class Command(BaseCommand):
+    help = "Génère les dérivés WebP manquants ou périmés des images (pool de process)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=list(IMAGE_FIELDS),
+                            help="Images à traiter (répétable, par défaut: toutes)")
+        parser.add_argument('--force', action='store_true', help="Régénérer aussi les dérivés à jour")
+        parser.add_argument('--processes', type=int, help="Nombre de process (par défaut: IMAGE_VARIANT_PROCESSES)")
+
+    def handle(self, *args, **options):
+        total_errors = 0
+        for key in options['model'] or IMAGE_FIELDS:
+            start = time.perf_counter()
+            updated, errors = refresh_variants(key, force=options['force'], processes=options['processes'])
+            total_errors += len(errors)
+            self.stdout.write(f"{key}: {updated} images mises à jour en {time.perf_counter() - start:.1f} s")
+            for name, error in errors.items():
+                self.stdout.write(self.style.WARNING(f"  [ERREUR] {name}: {error}"))
+
+        style = self.style.WARNING if total_errors else self.style.SUCCESS
+        self.stdout.write(style(f"Terminé ({total_errors} erreurs)"))
@@ -0,0 +1,28 @@
+"""
+Statistiques et invalidation du cache de l'API catalogue
+"""
+from django.core.management.base import BaseCommand
+
+from shop.catalog_cache import bump_catalog_version, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Affiche les statistiques du cache catalogue (hits/misses) ou l'invalide"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true', help="Incrémente la version du catalogue")
+        parser.add_argument('--reset-stats', action='store_true', help="Remet les compteurs à zéro")
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            version = bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS(f"Cache invalidé (version {version})"))
+        if options['reset_stats']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro"))
+
+        stats = get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = (stats['hits'] / total * 100) if total else 0
+        self.stdout.write(f"Version du catalogue: {stats['version']}")
+        self.stdout.write(f"Hits: {stats['hits']} / Misses: {stats['misses']} ({ratio:.1f}% de hits)")
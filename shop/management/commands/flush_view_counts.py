@@ -0,0 +1,17 @@
+"""
+Reporte immédiatement les vues produits tamponnées dans la base
+"""
+from django.core.management.base import BaseCommand
+
+from shop.view_counter import flush_views, pending_views
+
+
+class Command(BaseCommand):
+    help = "Reporte dans la base les vues produits en attente (voir shop.view_counter)"
+
+    def handle(self, *args, **options):
+        pending = pending_views()
+        flushed = flush_views()
+        self.stdout.write(self.style.SUCCESS(
+            f"{flushed} vues reportées pour {len(pending)} produits"
+        ))
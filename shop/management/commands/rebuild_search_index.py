@@ -0,0 +1,25 @@
+"""
+Reconstruit les documents de recherche de tous les produits
+"""
+from django.core.management.base import BaseCommand
+
+from shop.models import Product, ProductSearchDocument
+from shop.search import index_products
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des produits"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help="Indexer uniquement les produits sans document")
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['missing']:
+            products = products.filter(search_document__isnull=True)
+        product_ids = list(products.values_list('pk', flat=True))
+
+        written = index_products(product_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} documents indexés ({ProductSearchDocument.objects.count()} au total)"
+        ))
@@ -0,0 +1,26 @@
+"""
+Reconstruit les attributs normalisés (ProductAttribute) à partir des caractéristiques
+"""
+from django.core.management.base import BaseCommand
+
+from shop.models import Product, ProductAttribute
+from shop.specs import index_product_attributes
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les attributs filtrables (spec[...]) de tous les produits"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subcategory', help="Slug de la sous-catégorie à traiter (par défaut: toutes)")
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['subcategory']:
+            products = products.filter(subcategory__slug=options['subcategory'])
+        product_ids = list(products.order_by('pk').values_list('pk', flat=True))
+
+        created = index_product_attributes(product_ids)
+        keys = ProductAttribute.objects.values('key').distinct().count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} attributs créés pour {len(product_ids)} produits ({keys} clés distinctes)"
+        ))
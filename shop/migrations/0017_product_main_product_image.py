@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0016_alter_brand_logo_alter_brand_logo_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='main_product_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.productimage', verbose_name='Image principale (galerie)'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Index FULLTEXT uniquement sur MySQL/MariaDB (les autres bases utilisent l'index Python)
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE shop_productsearchdocument ADD FULLTEXT INDEX product_search_fulltext (content)'
+        )
+
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE shop_productsearchdocument DROP INDEX product_search_fulltext')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0018_product_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='shop.product', verbose_name='Produit')),
+                ('content', models.TextField(verbose_name='Contenu indexé')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+    ]
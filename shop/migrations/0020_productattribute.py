@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0019_productsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, verbose_name='Clé canonique')),
+                ('name', models.CharField(max_length=200, verbose_name='Caractéristique')),
+                ('value_text', models.CharField(max_length=255, verbose_name='Valeur normalisée')),
+                ('value_number', models.DecimalField(blank=True, decimal_places=4, max_digits=16, null=True, verbose_name='Valeur numérique')),
+                ('unit', models.CharField(blank=True, max_length=20, verbose_name='Unité')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='shop.product', verbose_name='Produit')),
+                ('subcategory', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_attributes', to='shop.subcategory', verbose_name='Sous-catégorie')),
+            ],
+            options={
+                'verbose_name': 'Attribut du produit',
+                'verbose_name_plural': 'Attributs des produits',
+                'indexes': [models.Index(fields=['key', 'value_number'], name='attribute_key_number_idx'), models.Index(fields=['key', 'value_text'], name='attribute_key_text_idx'), models.Index(fields=['subcategory', 'key', 'value_number'], name='attribute_subcat_key_idx')],
+                'unique_together': {('product', 'key')},
+            },
+        ),
+    ]
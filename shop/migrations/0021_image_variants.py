@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0020_productattribute'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brand',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Dérivés du logo'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Dérivés de l'image"),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Dérivés de l'image"),
+        ),
+        migrations.AddField(
+            model_name='heroslide',
+            name='custom_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Dérivés de l'image"),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Dérivés de l'image"),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Dérivés de l'image"),
+        ),
+    ]
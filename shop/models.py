@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -9,6 +10,7 @@ class Category(models.Model):
     slug = models.SlugField(max_length=200, unique=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True, verbose_name="Image", 
                               help_text="Dimension recommandee: 800x320 px (ratio 2.5:1 paysage). Format: WebP/JPG < 100KB")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés de l'image")
     description = models.TextField(blank=True, verbose_name="Description")
     order = models.IntegerField(default=0, verbose_name="Ordre d'affichage")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
@@ -37,6 +39,7 @@ class SubCategory(models.Model):
     slug = models.SlugField(max_length=200, unique=True)
     image = models.ImageField(upload_to='subcategories/', blank=True, null=True, verbose_name="Image",
                               help_text="Dimension recommandee: 400x450 px (ratio 1:1 carre/portrait). Pour CreativeBackground et SubcategoryShowcase. Format: WebP/JPG < 80KB")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés de l'image")
     description = models.TextField(blank=True, verbose_name="Description")
     order = models.IntegerField(default=0, verbose_name="Ordre d'affichage")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
@@ -67,6 +70,7 @@ class Brand(models.Model):
     slug = models.SlugField(max_length=200, unique=True)
     logo = models.ImageField(upload_to='brands/', blank=True, null=True, verbose_name="Logo (Upload)",
                              help_text="Dimension recommandee: 200x200 px (carre). Logo affiche dans un cercle. Format: PNG transparent ou WebP < 50KB")
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés du logo")
     logo_url = models.URLField(blank=True, max_length=500, verbose_name="URL du Logo", help_text="URL directe de l'image du logo (même dimension: 200x200 px carré)")
     description = models.TextField(blank=True, verbose_name="Description")
     order = models.IntegerField(default=0, verbose_name="Ordre d'affichage")
@@ -125,6 +129,7 @@ class Collection(models.Model):
     description = models.TextField(blank=True, verbose_name="Description")
     image = models.ImageField(upload_to='collections/', blank=True, null=True, verbose_name="Image",
                               help_text="Dimension recommandee: 600x600 px (carre). Format: WebP/JPG < 100KB")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés de l'image")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -188,6 +193,9 @@ class Product(models.Model):
     # Images
     main_image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Image principale (deprecated)",
                                    help_text="Dimension recommandee: 600x600 px (carre 1:1). Fond blanc. Format: WebP/JPG < 100KB")
+    # Pointeur dénormalisé vers l'image affichée dans les listes (maintenu par refresh_main_image)
+    main_product_image = models.ForeignKey('ProductImage', on_delete=models.SET_NULL, null=True, blank=True,
+                                           related_name='+', editable=False, verbose_name="Image principale (galerie)")
     
     # Métadonnées
     views_count = models.IntegerField(default=0, verbose_name="Nombre de vues")
@@ -202,6 +210,14 @@ class Product(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['-created_at']
+        # Index des tris de l'API (InnoDB ajoute l'id à chaque index: pagination keyset)
+        indexes = [
+            models.Index(fields=['created_at'], name='product_created_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
+            models.Index(fields=['views_count'], name='product_views_idx'),
+            models.Index(fields=['category', 'created_at'], name='product_cat_created_idx'),
+            models.Index(fields=['subcategory', 'created_at'], name='product_subcat_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.name}"
@@ -228,16 +244,40 @@ class Product(models.Model):
     @property
     def get_main_image(self):
         """Retourne l'image principale du produit"""
-        main_img = self.images.filter(is_main=True).first()
-        if main_img:
-            return main_img.image
-        # Si pas d'image principale, prendre la première image
-        first_img = self.images.first()
-        if first_img:
-            return first_img.image
+        # Le pointeur est chargé via select_related('main_product_image'): aucune requête par produit
+        if self.main_product_image_id:
+            return self.main_product_image.image
         # Sinon retourner l'ancienne main_image si elle existe
         return self.main_image if self.main_image else None
 
+    def compute_main_image(self):
+        """Retourne la ProductImage à utiliser comme image principale"""
+        # Image marquée principale, sinon la première image de la galerie
+        return self.images.order_by('-is_main', 'order', 'id').first()
+
+    def refresh_main_image(self):
+        """Recalcule et enregistre le pointeur vers l'image principale"""
+        image = self.compute_main_image()
+        self.main_product_image = image
+        Product.objects.filter(pk=self.pk).update(main_product_image=image, updated_at=timezone.now())
+        return image
+
+    @staticmethod
+    def refresh_main_images(product_ids):
+        """refresh_main_image pour plusieurs produits (après un bulk_create d'images, sans signaux)"""
+        product_ids = set(product_ids)
+        main_images = {}
+        for product_id, image_id in ProductImage.objects.filter(product_id__in=product_ids).order_by(
+            'product_id', '-is_main', 'order', 'id'
+        ).values_list('product_id', 'id'):
+            main_images.setdefault(product_id, image_id)
+
+        now = timezone.now()
+        Product.objects.bulk_update([
+            Product(pk=pk, main_product_image_id=main_images.get(pk), updated_at=now)
+            for pk in product_ids
+        ], ['main_product_image', 'updated_at'], batch_size=500)
+
 
 class ProductImage(models.Model):
     """
@@ -246,6 +286,8 @@ class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images', verbose_name="Produit")
     image = models.ImageField(upload_to='products/gallery/', verbose_name="Image",
                               help_text="Dimension recommandee: 600x600 px (carre 1:1). Fond blanc prefere. Format: WebP/JPG < 100KB")
+    # Tailles WebP générées (voir shop.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés de l'image")
     is_main = models.BooleanField(default=False, verbose_name="Image principale")
     order = models.IntegerField(default=0, verbose_name="Ordre")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -278,6 +320,51 @@ class ProductSpecification(models.Model):
         return f"{self.key}: {self.value}"
 
 
+class ProductAttribute(models.Model):
+    """
+    Caractéristique normalisée et indexée (dérivée de ProductSpecification, voir shop.specs)
+    Permet de filtrer par valeur numérique: VRAM entre 8 et 16 Go, fréquence >= 144 Hz
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attributes', verbose_name="Produit")
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='product_attributes', verbose_name="Sous-catégorie")
+    key = models.CharField(max_length=100, verbose_name="Clé canonique")
+    name = models.CharField(max_length=200, verbose_name="Caractéristique")
+    value_text = models.CharField(max_length=255, verbose_name="Valeur normalisée")
+    value_number = models.DecimalField(max_digits=16, decimal_places=4, null=True, blank=True, verbose_name="Valeur numérique")
+    unit = models.CharField(max_length=20, blank=True, verbose_name="Unité")
+
+    class Meta:
+        verbose_name = "Attribut du produit"
+        verbose_name_plural = "Attributs des produits"
+        unique_together = ['product', 'key']
+        indexes = [
+            models.Index(fields=['key', 'value_number'], name='attribute_key_number_idx'),
+            models.Index(fields=['key', 'value_text'], name='attribute_key_text_idx'),
+            models.Index(fields=['subcategory', 'key', 'value_number'], name='attribute_subcat_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.value_number if self.value_number is not None else self.value_text} {self.unit}".strip()
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Texte de recherche dénormalisé d'un produit (voir shop.search)
+    Nom, référence, marque, type, sous-catégorie et spécifications, sans accents
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='search_document', verbose_name="Produit")
+    content = models.TextField(verbose_name="Contenu indexé")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+
+    def __str__(self):
+        return f"Recherche: {self.product_id}"
+
+
 class HeroSlide(models.Model):
     """
     Slides pour le Hero Slider de la page d'accueil
@@ -300,6 +387,7 @@ class HeroSlide(models.Model):
     # Image personnalisée (optionnel - sinon utilise l'image de la catégorie/produit)
     custom_image = models.ImageField(upload_to='hero_slides/', blank=True, null=True, verbose_name="Image personnalisee", 
                                      help_text="Dimension recommandee: 1200x500 px (ratio 2.4:1 banniere). Mobile: image centree. Format: WebP/JPG < 150KB. Laissez vide pour utiliser l'image du produit/categorie")
+    custom_image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Dérivés de l'image")
     
     # Paramètres
     order = models.IntegerField(default=0, verbose_name="Ordre d'affichage", help_text="Plus petit = affiché en premier")
@@ -354,7 +442,22 @@ class HeroSlide(models.Model):
                 return main_image.url
         
         return None
-    
+
+    def get_image_variants(self):
+        """(image, dérivés) de l'image affichée, dans le même ordre de priorité que get_image_url"""
+        if self.custom_image:
+            return self.custom_image, self.custom_image_variants
+
+        if self.slide_type == 'category' and self.category and self.category.image:
+            return self.category.image, self.category.image_variants
+        elif self.slide_type == 'subcategory' and self.subcategory and self.subcategory.image:
+            return self.subcategory.image, self.subcategory.image_variants
+        elif self.slide_type == 'product' and self.product and self.product.main_product_image_id:
+            main_image = self.product.main_product_image
+            return main_image.image, main_image.image_variants
+
+        return None, None
+
     def get_link(self):
         """Retourne le lien vers l'élément"""
         if self.slide_type == 'category' and self.category:
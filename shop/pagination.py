@@ -0,0 +1,129 @@
+"""
+Pagination par curseur (keyset) pour l'API produits
+
+Au lieu de COUNT(*) + OFFSET n, chaque page reprend après la dernière ligne de la page
+précédente: WHERE (tri, id) > (valeurs du curseur) ORDER BY tri, id LIMIT n.
+Le coût d'une page ne dépend donc plus de sa profondeur.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination keyset, compatible avec n'importe quel tri de OrderingFilter
+    L'id est ajouté comme dernier critère de tri pour garantir un ordre total et stable.
+    Les champs triés doivent être non NULL (price, name, created_at, views_count).
+    Les annotations (ex: search_rank) sont acceptées si leur valeur est sérialisable en JSON.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def get_ordering(self, queryset):
+        """Retourne [(champ, descendant)] avec id comme départage"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        fields = []
+        for item in ordering:
+            item = force_str(item)
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = 'id'
+            fields.append((name, descending))
+        if not any(name == 'id' for name, _ in fields):
+            # Même sens que le dernier critère pour rester compatible avec un index (tri, id)
+            fields.append(('id', fields[-1][1] if fields else False))
+        return fields
+
+    def get_model_field(self, name):
+        """Champ du modèle, ou None pour une annotation"""
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self.ordering:
+            field = self.get_model_field(name)
+            values.append(field.value_to_string(instance) if field else getattr(instance, name))
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            decoded = []
+            for (name, _), value in zip(self.ordering, values):
+                field = self.get_model_field(name)
+                decoded.append(field.to_python(value) if field else value)
+            return decoded
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def build_keyset_filter(self, values):
+        """(a, b, id) > (va, vb, vid) en tenant compte du sens de chaque critère"""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+
+        queryset = queryset.order_by(*[
+            f"{'-' if descending else ''}{name}" for name, descending in self.ordering
+        ])
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.build_keyset_filter(values))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante, sans COUNT
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_cursor = self.encode_cursor(results[-1]) if self.has_next else None
+        return results
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,315 @@
+"""
+Moteur de recherche plein texte des produits
+
+Chaque produit possède un document de recherche (ProductSearchDocument) contenant les
+termes normalisés (minuscules, sans accents, pluriels simples retirés) de son nom, sa
+référence, sa marque, son type, sa sous-catégorie et ses caractéristiques. Les champs
+importants sont répétés pour peser davantage dans le score.
+
+Deux moteurs lisent ces documents:
+- mysql: index FULLTEXT et MATCH ... AGAINST en mode booléen (production); les termes que
+  l'index ne contient pas (trop courts, mots vides InnoDB) sont cherchés par LIKE
+- python: index inversé en mémoire, par process, resynchronisé quand la version du
+  catalogue change (SQLite / développement)
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version, get_catalog_version
+from .indexing import schedule
+
+INDEX_BATCH_SIZE = 500
+
+# Marge de relecture: un document daté avant la dernière synchro mais commité après reste vu
+SYNC_OVERLAP = timedelta(seconds=60)
+
+# Poids (nombre de répétitions) de chaque champ dans le document
+FIELD_WEIGHTS = {
+    'reference': 4,
+    'name': 3,
+    'brand': 2,
+    'type': 2,
+    'subcategory': 1,
+    'specifications': 1,
+}
+
+STOPWORDS = {
+    'a', 'au', 'aux', 'avec', 'ce', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le',
+    'les', 'ou', 'par', 'pour', 'sans', 'sur', 'un', 'une',
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Mots vides de l'index FULLTEXT InnoDB (innodb_ft_default_stopword, MySQL et MariaDB):
+# jamais indexés, donc introuvables comme termes obligatoires de MATCH ... AGAINST
+MYSQL_STOPWORDS = {
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how',
+    'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what',
+    'when', 'where', 'who', 'will', 'with', 'und', 'www',
+}
+
+
+def fold(text):
+    """Minuscules sans accents: 'Écrans' -> 'ecrans'"""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def stem(token):
+    """Retire le pluriel simple (s / x final) des mots: 'ecrans' -> 'ecran', 'jeux' -> 'jeu'"""
+    if len(token) > 3 and token.isalpha() and token[-1] in 'sx':
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Découpe un texte en termes normalisés (sans mots vides)"""
+    return [stem(t) for t in TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+
+
+def normalize(text):
+    """Texte normalisé mot à mot: 'Écran-PC 27"' -> 'ecran pc 27'"""
+    return ' '.join(TOKEN_RE.findall(fold(text)))
+
+
+def query_terms(query):
+    """Termes d'une requête utilisateur, dédoublonnés dans l'ordre de saisie"""
+    terms = tokenize(query)
+    if not terms:
+        # Requête composée uniquement de mots vides ("de la"): on les garde
+        terms = [stem(t) for t in TOKEN_RE.findall(fold(query))]
+    return list(dict.fromkeys(terms))
+
+
+def build_search_document(product):
+    """
+    Construit le contenu indexé d'un produit
+    Nécessite brand, type, subcategory (select_related) et specifications (prefetch)
+    """
+    reference = product.reference or ''
+    fields = {
+        # La référence est aussi indexée sans séparateurs: RTX-4060 -> rtx4060
+        'reference': f"{reference} {re.sub(r'[^0-9A-Za-z]', '', reference)}",
+        'name': product.name,
+        'brand': product.brand.name if product.brand_id else product.brand_text,
+        'type': product.type.name if product.type_id else '',
+        'subcategory': product.subcategory.name if product.subcategory_id else '',
+        'specifications': ' '.join(spec.value for spec in product.specifications.all()),
+    }
+    terms = []
+    for field, text in fields.items():
+        terms.extend(tokenize(text) * FIELD_WEIGHTS[field])
+    return ' '.join(terms)
+
+
+def index_products(product_ids):
+    """(ré)indexe les produits donnés et retourne le nombre de documents écrits"""
+    from .models import Product, ProductSearchDocument
+
+    product_ids = list(product_ids)
+    written = 0
+    for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+        batch = product_ids[start:start + INDEX_BATCH_SIZE]
+        products = Product.objects.filter(pk__in=batch).select_related(
+            'brand', 'type', 'subcategory'
+        ).prefetch_related('specifications')
+        existing = set(
+            ProductSearchDocument.objects.filter(product_id__in=batch).values_list('product_id', flat=True)
+        )
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for product in products:
+            document = ProductSearchDocument(
+                product_id=product.pk, content=build_search_document(product), updated_at=now
+            )
+            (to_update if product.pk in existing else to_create).append(document)
+
+        # bulk_update n'applique pas auto_now: updated_at est renseigné explicitement
+        ProductSearchDocument.objects.bulk_update(to_update, ['content', 'updated_at'])
+        ProductSearchDocument.objects.bulk_create(to_create)
+        written += len(to_create) + len(to_update)
+
+    if written:
+        # Les index en mémoire des autres workers se resynchronisent sur la version du catalogue
+        bump_catalog_version()
+    return written
+
+
+def schedule_index(product_ids):
+    """Réindexe les produits après le commit de la transaction en cours"""
+    schedule(index_products, product_ids)
+
+
+class PythonSearchIndex:
+    """
+    Index inversé en mémoire (terme -> {product_id: fréquence}) avec recherche par préfixe
+    Les lecteurs utilisent un instantané (postings, documents, terms) remplacé en bloc à chaque
+    synchronisation: les recherches des threads d'un worker ne s'attendent pas entre elles.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = ({}, {}, [])
+        self.version = None
+        self.synced_until = None
+
+    @staticmethod
+    def _remove(postings, documents, copied, product_id):
+        for term in documents.pop(product_id, {}):
+            term_postings = PythonSearchIndex._postings(postings, copied, term)
+            del term_postings[product_id]
+            if not term_postings:
+                del postings[term]
+                copied.discard(term)
+
+    @staticmethod
+    def _add(postings, documents, copied, product_id, content):
+        counts = {}
+        for term in content.split():
+            counts[term] = counts.get(term, 0) + 1
+        documents[product_id] = counts
+        for term, count in counts.items():
+            PythonSearchIndex._postings(postings, copied, term)[product_id] = count
+
+    @staticmethod
+    def _postings(postings, copied, term):
+        """Produits du terme, copiés avant la première modification (l'ancien instantané reste intact)"""
+        if term not in copied:
+            postings[term] = dict(postings.get(term, ()))
+            copied.add(term)
+        return postings[term]
+
+    def sync(self):
+        """Charge les documents modifiés depuis la dernière synchronisation"""
+        from .models import ProductSearchDocument
+
+        version = get_catalog_version()
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            postings, documents, _ = self.state
+            postings, documents, copied = dict(postings), dict(documents), set()
+            synced_until = self.synced_until
+
+            documents_qs = ProductSearchDocument.objects.all()
+            if synced_until is not None:
+                documents_qs = documents_qs.filter(updated_at__gte=synced_until - SYNC_OVERLAP)
+                # Documents supprimés avec leur produit (CASCADE)
+                current = set(ProductSearchDocument.objects.values_list('product_id', flat=True))
+                for product_id in set(documents) - current:
+                    self._remove(postings, documents, copied, product_id)
+
+            for product_id, content, updated_at in documents_qs.values_list(
+                'product_id', 'content', 'updated_at'
+            ).iterator(chunk_size=2000):
+                self._remove(postings, documents, copied, product_id)
+                self._add(postings, documents, copied, product_id, content)
+                if synced_until is None or updated_at > synced_until:
+                    synced_until = updated_at
+
+            self.state = (postings, documents, sorted(postings))
+            self.synced_until = synced_until
+            self.version = version
+
+    def search(self, terms, limit):
+        self.sync()
+        return self._score(self.state, terms, limit)
+
+    def _score(self, state, terms, limit):
+        postings_by_term, documents, sorted_terms = state
+        total = len(documents) or 1
+        scores = None
+        for query_term in terms:
+            term_scores = {}
+            index = bisect.bisect_left(sorted_terms, query_term)
+            # Termes commençant par le terme de la requête (liste triée)
+            while index < len(sorted_terms) and sorted_terms[index].startswith(query_term):
+                term = sorted_terms[index]
+                index += 1
+                postings = postings_by_term[term]
+                idf = math.log(1 + total / len(postings))
+                # Un terme exact pèse plus qu'un terme dont la requête n'est que le préfixe
+                weight = idf if term == query_term else idf / 2
+                for product_id, count in postings.items():
+                    term_scores[product_id] = term_scores.get(product_id, 0) + count * weight
+            if scores is None:
+                scores = term_scores
+            else:
+                # Tous les termes de la requête doivent être présents
+                scores = {
+                    product_id: score + term_scores[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in term_scores
+                }
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+_python_index = PythonSearchIndex()
+
+
+def fulltext_terms(terms):
+    """
+    Sépare les termes cherchables par l'index FULLTEXT de ceux qu'il n'indexe pas: plus courts
+    que innodb_ft_min_token_size (PRODUCT_SEARCH_FULLTEXT_MIN_TOKEN_SIZE: "16", "i7", "pc")
+    ou mots vides InnoDB ("for", "with"). Retourne (termes indexés, autres termes).
+    """
+    min_size = settings.PRODUCT_SEARCH_FULLTEXT_MIN_TOKEN_SIZE
+    indexed = [term for term in terms if len(term) >= min_size and term not in MYSQL_STOPWORDS]
+    return indexed, [term for term in terms if term not in indexed]
+
+
+def _search_mysql(terms, limit):
+    indexed, others = fulltext_terms(terms)
+    conditions, params = [], []
+    score = '0'
+    if indexed:
+        # +terme* : terme obligatoire, recherche par préfixe
+        against = ' '.join(f'+{term}*' for term in indexed)
+        score = 'MATCH (content) AGAINST (%s IN BOOLEAN MODE)'
+        conditions.append(score)
+        params.append(against)
+    for term in others:
+        # Mot du document commençant par le terme (termes: [a-z0-9] uniquement, sans joker LIKE);
+        # filtre appliqué aux seuls documents trouvés par MATCH s'il y a des termes indexés
+        conditions.append("CONCAT(' ', content) LIKE %s")
+        params.append(f'% {term}%')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT product_id, {score} AS score '
+            'FROM shop_productsearchdocument '
+            f'WHERE {" AND ".join(conditions)} '
+            'ORDER BY score DESC, product_id LIMIT %s',
+            ([against] if indexed else []) + params + [limit],
+        )
+        return [(product_id, float(score)) for product_id, score in cursor.fetchall()]
+
+
+def get_backend():
+    backend = settings.PRODUCT_SEARCH_BACKEND
+    if backend == 'auto':
+        return 'mysql' if connection.vendor == 'mysql' else 'python'
+    return backend
+
+
+def search_products(query, limit=None):
+    """Retourne [(product_id, score)] triés par pertinence décroissante"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    limit = limit or settings.PRODUCT_SEARCH_MAX_RESULTS
+    if get_backend() == 'mysql':
+        return _search_mysql(terms, limit)
+    return _python_index.search(terms, limit)
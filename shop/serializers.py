@@ -2,9 +2,21 @@
 Serializers pour l'API REST
 """
 from rest_framework import serializers
+
+from .images import build_srcset
 from .models import Category, SubCategory, Type, Product, ProductImage, ProductSpecification, Brand, HeroSlide
 
 
+def in_stock_product_count(obj):
+    """Nombre de produits en stock d'une catégorie, sous-catégorie ou marque"""
+    # Annotation calculée par les ViewSets (une requête groupée par niveau)
+    count = getattr(obj, 'in_stock_product_count', None)
+    if count is None:
+        # Sérialisation hors ViewSet: requête COUNT individuelle
+        count = obj.products.filter(status='in_stock').count()
+    return count
+
+
 class BrandSerializer(serializers.ModelSerializer):
     """Serializer pour les marques"""
     logo_url_computed = serializers.SerializerMethodField()
@@ -25,16 +37,17 @@ class BrandSerializer(serializers.ModelSerializer):
         return None
     
     def get_product_count(self, obj):
-        return obj.products.filter(status='in_stock').count()
+        return in_stock_product_count(obj)
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer pour les images de produits"""
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'image_url', 'is_main', 'order']
+        fields = ['id', 'image', 'image_url', 'srcset', 'is_main', 'order']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -43,6 +56,10 @@ class ProductImageSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_srcset(self, obj):
+        """URLs des tailles WebP par largeur ({'160': url, ...})"""
+        return build_srcset(self.context.get('request'), obj.image, obj.image_variants)
+
 
 class ProductSpecificationSerializer(serializers.ModelSerializer):
     """Serializer pour les spécifications de produits"""
@@ -65,6 +82,7 @@ class TypeSerializer(serializers.ModelSerializer):
 class ProductListSerializer(serializers.ModelSerializer):
     """Serializer pour la liste des produits (version simple)"""
     main_image_url = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     discount_percentage = serializers.IntegerField(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -78,7 +96,7 @@ class ProductListSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'id', 'reference', 'name', 'slug', 'price', 'discount_price',
-            'final_price', 'discount_percentage', 'main_image_url',
+            'final_price', 'discount_percentage', 'main_image_url', 'main_image_srcset',
             'is_bestseller', 'is_featured', 'is_new', 'show_in_ad_slider', 'status', 'quantity',
             'category_name', 'category_slug', 'subcategory_name', 'subcategory_slug',
             'brand_name', 'brand_logo_url'
@@ -91,6 +109,13 @@ class ProductListSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(main_image.url)
         return None
+
+    def get_main_image_srcset(self, obj):
+        """Tailles WebP de l'image principale (pointeur chargé via select_related)"""
+        if not obj.main_product_image_id:
+            return {}
+        main_image = obj.main_product_image
+        return build_srcset(self.context.get('request'), main_image.image, main_image.image_variants)
     
     def get_brand_logo_url(self, obj):
         if obj.brand and obj.brand.logo:
@@ -191,7 +216,7 @@ class SubCategoryListSerializer(serializers.ModelSerializer):
         return None
     
     def get_product_count(self, obj):
-        return obj.products.filter(status='in_stock').count()
+        return in_stock_product_count(obj)
 
 
 class SubCategoryDetailSerializer(serializers.ModelSerializer):
@@ -223,7 +248,7 @@ class SubCategoryDetailSerializer(serializers.ModelSerializer):
         }
     
     def get_product_count(self, obj):
-        return obj.products.filter(status='in_stock').count()
+        return in_stock_product_count(obj)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -247,12 +272,13 @@ class CategorySerializer(serializers.ModelSerializer):
         return None
     
     def get_product_count(self, obj):
-        return Product.objects.filter(category=obj, status='in_stock').count()
+        return in_stock_product_count(obj)
 
 
 class HeroSlideSerializer(serializers.ModelSerializer):
     """Serializer pour les Hero Slides"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     link = serializers.SerializerMethodField()
     target_name = serializers.SerializerMethodField()
     badge = serializers.SerializerMethodField()
@@ -262,7 +288,7 @@ class HeroSlideSerializer(serializers.ModelSerializer):
     class Meta:
         model = HeroSlide
         fields = [
-            'id', 'title', 'description', 'slide_type', 'image_url',
+            'id', 'title', 'description', 'slide_type', 'image_url', 'image_srcset',
             'link', 'target_name', 'badge', 'price', 'discount',
             'order', 'is_active'
         ]
@@ -275,6 +301,11 @@ class HeroSlideSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(image_url)
         return None
+
+    def get_image_srcset(self, obj):
+        """Tailles WebP de l'image affichée ({'160': url, ...})"""
+        image, variants = obj.get_image_variants()
+        return build_srcset(self.context.get('request'), image, variants)
     
     def get_link(self, obj):
         """Retourne le lien vers l'élément"""
@@ -0,0 +1,91 @@
+"""
+Signaux du shop
+"""
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .catalog_cache import bump_catalog_version
+from .images import IMAGE_FIELDS, schedule_variants
+from .search import schedule_index
+from .specs import schedule_attributes
+from .models import (
+    Category, SubCategory, Type, Brand, Collection, Product,
+    ProductImage, ProductSpecification, HeroSlide
+)
+
+CATALOG_MODELS = [
+    Category, SubCategory, Type, Brand, Collection, Product,
+    ProductImage, ProductSpecification, HeroSlide,
+]
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(sender, instance, raw=False, **kwargs):
+    """Met à jour l'image principale du produit après ajout/modification d'une image"""
+    if raw:
+        return
+    Product(pk=instance.product_id).refresh_main_image()
+
+
+@receiver(post_delete, sender=ProductImage)
+def product_image_deleted(sender, instance, **kwargs):
+    """Choisit une nouvelle image principale après suppression d'une image"""
+    # Le produit peut être en cours de suppression (cascade): update() est alors sans effet
+    Product(pk=instance.product_id).refresh_main_image()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    """Met à jour le document de recherche et les attributs (sous-catégorie) du produit"""
+    if raw:
+        return
+    schedule_index([instance.pk])
+    schedule_attributes([instance.pk])
+
+
+@receiver(post_save, sender=ProductSpecification)
+@receiver(post_delete, sender=ProductSpecification)
+def product_specification_changed(sender, instance, raw=False, **kwargs):
+    """Les caractéristiques alimentent le document de recherche et les attributs normalisés"""
+    if raw:
+        return
+    # Le produit peut être en cours de suppression (cascade): il est alors ignoré
+    schedule_index([instance.product_id])
+    schedule_attributes([instance.product_id])
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Type)
+@receiver(post_save, sender=SubCategory)
+def product_relation_saved(sender, instance, raw=False, **kwargs):
+    """Un renommage de marque, type ou sous-catégorie change le document de ses produits"""
+    if raw:
+        return
+    product_ids = list(instance.products.values_list('pk', flat=True))
+    schedule_index(product_ids)
+    if sender is SubCategory:
+        # Les clés canoniques dépendent du nom de la sous-catégorie
+        schedule_attributes(product_ids)
+
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    """Génère les dérivés (tailles WebP) d'une image nouvelle ou remplacée"""
+    if raw:
+        return
+    schedule_variants(VARIANT_KEYS[sender], instance)
+
+
+VARIANT_KEYS = {apps.get_model(label): key for key, (label, *_) in IMAGE_FIELDS.items()}
+for model in VARIANT_KEYS:
+    post_save.connect(image_saved, sender=model, dispatch_uid=f'image_saved_{model.__name__}')
+
+
+def catalog_changed(sender, **kwargs):
+    """Invalide le cache de l'API catalogue"""
+    bump_catalog_version()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_changed_save_{model.__name__}')
+    post_delete.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_changed_delete_{model.__name__}')
@@ -0,0 +1,193 @@
+"""
+Caractéristiques normalisées des produits (ProductAttribute)
+
+Les ProductSpecification sont du texte libre ("Mémoire vidéo: 16 Go GDDR6"). Chaque
+caractéristique est dérivée en un attribut avec une clé canonique ('vram'), une valeur
+texte normalisée et, si elle contient un nombre, une valeur numérique convertie dans
+l'unité de référence de sa grandeur (1 To -> 1000 Go, 16 Mo -> 0.016 Go, 3,6 GHz ->
+3 600 000 000 Hz). Les attributs sont indexés (clé, valeur) et filtrables depuis l'API:
+/api/products/?spec[VRAM]=8-16, spec[Fréquence]=3-5GHz
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .indexing import schedule
+from .search import fold, normalize
+
+INDEX_BATCH_SIZE = 500
+
+# Clé normalisée -> clé canonique, pour toutes les sous-catégories
+KEY_ALIASES = {
+    'memoire video': 'vram',
+    'memoire graphique': 'vram',
+    'taille memoire': 'vram',
+    'capacite memoire': 'capacite',
+    'capacite de stockage': 'capacite',
+    'frequence de rafraichissement': 'rafraichissement',
+    'taux de rafraichissement': 'rafraichissement',
+    'taille de l ecran': 'taille-ecran',
+    'taille ecran': 'taille-ecran',
+    'diagonale': 'taille-ecran',
+    'frequence de base': 'frequence',
+    'frequence boost': 'frequence-boost',
+    'frequence turbo': 'frequence-boost',
+    'nombre de coeurs': 'coeurs',
+    'nombre de threads': 'threads',
+    'puissance totale': 'puissance',
+    'sensibilite': 'dpi',
+    'resolution du capteur': 'dpi',
+}
+
+# Même libellé, sens différent selon la sous-catégorie (nom normalisé de la sous-catégorie)
+SUBCATEGORY_KEY_ALIASES = {
+    'ecrans': {'frequence': 'rafraichissement', 'taille': 'taille-ecran'},
+    'cartes graphiques': {'memoire': 'vram', 'capacite': 'vram'},
+    'memoire ram': {'memoire': 'capacite', 'vitesse': 'frequence'},
+    'stockage': {'memoire': 'capacite'},
+}
+
+# Unité lue -> (unité de référence, facteur): une seule unité de référence par grandeur.
+# Fréquences en Hz (4 décimales en base: 144 Hz en MHz serait arrondi)
+UNITS = {
+    'go': ('Go', 1), 'gb': ('Go', 1), 'to': ('Go', 1000), 'tb': ('Go', 1000),
+    'mo': ('Go', Decimal('0.001')), 'mb': ('Go', Decimal('0.001')),
+    'hz': ('Hz', 1), 'khz': ('Hz', 10 ** 3), 'mhz': ('Hz', 10 ** 6), 'ghz': ('Hz', 10 ** 9),
+    'w': ('W', 1), 'kw': ('W', 1000),
+    'mm': ('mm', 1), 'cm': ('mm', 10),
+    'g': ('g', 1), 'kg': ('g', 1000),
+    'ms': ('ms', 1), 'dpi': ('DPI', 1), 'mah': ('mAh', 1), 'db': ('dB', 1), 'v': ('V', 1),
+    'rpm': ('RPM', 1), 'pouce': ('pouces', 1), 'pouces': ('pouces', 1), '"': ('pouces', 1),
+}
+
+NUMBER_RE = re.compile(r'(?<![a-z0-9.,])(\d+(?:[.,]\d+)?)\s*([a-z]+|")?')
+NUMBER_ONLY_RE = re.compile(r'^\s*\d+(?:[.,]\d+)?\s*([a-z]+|")?\s*$')
+SPEC_PARAM_RE = re.compile(r'^spec\[(.+)\]$')
+
+
+def canonical_key(name, subcategory_name=None):
+    """'Mémoire vidéo (Go)' -> 'vram'"""
+    key = normalize(re.sub(r'\(.*?\)', ' ', name or ''))
+    aliases = SUBCATEGORY_KEY_ALIASES.get(normalize(subcategory_name), {})
+    key = aliases.get(key) or KEY_ALIASES.get(key) or key
+    return key.replace(' ', '-')[:100]
+
+
+def parse_number(text, default_unit=''):
+    """
+    '3,6 GHz' -> (Decimal('3600000000'), 'Hz'), '1 To' -> (Decimal('1000'), 'Go'), None si aucun nombre
+    default_unit: unité lue ('ghz') appliquée à un nombre sans unité
+    """
+    match = NUMBER_RE.search(fold(text))
+    if not match:
+        return None
+    try:
+        number = Decimal(match.group(1).replace(',', '.'))
+    except InvalidOperation:
+        return None
+    unit, factor = UNITS.get(match.group(2) or default_unit, ('', 1))
+    return number * factor, unit
+
+
+def written_unit(text):
+    """Unité telle qu'écrite après le nombre ('3-5 GHz' -> 'ghz'), '' si aucune"""
+    match = NUMBER_RE.search(fold(text))
+    return (match.group(2) or '') if match else ''
+
+
+def build_attribute(product_id, subcategory_id, subcategory_name, name, value):
+    """Attribut (non enregistré) d'une caractéristique, ou None si la clé est vide"""
+    from .models import ProductAttribute
+
+    key = canonical_key(name, subcategory_name)
+    if not key:
+        return None
+    number = parse_number(value)
+    return ProductAttribute(
+        product_id=product_id,
+        subcategory_id=subcategory_id,
+        key=key,
+        name=name[:200],
+        value_text=normalize(value)[:255],
+        value_number=number[0] if number else None,
+        unit=number[1] if number else '',
+    )
+
+
+def index_product_attributes(product_ids):
+    """Recalcule les attributs des produits donnés et retourne le nombre d'attributs créés"""
+    from .models import ProductAttribute, ProductSpecification
+
+    product_ids = list(product_ids)
+    created = 0
+    for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+        batch = product_ids[start:start + INDEX_BATCH_SIZE]
+        specifications = ProductSpecification.objects.filter(product_id__in=batch).order_by(
+            'product_id', 'order', 'id'
+        ).values_list('product_id', 'product__subcategory_id', 'product__subcategory__name', 'key', 'value')
+
+        attributes, seen = [], set()
+        for product_id, subcategory_id, subcategory_name, name, value in specifications:
+            attribute = build_attribute(product_id, subcategory_id, subcategory_name, name, value)
+            # Une seule valeur par clé: la première caractéristique l'emporte
+            if attribute is None or (product_id, attribute.key) in seen:
+                continue
+            seen.add((product_id, attribute.key))
+            attributes.append(attribute)
+
+        with transaction.atomic():
+            ProductAttribute.objects.filter(product_id__in=batch).delete()
+            ProductAttribute.objects.bulk_create(attributes, batch_size=1000)
+        created += len(attributes)
+    return created
+
+
+def schedule_attributes(product_ids):
+    """Recalcule les attributs des produits après le commit de la transaction en cours"""
+    schedule(index_product_attributes, product_ids)
+
+
+def parse_spec_filter(raw):
+    """
+    Valeur d'un paramètre spec[...] -> lookups sur ProductAttribute
+    '8-16', '8-', '-16 Go', '1To-2To', '3-5 GHz': intervalle inclusif sur la valeur numérique
+    '16', '16 Go': valeur numérique exacte; 'AM5,LGA1700': valeurs texte (une au choix)
+    Avec une unité, les bornes sont converties dans l'unité de référence et seuls les attributs
+    de cette unité correspondent (16 Go n'est pas 16 Mo); sans unité, les bornes sont
+    comparées telles quelles aux valeurs en unité de référence (Go, Hz, W, mm, g...).
+    """
+    bounds = raw.split('-')
+    if len(bounds) == 2 and any(b.strip() for b in bounds):
+        # L'unité d'une seule borne vaut pour les deux ('3-5 GHz')
+        default_unit = next((unit for unit in map(written_unit, bounds) if unit), '')
+        numbers = [parse_number(b, default_unit) if b.strip() else () for b in bounds]
+        if all(n is not None for n in numbers):
+            lookups = {}
+            if numbers[0]:
+                lookups['value_number__gte'] = numbers[0][0]
+            if numbers[1]:
+                lookups['value_number__lte'] = numbers[1][0]
+            unit = next((n[1] for n in numbers if n), '')
+            if unit:
+                lookups['unit'] = unit
+            return lookups
+
+    if NUMBER_ONLY_RE.match(fold(raw)):
+        number, unit = parse_number(raw)
+        return {'value_number': number, 'unit': unit} if unit else {'value_number': number}
+    return {'value_text__in': [normalize(value) for value in raw.split(',') if value.strip()]}
+
+
+def filter_by_specs(queryset, query_params, subcategory_name=None):
+    """Applique les paramètres spec[Clé]=valeur (tous doivent correspondre)"""
+    for param, values in query_params.lists():
+        match = SPEC_PARAM_RE.match(param)
+        if not match:
+            continue
+        key = canonical_key(match.group(1), subcategory_name)
+        for raw in values:
+            lookups = {f'attributes__{lookup}': value for lookup, value in parse_spec_filter(raw).items()}
+            # Un seul filter() par critère: clé et valeur portent sur la même ligne d'attribut
+            queryset = queryset.filter(attributes__key=key, **lookups)
+    return queryset
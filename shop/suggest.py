@@ -0,0 +1,163 @@
+"""
+Index d'autocomplétion (type-ahead) en mémoire
+
+Liste triée de clés (texte normalisé à partir de chaque mot du libellé, type, id) parcourue
+par recherche dichotomique: "rtx 40" trouve "Carte graphique RTX 4060" via la clé
+"rtx 4060". Couvre les noms et références produits, les marques et les sous-catégories.
+
+L'index est chargé une fois par process puis mis à jour de façon incrémentale quand la
+version du catalogue change (signaux de shop.signals). Avec preload_app, gunicorn le
+construit avant le fork et les workers partagent ses pages mémoire (voir gunicorn_config).
+"""
+import bisect
+import gc
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from .catalog_cache import get_catalog_version
+from .search import SYNC_OVERLAP, TOKEN_RE, fold, normalize
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximum de clés examinées pour un préfixe très court ("a")
+SCAN_LIMIT = 2000
+
+# Priorité d'affichage à pertinence égale
+KIND_PRIORITY = {'brand': 3, 'subcategory': 2, 'product': 1}
+
+
+def suggest_keys(text):
+    """Clés d'un libellé: le texte normalisé à partir de chacun de ses mots"""
+    words = TOKEN_RE.findall(fold(text))
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class SuggestIndex:
+    """
+    keys: [(clé, type, id)] triée
+    items: {(type, id): (priorité, popularité, libellé normalisé, données)}
+    Les lecteurs utilisent un instantané (keys, items) remplacé en bloc à chaque synchronisation.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = ([], {})
+        self.version = None
+        self.synced_until = None
+
+    def _load_products(self, since=None):
+        from .models import Product
+
+        products = Product.objects.all()
+        if since is not None:
+            products = products.filter(updated_at__gte=since - SYNC_OVERLAP)
+        entries = {}
+        for pk, name, reference, slug, views_count, updated_at in products.values_list(
+            'pk', 'name', 'reference', 'slug', 'views_count', 'updated_at'
+        ).iterator(chunk_size=2000):
+            data = {'type': 'product', 'id': pk, 'label': name, 'slug': slug, 'reference': reference}
+            entries[('product', pk)] = (
+                (KIND_PRIORITY['product'], views_count, normalize(name), data),
+                suggest_keys(name) + suggest_keys(reference) + [normalize(reference).replace(' ', '')],
+            )
+            if self.synced_until is None or updated_at > self.synced_until:
+                self.synced_until = updated_at
+        return entries
+
+    def _load_groups(self):
+        from .models import Brand, SubCategory
+
+        entries = {}
+        for kind, model in (('brand', Brand), ('subcategory', SubCategory)):
+            for pk, name, slug in model.objects.filter(is_active=True).values_list('pk', 'name', 'slug'):
+                data = {'type': kind, 'id': pk, 'label': name, 'slug': slug}
+                entries[(kind, pk)] = ((KIND_PRIORITY[kind], 0, normalize(name), data), suggest_keys(name))
+        return entries
+
+    def sync(self):
+        """Applique les changements du catalogue depuis la dernière synchronisation"""
+        from .models import Product
+
+        version = get_catalog_version()
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            keys, items = self.state
+            full = self.synced_until is None
+
+            # Marques et sous-catégories: tables courtes, rechargées entièrement
+            changed = self._load_groups()
+            removed = {item for item in items if item[0] != 'product'}
+            changed.update(self._load_products(since=self.synced_until))
+            removed.update(item for item in changed if item[0] == 'product')
+            if not full:
+                # Produits supprimés
+                current = set(Product.objects.values_list('pk', flat=True))
+                removed.update(item for item in items if item[0] == 'product' and item[1] not in current)
+
+            items = {item: value for item, value in items.items() if item not in removed}
+            new_keys = []
+            for item, (value, item_keys) in changed.items():
+                items[item] = value
+                new_keys.extend((key, item[0], item[1]) for key in set(item_keys) if key)
+            new_keys.sort()
+            if full:
+                keys = new_keys
+            else:
+                # Deux listes triées concaténées: tri quasi linéaire
+                keys = [key for key in keys if (key[1], key[2]) not in removed] + new_keys
+                keys.sort()
+
+            self.state = (keys, items)
+            self.version = version
+
+    def suggest(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self.sync()
+        keys, items = self.state
+
+        matches = {}
+        index = bisect.bisect_left(keys, (prefix,))
+        end = min(len(keys), index + SCAN_LIMIT)
+        while index < end and keys[index][0].startswith(prefix):
+            _, kind, pk = keys[index]
+            priority, popularity, label, data = items[(kind, pk)]
+            # Libellé commençant par la saisie avant les correspondances en milieu de libellé
+            rank = (not label.startswith(prefix), -priority, -popularity, label)
+            if (kind, pk) not in matches or rank < matches[(kind, pk)][0]:
+                matches[(kind, pk)] = (rank, data)
+            index += 1
+
+        ranked = sorted(matches.values(), key=lambda match: match[0])
+        return [data for _, data in ranked[:limit]]
+
+
+_index = SuggestIndex()
+
+
+def get_suggestions(query, limit=None):
+    """Retourne les meilleures suggestions [{type, id, label, slug}] pour la saisie (limit: 1 à SUGGEST_MAX_LIMIT)"""
+    limit = max(1, min(limit or settings.SUGGEST_DEFAULT_LIMIT, settings.SUGGEST_MAX_LIMIT))
+    return _index.suggest(query, limit)
+
+
+def warm_up():
+    """
+    Construit l'index avant le fork des workers (hook gunicorn when_ready avec preload_app)
+    gc.freeze() évite que le ramasse-miettes ne recopie les pages partagées dans chaque worker.
+    Ne lève jamais d'exception: une erreur ici empêcherait gunicorn de démarrer.
+    """
+    try:
+        _index.sync()
+    except Exception:
+        # Base injoignable, migrations non appliquées...: chaque worker construira l'index à la première requête
+        logger.exception("Index de suggestions non préchargé")
+    connections.close_all()
+    gc.freeze()
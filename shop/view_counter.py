@@ -0,0 +1,124 @@
+"""
+Compteur de vues produits tamponné
+
+Les vues sont cumulées dans un fichier SQLite local partagé par tous les workers
+gunicorn, puis reportées périodiquement dans MySQL avec des UPDATE
+views_count = views_count + n groupés. La page détail ne fait plus d'écriture MySQL.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+_local = threading.local()
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _get_connection():
+    """Connexion SQLite propre au thread et au process (sûr après fork)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+
+    path = settings.VIEW_COUNTER_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS pending_views ('
+        'product_id INTEGER PRIMARY KEY, hits INTEGER NOT NULL)'
+    )
+    _local.conn = conn
+    _local.pid = os.getpid()
+    return conn
+
+
+def _add_hits(conn, hits):
+    conn.executemany(
+        'INSERT INTO pending_views (product_id, hits) VALUES (?, ?) '
+        'ON CONFLICT(product_id) DO UPDATE SET hits = hits + excluded.hits',
+        hits,
+    )
+
+
+def record_view(product_id):
+    """Enregistre une vue pour le produit (aucune requête MySQL)"""
+    try:
+        _add_hits(_get_connection(), [(product_id, 1)])
+    except sqlite3.Error as e:
+        # Un compteur de vues ne doit jamais faire échouer la page produit
+        logger.warning("Vue non comptabilisée pour le produit %s: %s", product_id, e)
+        return
+
+    interval = settings.VIEW_COUNTER_FLUSH_INTERVAL
+    if interval and time.monotonic() - _last_flush >= interval:
+        # Vidage en arrière-plan pour ne pas bloquer la réponse
+        threading.Thread(target=flush_views, daemon=True).start()
+
+
+def pending_views():
+    """Retourne {product_id: vues non encore reportées dans MySQL}"""
+    return dict(_get_connection().execute('SELECT product_id, hits FROM pending_views'))
+
+
+def flush_views():
+    """Reporte les vues en attente dans MySQL et retourne le nombre de vues reportées"""
+    from django.db import connection
+    from .models import Product
+
+    global _last_flush
+    if not _flush_lock.acquire(blocking=False):
+        return 0
+
+    try:
+        _last_flush = time.monotonic()
+        conn = _get_connection()
+
+        flushed = 0
+        last_id = 0
+        while True:
+            # Un lot à la fois sous le verrou d'écriture du tampon: les vues ne sont retirées qu'une
+            # fois ajoutées dans MySQL (échec: ROLLBACK, elles restent en attente). Les autres
+            # workers n'attendent que le report du lot en cours.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                batch = conn.execute(
+                    'SELECT product_id, hits FROM pending_views WHERE product_id > ? ORDER BY product_id LIMIT ?',
+                    (last_id, FLUSH_BATCH_SIZE),
+                ).fetchall()
+                if batch:
+                    increment = Case(
+                        *[When(pk=product_id, then=Value(count)) for product_id, count in batch],
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    )
+                    Product.objects.filter(pk__in=[product_id for product_id, _ in batch]).update(
+                        views_count=F('views_count') + increment
+                    )
+                    conn.executemany('DELETE FROM pending_views WHERE product_id = ?',
+                                     [(product_id,) for product_id, _ in batch])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                logger.exception("Échec du report des vues produits dans la base")
+                break
+            if not batch:
+                break
+            flushed += sum(count for _, count in batch)
+            last_id = batch[-1][0]
+        return flushed
+    finally:
+        _flush_lock.release()
+        if threading.current_thread() is not threading.main_thread():
+            # Connexion MySQL ouverte par le thread de vidage
+            connection.close()
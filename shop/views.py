@@ -4,8 +4,16 @@ Vues API pour le shop
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F, Prefetch
+from django.db.models import Q, F, Prefetch, Count, Case, When, Value, IntegerField
 from .models import Category, SubCategory, Type, Product, ProductImage, Brand, HeroSlide
+from .catalog_cache import CatalogCacheMixin, cache_catalog_response
+from .conditional import ConditionalGetMixin, conditional_get
+from .facets import FACETS, compute_facets
+from .pagination import KeysetPagination
+from .search import search_products
+from .specs import SPEC_PARAM_RE, filter_by_specs
+from .suggest import get_suggestions
+from .view_counter import record_view
 from .serializers import (
     CategorySerializer, SubCategoryListSerializer, SubCategoryDetailSerializer,
     TypeSerializer, ProductListSerializer, ProductDetailSerializer, BrandSerializer,
@@ -13,21 +21,34 @@ from .serializers import (
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Nombre de produits en stock, lu par les serializers via l'attribut in_stock_product_count
+# (un annotate() agrégé ignore Meta.ordering: toujours préciser order_by)
+IN_STOCK_PRODUCT_COUNT = Count('products', filter=Q(products__status='in_stock'))
+
+ACTIVE_SUBCATEGORIES = Prefetch(
+    'subcategories',
+    queryset=SubCategory.objects.filter(is_active=True).annotate(
+        in_stock_product_count=IN_STOCK_PRODUCT_COUNT
+    ).order_by('order', 'name')
+)
+
+
+class CategoryViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les catégories
     
     list: Retourne toutes les catégories avec leurs sous-catégories
     retrieve: Retourne une catégorie spécifique avec ses sous-catégories
     """
-    queryset = Category.objects.filter(is_active=True).prefetch_related(
-        Prefetch('subcategories', queryset=SubCategory.objects.filter(is_active=True))
-    )
+    queryset = Category.objects.filter(is_active=True).annotate(
+        in_stock_product_count=IN_STOCK_PRODUCT_COUNT
+    ).prefetch_related(ACTIVE_SUBCATEGORIES).order_by('order', 'name')
     serializer_class = CategorySerializer
     lookup_field = 'slug'
+    catalog_versioned = True
 
 
-class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class SubCategoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les sous-catégories
     
@@ -35,8 +56,11 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     retrieve: Retourne une sous-catégorie spécifique
     homepage: Retourne uniquement les sous-catégories à afficher sur la page d'accueil
     """
-    queryset = SubCategory.objects.filter(is_active=True).select_related('category')
+    queryset = SubCategory.objects.filter(is_active=True).select_related('category').annotate(
+        in_stock_product_count=IN_STOCK_PRODUCT_COUNT
+    ).order_by('order', 'name')
     lookup_field = 'slug'
+    catalog_versioned = True
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -62,6 +86,8 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @conditional_get
+    @cache_catalog_response
     def homepage(self, request):
         """
         Retourne les sous-catégories à afficher sur la page d'accueil
@@ -72,13 +98,14 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class TypeViewSet(viewsets.ReadOnlyModelViewSet):
+class TypeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les types/marques
     """
     queryset = Type.objects.filter(is_active=True).select_related('subcategory')
     serializer_class = TypeSerializer
     lookup_field = 'slug'
+    catalog_versioned = True
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -89,19 +116,22 @@ class TypeViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class BrandViewSet(viewsets.ReadOnlyModelViewSet):
+class BrandViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les marques
     
     list: Retourne toutes les marques
     retrieve: Retourne une marque spécifique avec ses produits
     """
-    queryset = Brand.objects.filter(is_active=True)
+    queryset = Brand.objects.filter(is_active=True).annotate(
+        in_stock_product_count=IN_STOCK_PRODUCT_COUNT
+    ).order_by('order', 'name')
     serializer_class = BrandSerializer
     lookup_field = 'slug'
+    catalog_versioned = True
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les produits
     
@@ -111,6 +141,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     new: Retourne les nouveaux produits
     featured: Retourne les produits en vedette
     search: Recherche de produits
+    suggest: Suggestions pour la saisie dans la barre de recherche
+    facets: Comptages par marque, sous-catégorie, type, statut et tranche de prix
     
     Paramètres de filtrage (query params):
     - category: slug de la catégorie
@@ -121,27 +153,67 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     - is_featured: true/false
     - min_price: prix minimum
     - max_price: prix maximum
-    - search: recherche textuelle
+    - status: statut de stock (in_stock, out_of_stock, preorder, discontinued)
+    - spec[Clé]: caractéristique, intervalle numérique (spec[VRAM]=8-16, spec[Capacité]=1To-,
+      spec[Fréquence]=3-5GHz; sans unité: unité de référence Go, Hz, W...)
+      ou valeurs texte (spec[Socket]=AM5,LGA1700)
+    - search: recherche textuelle (accents et pluriels ignorés, triée par pertinence), limitée
+      aux PRODUCT_SEARCH_MAX_RESULTS produits les plus pertinents (count compris)
     - ordering: champ de tri (price, -price, name, -created_at)
+    - pagination=cursor: pagination par curseur (scroll infini, sans COUNT), suivre le lien "next"
     """
     queryset = Product.objects.select_related(
-        'category', 'subcategory', 'type'
-    ).prefetch_related(
-        'images', 'specifications'
+        'category', 'subcategory', 'type', 'brand', 'main_product_image'
     )
     lookup_field = 'slug'
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['price', 'name', 'created_at', 'views_count']
     ordering = ['-created_at']
+    freshness_fields = (
+        'updated_at', 'category__updated_at', 'subcategory__updated_at',
+        'type__updated_at', 'brand__updated_at'
+    )
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
         return ProductListSerializer
     
+    @property
+    def paginator(self):
+        """Pagination par curseur si ?pagination=cursor, sinon pagination par numéro de page"""
+        if not hasattr(self, '_paginator') and self.request.query_params.get('pagination') == 'cursor':
+            self._paginator = KeysetPagination()
+        return super().paginator
+    
+    def use_conditional_get(self):
+        # L'agrégat COUNT/MAX annulerait l'intérêt de la pagination par curseur
+        return self.request.query_params.get('pagination') != 'cursor'
+    
+    def get_freshness_querysets(self):
+        if self.action == 'facets':
+            # Les facettes comptent aussi les produits exclus par leur propre filtre
+            queryset = self.filter_products(Product.objects.all(), exclude=FACETS)
+            return [(queryset, self.freshness_fields)]
+        querysets = super().get_freshness_querysets()
+        if self.action == 'ad_slider':
+            querysets.append((Category.objects.filter(is_active=True), ('updated_at',)))
+        return querysets
+    
     def get_queryset(self):
         queryset = super().get_queryset()
         
+        # Les images et spécifications ne sont sérialisées que dans le détail
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('images', 'specifications')
+        
+        return self.filter_products(queryset)
+    
+    def filter_products(self, queryset, exclude=()):
+        """
+        Applique les filtres de la query string
+        exclude: facettes dont le filtre est ignoré (voir shop.facets)
+        """
         # Filtrer par catégorie
         category_slug = self.request.query_params.get('category', None)
         if category_slug:
@@ -149,17 +221,17 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Filtrer par sous-catégorie
         subcategory_slug = self.request.query_params.get('subcategory', None)
-        if subcategory_slug:
+        if subcategory_slug and 'subcategory' not in exclude:
             queryset = queryset.filter(subcategory__slug=subcategory_slug)
         
         # Filtrer par type
         type_slug = self.request.query_params.get('type', None)
-        if type_slug:
+        if type_slug and 'type' not in exclude:
             queryset = queryset.filter(type__slug=type_slug)
         
         # Filtrer par marque (ID ou slug)
         brand = self.request.query_params.get('brand', None)
-        if brand:
+        if brand and 'brand' not in exclude:
             # Essayer d'abord par ID, sinon par slug
             try:
                 queryset = queryset.filter(brand_id=int(brand))
@@ -189,37 +261,72 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                 discount_price__lt=F('price')
             )
         
+        # Filtrer par statut (in_stock, out_of_stock, preorder, discontinued)
+        status = self.request.query_params.get('status', None)
+        if status and 'status' not in exclude:
+            queryset = queryset.filter(status=status)
+        
         # Filtrer par prix
         min_price = self.request.query_params.get('min_price', None)
-        if min_price:
+        if min_price and 'price' not in exclude:
             queryset = queryset.filter(price__gte=min_price)
         
         max_price = self.request.query_params.get('max_price', None)
-        if max_price:
+        if max_price and 'price' not in exclude:
             queryset = queryset.filter(price__lte=max_price)
         
-        # Recherche textuelle
+        # Filtrer par caractéristiques: spec[VRAM]=8-16, spec[Socket]=AM5 (voir shop.specs)
+        if any(SPEC_PARAM_RE.match(param) for param in self.request.query_params):
+            if not hasattr(self, '_spec_subcategory_name'):
+                # Les clés canoniques peuvent dépendre de la sous-catégorie
+                self._spec_subcategory_name = SubCategory.objects.filter(
+                    slug=subcategory_slug
+                ).values_list('name', flat=True).first() if subcategory_slug else None
+            queryset = filter_by_specs(queryset, self.request.query_params, self._spec_subcategory_name)
+        
+        # Recherche textuelle (index plein texte, voir shop.search)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(reference__icontains=search) |
-                Q(brand__name__icontains=search) |
-                Q(brand_text__icontains=search)
+            # Mémorisé: get_queryset est aussi appelé pour l'ETag (voir ConditionalGetMixin)
+            if not hasattr(self, '_search_ranking'):
+                self._search_ranking = search_products(search)
+            ranking = self._search_ranking
+            queryset = queryset.filter(pk__in=[product_id for product_id, _ in ranking])
+            if self.action == 'facets':
+                # Les comptages n'ont pas besoin du tri par pertinence
+                return queryset
+            # search_rank: position inversée dans le classement (plus grand = plus pertinent)
+            queryset = queryset.annotate(
+                search_rank=Case(
+                    *[When(pk=product_id, then=Value(len(ranking) - i)) for i, (product_id, _) in enumerate(ranking)],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
             )
+            # Sans paramètre ordering, trier par pertinence
+            self.ordering = ['-search_rank', '-created_at']
         
         return queryset
     
+    def not_modified(self, request, view_kwargs):
+        # Le client a déjà la fiche produit en cache: la vue compte quand même
+        if self.action == 'retrieve':
+            product_id = self.filter_queryset(self.get_queryset()).filter(
+                slug=view_kwargs['slug']
+            ).values_list('pk', flat=True).first()
+            if product_id is not None:
+                record_view(product_id)
+    
+    @conditional_get
     def retrieve(self, request, *args, **kwargs):
-        """Incrémenter le compteur de vues"""
+        """Incrémenter le compteur de vues (tamponné, voir shop.view_counter)"""
         instance = self.get_object()
-        instance.views_count += 1
-        instance.save(update_fields=['views_count'])
+        record_view(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def bestsellers(self, request):
         """
         Retourne les produits bestsellers
@@ -231,6 +338,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def new(self, request):
         """
         Retourne les nouveaux produits
@@ -242,6 +350,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def featured(self, request):
         """
         Retourne les produits en vedette
@@ -253,6 +362,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def by_subcategory(self, request):
         """
         Retourne les produits d'une sous-catégorie avec un nombre limité
@@ -273,6 +383,42 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Suggestions pour la barre de recherche (index en mémoire, aucune requête SQL)
+        GET /api/products/suggest/?q=rtx 40&limit=8
+        
+        Retourne des produits, marques et sous-catégories: [{type, id, label, slug}]
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', ''))
+        except ValueError:
+            # Absent ou invalide: SUGGEST_DEFAULT_LIMIT
+            limit = None
+        return Response({
+            'query': query,
+            'results': get_suggestions(query, limit),
+        })
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get
+    @cache_catalog_response
+    def facets(self, request):
+        """
+        Comptages pour les filtres d'une page catégorie / recherche
+        GET /api/products/facets/?category=composants&brand=asus&min_price=1000
+        
+        Accepte les mêmes filtres que la liste. Chaque facette (brand, subcategory, type,
+        status, price) ignore son propre filtre pour continuer à proposer les autres valeurs.
+        """
+        return Response(compute_facets(
+            lambda exclude: self.filter_products(Product.objects.all(), exclude=exclude)
+        ))
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get
+    @cache_catalog_response
     def ad_slider(self, request):
         """
         Retourne les catégories et produits à afficher dans le slider de publicité
@@ -288,7 +434,9 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         categories = Category.objects.filter(
             is_active=True,
             show_in_ad_slider=True
-        ).order_by('order', 'name')
+        ).annotate(
+            in_stock_product_count=IN_STOCK_PRODUCT_COUNT
+        ).prefetch_related(ACTIVE_SUBCATEGORIES).order_by('order', 'name')
         
         # Récupérer les produits à afficher dans le slider
         products = self.get_queryset().filter(
@@ -305,14 +453,15 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class HeroSlideViewSet(viewsets.ReadOnlyModelViewSet):
+class HeroSlideViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint pour les Hero Slides
     
     list: Retourne tous les slides actifs pour le hero slider
     """
     queryset = HeroSlide.objects.filter(is_active=True).select_related(
-        'category', 'subcategory', 'product'
+        'category', 'subcategory', 'product', 'product__main_product_image'
     ).order_by('order', '-created_at')
     serializer_class = HeroSlideSerializer
+    catalog_versioned = True
 
@@ -0,0 +1,168 @@
+"""
+Test de charge de la réservation du stock (orders.stock) avec de nombreux threads
+
+Crée une base de test (comme "manage.py test", la base configurée n'est pas modifiée),
+quelques produits au stock limité, puis lance des threads qui, chacun avec sa connexion,
+créent des commandes (CreateOrderSerializer), en confirment et en annulent au hasard,
+pendant que d'autres restituent les réservations expirées. À la fin, pour chaque produit:
+stock >= 0 et stock initial - stock = quantités des commandes qui détiennent du stock.
+
+Les verrous de ligne (SELECT ... FOR UPDATE) nécessitent la base MySQL/MariaDB configurée
+(DB_NAME, DB_USER...): SQLite verrouille toute la base et ignore select_for_update.
+
+Usage: python stress_stock_reservation.py [--threads 32] [--operations 2000] [--products 5] [--stock 40]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from orders.models import Order, OrderItem
+from orders.serializers import CreateOrderSerializer
+from orders.stock import InsufficientStock, change_status, release_expired
+from shop.models import Category, Product, SubCategory
+
+
+def create_order(product_ids):
+    lines = random.sample(product_ids, random.randint(1, min(3, len(product_ids))))
+    serializer = CreateOrderSerializer(data={
+        'first_name': 'Test', 'last_name': 'Stock', 'phone': '0600000000', 'address': '-', 'city': '-',
+        'items': [{'product_id': str(pk), 'quantity': str(random.randint(1, 3))} for pk in lines],
+    })
+    serializer.is_valid(raise_exception=True)
+    order = serializer.save()
+    if random.random() < 0.2:
+        # Réservation déjà expirée: restituée par release_expired pendant le test
+        Order.objects.filter(pk=order.pk).update(reserved_until=timezone.now() - timedelta(minutes=1))
+
+
+def change_random_order(status):
+    order = Order.objects.filter(status__in=['pending', 'confirmed']).order_by('?').first()
+    if order is not None:
+        change_status(order, status)
+
+
+def worker(operations, product_ids, results, barrier):
+    barrier.wait()
+    counts = Counter()
+    try:
+        for _ in range(operations):
+            operation = random.choices(['create', 'confirm', 'cancel', 'expire'], [70, 15, 10, 5])[0]
+            try:
+                if operation == 'create':
+                    create_order(product_ids)
+                elif operation == 'expire':
+                    release_expired()
+                else:
+                    change_random_order('confirmed' if operation == 'confirm' else 'cancelled')
+                counts[operation] += 1
+            except (ValidationError, InsufficientStock):
+                counts['stock insuffisant'] += 1
+            except OperationalError as e:
+                # 1213: interblocage, 1205: délai d'attente du verrou dépassé
+                counts[f'OperationalError {e.args[0]}'] += 1
+            except Exception as e:
+                counts[f'erreur {type(e).__name__}'] += 1
+    finally:
+        connections.close_all()
+        results.append(counts)
+
+
+def check_stock(initial):
+    """Écarts entre le stock restant et les quantités des commandes qui détiennent du stock"""
+    held = dict(
+        OrderItem.objects.filter(order__stock_deducted=True).values_list('product_id').annotate(Sum('quantity'))
+    )
+    errors = []
+    for product in Product.objects.filter(pk__in=initial):
+        expected = initial[product.pk] - held.get(product.pk, 0)
+        if product.quantity < 0 or product.quantity != expected:
+            errors.append(f"{product.reference}: stock {product.quantity}, attendu {expected}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--operations', type=int, default=2000, help="Opérations au total (tous threads)")
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=40, help="Stock initial de chaque produit")
+    args = parser.parse_args()
+
+    if connection.vendor == 'sqlite':
+        print("Ce test nécessite MySQL/MariaDB (verrous de ligne): SQLite n'est pas supporté")
+        return 2
+
+    random.seed(0)
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        category = Category.objects.create(name='Stress', slug='stress')
+        subcategory = SubCategory.objects.create(category=category, name='Stress', slug='stress')
+        Product.objects.bulk_create([
+            Product(reference=f'STRESS-{i:03d}', name=f'Produit {i}', slug=f'stress-{i}', description='-',
+                    category=category, subcategory=subcategory, price=100, quantity=args.stock)
+            for i in range(args.products)
+        ])
+        initial = dict(Product.objects.values_list('pk', 'quantity'))
+        product_ids = list(initial)
+        connections.close_all()
+
+        results = []
+        barrier = threading.Barrier(args.threads)
+        per_thread = max(1, args.operations // args.threads)
+        threads = [
+            threading.Thread(target=worker, args=(per_thread, product_ids, results, barrier))
+            for _ in range(args.threads)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        totals = sum(results, Counter())
+        errors = check_stock(initial)
+        print("=" * 72)
+        print(f"RÉSERVATION DU STOCK: {args.threads} threads, {per_thread * args.threads} opérations, "
+              f"{elapsed:.1f} s ({connection.vendor})")
+        print("=" * 72)
+        for name, count in sorted(totals.items()):
+            print(f"{name:<32} {count:>8}")
+        print("-" * 72)
+        print(f"Commandes créées: {Order.objects.count()}, "
+              f"détenant du stock: {Order.objects.filter(stock_deducted=True).count()}")
+        for product in Product.objects.filter(pk__in=initial).order_by('pk'):
+            print(f"{product.reference}: stock {initial[product.pk]} -> {product.quantity}")
+        print("-" * 72)
+        deadlocks = sum(count for name, count in totals.items() if name.startswith('OperationalError'))
+        if errors or deadlocks:
+            for error in errors:
+                print(f"ÉCART {error}")
+            print(f"ÉCHEC: {len(errors)} écart(s) de stock, {deadlocks} interblocage(s)/délai(s) de verrou")
+            return 1
+        print("OK: aucun stock négatif ni survendu, aucun interblocage")
+        return 0
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())